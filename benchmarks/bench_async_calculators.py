@@ -0,0 +1,79 @@
+"""
+Benchmark of an instrument of independent calculators, each running an external
+program which starts, waits for I/O and exits: run one after the other, on a thread
+pool, and awaited concurrently with Instrument.arun.
+
+Usage: python benchmarks/bench_async_calculators.py [number of calculators] [seconds of I/O]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+
+from libpyvinyl.AsyncBaseCalculator import AsyncBaseCalculator
+from libpyvinyl.BaseData import BaseData
+from libpyvinyl.Instrument import Instrument
+from libpyvinyl.Parameters import CalculatorParameters
+
+
+class NumberData(BaseData):
+    def __init__(
+        self,
+        key,
+        data_dict=None,
+        filename=None,
+        file_format_class=None,
+        file_format_kwargs=None,
+    ):
+        super().__init__(
+            key,
+            {"number": None},
+            data_dict,
+            filename,
+            file_format_class,
+            file_format_kwargs,
+        )
+
+    @classmethod
+    def supported_formats(cls):
+        return {}
+
+
+class ExternalCalculator(AsyncBaseCalculator):
+    def init_parameters(self):
+        parameters = CalculatorParameters()
+        parameters.new_parameter("io", unit="s").value = 0.5
+        self.parameters = parameters
+
+    async def abackengine(self):
+        script = f"import time; time.sleep({self.parameters['io'].value}); print(1)"
+        completed = await self.run_process(
+            sys.executable, "-c", script, capture_output=True
+        )
+        self.output[self.output_keys[0]].set_dict({"number": int(completed.stdout)})
+        return self.output
+
+
+def main(n=16, io=0.5):
+    AsyncBaseCalculator.max_processes = n
+    with tempfile.TemporaryDirectory() as tmpdir:
+        instrument = Instrument("external", instrument_base_dir=tmpdir)
+        for i in range(n):
+            calculator = ExternalCalculator(f"external{i}", None, f"out{i}", NumberData)
+            calculator.parameters["io"] = io
+            instrument.add_calculator(calculator)
+
+        print(f"{n} calculators, {io} s of I/O each")
+        for name, run in [
+            ("sequential", lambda: instrument.run()),
+            ("thread pool", lambda: instrument.run(max_workers=n)),
+            ("arun", lambda: asyncio.run(instrument.arun())),
+        ]:
+            start = time.perf_counter()
+            run()
+            print(f"{name:<12} {time.perf_counter() - start:>8.3f} s")
+
+
+if __name__ == "__main__":
+    main(*[float(arg) if "." in arg else int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,105 @@
+"""
+Benchmark of creating calculator variants with copy.deepcopy, as the copy constructor
+did, and with BaseCalculator.clone, for a calculator with in-memory input and output
+arrays and 1000 parameters, of which each variant modifies one.
+
+Usage: python benchmarks/bench_calculator_clone.py [number of variants] [array size]
+"""
+
+import copy
+import sys
+import time
+import tracemalloc
+
+import numpy
+
+from libpyvinyl.BaseCalculator import BaseCalculator
+from libpyvinyl.BaseData import BaseData
+from libpyvinyl.Parameters import CalculatorParameters
+
+PARAMETERS = 1000
+
+
+class ArrayData(BaseData):
+    def __init__(
+        self,
+        key,
+        data_dict=None,
+        filename=None,
+        file_format_class=None,
+        file_format_kwargs=None,
+    ):
+        super().__init__(
+            key,
+            {"array": None},
+            data_dict,
+            filename,
+            file_format_class,
+            file_format_kwargs,
+        )
+
+    @classmethod
+    def supported_formats(cls):
+        return {}
+
+
+class ScaleCalculator(BaseCalculator):
+    def init_parameters(self):
+        parameters = CalculatorParameters()
+        for i in range(PARAMETERS):
+            parameter = parameters.new_parameter(f"par_{i}", unit="m")
+            parameter.add_interval(0, 1e6, True)
+            parameter.value = float(i)
+        self.parameters = parameters
+
+    def backengine(self):
+        array = self.input["input"].get_data()["array"]
+        self.output["output"].set_dict(
+            {"array": array * self.parameters["par_0"].value}
+        )
+        return self.output
+
+
+def make_variants(calculator, n, copy_function):
+    """Create n variants, each with one parameter modified"""
+    variants = []
+    for i in range(n):
+        variant = copy_function(calculator)
+        variant.parameters[f"par_{i % PARAMETERS}"] = 1.0
+        variants.append(variant)
+    return variants
+
+
+def measure(calculator, n, copy_function):
+    """Return the time to create the variants, and the memory they hold"""
+    start = time.perf_counter()
+    make_variants(calculator, n, copy_function)
+    elapsed = time.perf_counter() - start
+    # tracemalloc slows the copies down, the memory is measured in a second pass
+    tracemalloc.start()
+    variants = make_variants(calculator, n, copy_function)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del variants
+    return elapsed, memory
+
+
+def main(n=50, size=100000):
+    data = ArrayData.from_dict({"array": numpy.ones(size)}, "input")
+    calculator = ScaleCalculator("scale", data, "output", ArrayData)
+    calculator.backengine()
+
+    print(f"{n} variants, {PARAMETERS} parameters, arrays of {size} floats")
+    print(f"{'copy':<10} {'time ms':>9} {'per variant ms':>15} {'held MiB':>9}")
+    for name, copy_function in [
+        ("deepcopy", copy.deepcopy),
+        ("clone", BaseCalculator.clone),
+    ]:
+        elapsed, memory = measure(calculator, n, copy_function)
+        print(
+            f"{name:<10} {elapsed * 1e3:>9.1f} {elapsed * 1e3 / n:>15.3f} {memory / 2**20:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,91 @@
+"""
+Benchmark of running a calculator with a large in-memory input for many parameter
+sets on a process pool: with ParameterSweep, which sends the calculator with each
+point, and with BaseCalculator.map, which sends it once to each worker and then only
+the parameter sets.
+
+Usage: python benchmarks/bench_calculator_map.py [number of parameter sets] [array size] [workers]
+"""
+
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy
+
+from libpyvinyl.BaseCalculator import BaseCalculator
+from libpyvinyl.BaseData import BaseData
+from libpyvinyl.ParameterSweep import ParameterSweep
+from libpyvinyl.Parameters import CalculatorParameters
+
+
+class ArrayData(BaseData):
+    def __init__(
+        self,
+        key,
+        data_dict=None,
+        filename=None,
+        file_format_class=None,
+        file_format_kwargs=None,
+    ):
+        super().__init__(
+            key,
+            {"array": None},
+            data_dict,
+            filename,
+            file_format_class,
+            file_format_kwargs,
+        )
+
+    @classmethod
+    def supported_formats(cls):
+        return {}
+
+
+class ScaleCalculator(BaseCalculator):
+    def init_parameters(self):
+        parameters = CalculatorParameters()
+        parameters.new_parameter("scale").value = 1.0
+        self.parameters = parameters
+
+    def backengine(self):
+        array = self.input["input"].get_data()["array"]
+        total = float(array.sum()) * self.parameters["scale"].value
+        self.output["output"].set_dict({"array": numpy.array([total])})
+        return self.output
+
+
+def main(n=200, size=1000000, workers=4):
+    data = ArrayData.from_dict({"array": numpy.ones(size)}, "input")
+    calculator = ScaleCalculator("scale", data, "output", ArrayData)
+    points = [{"scale": float(i)} for i in range(n)]
+    calculator_bytes = len(pickle.dumps(calculator.clone()))
+    point_bytes = sum(len(pickle.dumps(point)) for point in points)
+
+    print(f"{n} parameter sets, {workers} workers, input array of {size} floats")
+    print(f"{'run':<16} {'time s':>8} {'sent MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        start = time.perf_counter()
+        sweep = ParameterSweep(calculator, points, base_dir=tmpdir)
+        totals = sorted(
+            output["output"].get_data()["array"][0]
+            for _, _, output in sweep.run(max_workers=workers)
+        )
+        elapsed = time.perf_counter() - start
+        sent = (n * calculator_bytes + point_bytes) / 2**20
+        print(f"{'ParameterSweep':<16} {elapsed:>8.3f} {sent:>9.1f}")
+
+        start = time.perf_counter()
+        mapped = [
+            output["output"].get_data()["array"][0]
+            for output in calculator.map(points, max_workers=workers, base_dir=tmpdir)
+        ]
+        elapsed = time.perf_counter() - start
+        sent = (workers * calculator_bytes + point_bytes) / 2**20
+        print(f"{'map':<16} {elapsed:>8.3f} {sent:>9.1f}")
+        assert sorted(mapped) == totals
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,126 @@
+"""
+Benchmark of the dill dumps and of the checkpoints of a calculator with in-memory
+input and output arrays and 1000 parameters: the time to write and to load them, the
+time to inspect the parameters without the data, and their size.
+
+Usage: python benchmarks/bench_checkpoint.py [array size]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy
+
+from libpyvinyl.BaseCalculator import BaseCalculator
+from libpyvinyl.BaseData import BaseData
+from libpyvinyl.Checkpoint import Checkpoint
+from libpyvinyl.Parameters import CalculatorParameters
+
+PARAMETERS = 1000
+
+
+class ArrayData(BaseData):
+    def __init__(
+        self,
+        key,
+        data_dict=None,
+        filename=None,
+        file_format_class=None,
+        file_format_kwargs=None,
+    ):
+        super().__init__(
+            key,
+            {"array": None},
+            data_dict,
+            filename,
+            file_format_class,
+            file_format_kwargs,
+        )
+
+    @classmethod
+    def supported_formats(cls):
+        return {}
+
+
+class DetectorCalculator(BaseCalculator):
+    def init_parameters(self):
+        parameters = CalculatorParameters()
+        for i in range(PARAMETERS):
+            parameter = parameters.new_parameter(f"par_{i}", unit="m")
+            parameter.add_interval(0, 1e6, True)
+            parameter.value = float(i)
+        self.parameters = parameters
+
+    def backengine(self):
+        """A sparse detector image: mostly zeros, as is typical, so it compresses"""
+        size = len(self.input["input"].get_data()["array"])
+        image = numpy.zeros(size)
+        image[::100] = self.input["input"].get_data()["array"][::100]
+        self.output["output"].set_dict({"array": image})
+        return self.output
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def touch(calculator):
+    """Read all the data of the calculator, e.g. from memory maps"""
+    return sum(
+        float(data.get_data()["array"].sum())
+        for data in calculator.input.to_list() + calculator.output.to_list()
+    )
+
+
+def main(size=10000000):
+    rng = numpy.random.default_rng(0)
+    data = ArrayData.from_dict({"array": rng.random(size)}, "input")
+    calculator = DetectorCalculator("detector", data, "output", ArrayData)
+    calculator.backengine()
+    total = touch(calculator)
+
+    print(f"{PARAMETERS} parameters, 2 arrays of {size} floats")
+    print(
+        f"{'format':<18} {'write s':>8} {'load s':>8} {'inspect s':>10} {'load+read s':>12} {'size MiB':>9}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, write, load, inspect in [
+            (
+                "dill",
+                lambda fname: calculator.dump(fname),
+                DetectorCalculator.from_dump,
+                lambda fname: DetectorCalculator.from_dump(fname).parameters,
+            ),
+            (
+                "checkpoint",
+                lambda fname: calculator.checkpoint(fname),
+                DetectorCalculator.from_checkpoint,
+                lambda fname: Checkpoint(fname).parameters,
+            ),
+            (
+                "checkpoint deflate",
+                lambda fname: calculator.checkpoint(fname, compress=True),
+                DetectorCalculator.from_checkpoint,
+                lambda fname: Checkpoint(fname).parameters,
+            ),
+        ]:
+            fname = os.path.join(tmpdir, name.replace(" ", "_"))
+            write_time, _ = timed(write, fname)
+            load_time, loaded = timed(load, fname)
+            read_time, loaded_total = timed(touch, loaded)
+            assert loaded_total == total
+            inspect_time, parameters = timed(inspect, fname)
+            assert parameters["par_3"].value == 3.0
+            size_mib = os.path.getsize(fname) / 2**20
+            print(
+                f"{name:<18} {write_time:>8.3f} {load_time:>8.3f} {inspect_time:>10.3f} "
+                f"{load_time + read_time:>12.3f} {size_mib:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,87 @@
+"""
+Benchmark of repeated BaseData.get_data() calls on an HDF5 file mapping, with and
+without the read cache.
+
+Usage: python benchmarks/bench_data_cache.py [array size]
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+import h5py
+import numpy
+
+from libpyvinyl.BaseData import BaseData
+from libpyvinyl.BaseFormat import BaseFormat
+from libpyvinyl.DataCache import DataCache
+
+
+class ArrayData(BaseData):
+    def __init__(
+        self,
+        key,
+        data_dict=None,
+        filename=None,
+        file_format_class=None,
+        file_format_kwargs=None,
+    ):
+        super().__init__(
+            key,
+            {"array": None},
+            data_dict,
+            filename,
+            file_format_class,
+            file_format_kwargs,
+        )
+
+    @classmethod
+    def supported_formats(cls):
+        format_dict = {}
+        cls._add_ioformat(format_dict, ArrayH5Format)
+        return format_dict
+
+
+class ArrayH5Format(BaseFormat):
+    @classmethod
+    def format_register(cls):
+        return cls._create_format_register("H5", "HDF5 array", ".h5")
+
+    @classmethod
+    def read(cls, filename: str) -> dict:
+        with h5py.File(filename, "r") as h5:
+            return {"array": h5["array"][()]}
+
+    @classmethod
+    def write(cls, object, filename: str, key: str = None):
+        with h5py.File(filename, "w") as h5:
+            h5["array"] = object.get_data()["array"]
+        return object.from_file(filename, cls, key or object.key)
+
+    @staticmethod
+    def direct_convert_formats():
+        return []
+
+    @classmethod
+    def convert(cls, obj, output, output_format_class, key, **kwargs):
+        raise NotImplementedError
+
+
+def main(size=1000000, number=50):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "array.h5")
+        source = ArrayData.from_dict({"array": numpy.random.rand(size)}, "source")
+        data = source.write(filename, ArrayH5Format, "array")
+
+        print(f"{'cache':<10} {'ms/get_data':>12}")
+        for name, max_bytes in [("disabled", 0), ("enabled", 2**28)]:
+            DataCache.shared().clear()
+            DataCache.shared().max_bytes = max_bytes
+            seconds = min(timeit.repeat(data.get_data, number=number, repeat=3))
+            print(f"{name:<10} {seconds / number * 1e3:>12.3f}")
+        print(DataCache.shared())
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,50 @@
+"""
+Import-time benchmark of libpyvinyl, measured with `python -X importtime` in fresh
+interpreters.
+
+Usage: python benchmarks/bench_import_time.py [budget in ms]
+
+The exit status is 1 if the median import time exceeds the budget.
+"""
+
+import statistics
+import subprocess
+import sys
+
+MODULES = ["libpyvinyl", "dill", "json_tricks", "pint", "numpy"]
+
+
+def import_times(statement="import libpyvinyl"):
+    """Return the cumulative import time in microseconds of the modules imported by the statement."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(budget=None, repeat=7):
+    runs = [import_times() for _ in range(repeat)]
+    print(f"{'module':<15} {'imported':>10} {'median ms':>10}")
+    for module in MODULES:
+        values = [times[module] for times in runs if module in times]
+        median = f"{statistics.median(values) / 1000:.1f}" if values else "-"
+        print(f"{module:<15} {'yes' if values else 'no':>10} {median:>10}")
+
+    total = statistics.median(times["libpyvinyl"] for times in runs) / 1000
+    if budget is not None and total > budget:
+        print(f"import libpyvinyl took {total:.1f} ms, over the budget of {budget} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[float(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,63 @@
+"""
+Benchmark of the JSON and binary serialization of an instrument with 50k parameters.
+
+Usage: python benchmarks/bench_parameter_codec.py [number of parameters]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from libpyvinyl.Parameters import CalculatorParameters, InstrumentParameters
+
+UNITS = ["m", "meV", "s", "deg", ""]
+PARAMETERS_PER_CALCULATOR = 1000
+
+
+def make_instrument(n):
+    instrument = InstrumentParameters()
+    for c in range(max(1, n // PARAMETERS_PER_CALCULATOR)):
+        parameters = CalculatorParameters()
+        for i in range(PARAMETERS_PER_CALCULATOR):
+            parameter = parameters.new_parameter(
+                f"par_{i}", unit=UNITS[i % len(UNITS)], comment="bench"
+            )
+            if i % 10 == 0:
+                parameter.add_interval(0, 100, True)
+            if i % 50 == 0:
+                parameter.add_option([1.0, 2.0, 3.0], True)
+                parameter.value = 2.0
+            else:
+                parameter.value = float(i % 100)
+        instrument.add(f"calculator_{c}", parameters)
+    instrument.add_master_parameter(
+        "par_1", {key: "par_1" for key in instrument.parameters_dict}, unit="meV"
+    )
+    return instrument
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main(n=50000):
+    instrument = make_instrument(n)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        print(f"{'codec':<8} {'write s':>8} {'read s':>8} {'size MiB':>9}")
+        for codec, write, read in [
+            ("json", instrument.to_json, InstrumentParameters.from_json),
+            ("binary", instrument.to_binary, InstrumentParameters.from_binary),
+        ]:
+            fname = os.path.join(tmpdir, f"instrument.{codec}")
+            write_time, _ = timed(write, fname)
+            read_time, loaded = timed(read, fname)
+            assert loaded["calculator_0"]["par_3"].value == 3.0
+            size = os.path.getsize(fname) / 2**20
+            print(f"{codec:<8} {write_time:>8.2f} {read_time:>8.2f} {size:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
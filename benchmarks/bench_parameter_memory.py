@@ -0,0 +1,43 @@
+"""
+Memory benchmark of a CalculatorParameters collection holding many parameters.
+
+Usage: python benchmarks/bench_parameter_memory.py [number of parameters]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from libpyvinyl.Parameters import CalculatorParameters, Parameter
+
+UNITS = ["m", "meV", "s", "deg", ""]
+
+
+def make_parameters(n):
+    parameters = CalculatorParameters()
+    for i in range(n):
+        parameter = Parameter(f"par_{i}", unit=UNITS[i % len(UNITS)], comment="bench")
+        if i % 10 == 0:
+            parameter.add_interval(0, 100, True)
+        parameter.value = float(i % 100)
+        parameters.add(parameter)
+    return parameters
+
+
+def main(n=100000):
+    tracemalloc.start()
+    start = time.perf_counter()
+    parameters = make_parameters(n)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"parameters:          {len(parameters.parameters)}")
+    print(f"build time:          {elapsed:.2f} s")
+    print(f"memory:              {current / 2**20:.1f} MiB")
+    print(f"peak memory:         {peak / 2**20:.1f} MiB")
+    print(f"bytes per parameter: {current / n:.0f}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,37 @@
+"""
+Micro-benchmark of the value getter and setter of Parameter.
+
+Usage: python benchmarks/bench_parameter_value.py
+"""
+
+import timeit
+
+from pint import Quantity
+
+from libpyvinyl.Parameters import Parameter
+
+
+def make_parameter():
+    parameter = Parameter("energy", unit="meV", comment="Energy")
+    parameter.add_interval(0, 1e6, True)
+    parameter.value = 10.0
+    return parameter
+
+
+def main(number=20000):
+    parameter = make_parameter()
+    quantity = Quantity(12.0, "eV")
+    cases = {
+        "get value": lambda: parameter.value,
+        "set float": lambda: setattr(parameter, "value", 12.0),
+        "set Quantity in other unit": lambda: setattr(parameter, "value", quantity),
+        "get pint_value": lambda: parameter.pint_value,
+    }
+    print(f"{'case':<30} {'us/call':>10}")
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=number, repeat=3))
+        print(f"{name:<30} {seconds / number * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark of the overhead of the profiler: the time of BaseData.get_data on a dict
+mapping and of the run of an instrument of small calculators, without an active
+profiler, with one, and with one tracing the memory.
+
+Usage: python benchmarks/bench_profiler.py [number of get_data calls] [number of calculators]
+"""
+
+import sys
+import timeit
+
+from libpyvinyl.BaseCalculator import BaseCalculator
+from libpyvinyl.BaseData import BaseData
+from libpyvinyl.Instrument import Instrument
+from libpyvinyl.Parameters import CalculatorParameters
+from libpyvinyl.Profiler import Profiler
+
+
+class NumberData(BaseData):
+    def __init__(
+        self,
+        key,
+        data_dict=None,
+        filename=None,
+        file_format_class=None,
+        file_format_kwargs=None,
+    ):
+        super().__init__(
+            key,
+            {"number": None},
+            data_dict,
+            filename,
+            file_format_class,
+            file_format_kwargs,
+        )
+
+    @classmethod
+    def supported_formats(cls):
+        return {}
+
+
+class IncrementCalculator(BaseCalculator):
+    def init_parameters(self):
+        parameters = CalculatorParameters()
+        parameters.new_parameter("step").value = 1
+        self.parameters = parameters
+
+    def backengine(self):
+        number = self.input.to_list()[0].get_data()["number"]
+        step = self.parameters["step"].value
+        self.output[self.output_keys[0]].set_dict({"number": number + step})
+        return self.output
+
+
+def make_instrument(n):
+    instrument = Instrument("chain")
+    data = NumberData.from_dict({"number": 0}, "start")
+    for i in range(n):
+        calculator = IncrementCalculator(f"increment{i}", data, f"out{i}", NumberData)
+        instrument.add_calculator(calculator)
+        data = calculator.output[f"out{i}"]
+    return instrument
+
+
+def best(statement, number, repeat=7):
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number
+
+
+def main(calls=100000, n=100):
+    data = NumberData.from_dict({"number": 1}, "number")
+    instrument = make_instrument(n)
+
+    print(f"get_data: {calls} calls, run: an instrument of {n} calculators")
+    print(f"{'profiler':<10} {'get_data ns':>12} {'run ms':>8}")
+    for name, profiler in [
+        ("inactive", None),
+        ("active", Profiler()),
+        ("memory", Profiler(memory=True)),
+    ]:
+        if profiler is not None:
+            profiler.start()
+        try:
+            get_data = best(data.get_data, calls)
+            run = best(instrument.run, 10)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+        print(f"{name:<10} {get_data * 1e9:>12.0f} {run * 1e3:>8.3f}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -31,6 +31,9 @@ class AbstractBaseClass(object, metaclass=ABCMeta):
     :class AbstractBaseClass: Base class of libpyvinyl
     """
 
+    # empty, so that subclasses declaring __slots__ have no instance __dict__
+    __slots__ = ()
+
     @abstractmethod
     def __init__(self):
         pass
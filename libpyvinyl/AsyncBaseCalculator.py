@@ -0,0 +1,209 @@
+"""
+:module AsyncBaseCalculator: Module hosting the AsyncBaseCalculator class, the base class
+of the calculators running external programs as asyncio subprocesses.
+"""
+
+import asyncio
+import codecs
+import contextlib
+import logging
+import os
+import re
+import subprocess
+import weakref
+from abc import abstractmethod
+from pathlib import Path
+from typing import Callable, List, Mapping, Optional
+
+from libpyvinyl.BaseCalculator import BaseCalculator
+
+logger = logging.getLogger(__name__)
+
+# The size of the reads of the output streams of the processes
+_READ_SIZE = 2**16
+_LINE_BREAK = re.compile("\r\n|\r|\n")
+
+# The semaphore limiting the running external processes, by event loop
+_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _process_semaphore() -> asyncio.Semaphore:
+    """Return the semaphore of the running event loop, created on first use"""
+    loop = asyncio.get_running_loop()
+    if loop not in _semaphores:
+        _semaphores[loop] = asyncio.Semaphore(AsyncBaseCalculator.max_processes)
+    return _semaphores[loop]
+
+
+def _joined(chunks: Optional[List[str]]) -> Optional[str]:
+    """Return the captured output of a stream, None if not captured"""
+    return None if chunks is None else "".join(chunks)
+
+
+class AsyncBaseCalculator(BaseCalculator):
+    """
+    Base class of the calculators wrapping external programs, e.g. ray tracers or
+    detector codes.
+
+    The specialized calculator implements the coroutine `abackengine`, which runs the
+    external programs with `run_process` and sets the output. While a program runs,
+    the event loop is free, so that `Instrument.arun` runs many such calculators at
+    the same time. `backengine` runs `abackengine` in a new event loop, so that the
+    calculator can also be used as any other calculator.
+
+    At most `AsyncBaseCalculator.max_processes` external processes run at the same
+    time in an event loop, the others wait for their turn. The limit is read when the
+    event loop starts its first process, and defaults to the number of CPUs.
+
+    Example::
+
+        class RayTracer(AsyncBaseCalculator):
+            async def abackengine(self):
+                ncount = self.parameters["ncount"].value
+                await self.run_process("raytrace", f"--ncount={ncount}", timeout=3600)
+                self.output["events"].set_file(self.output_file_paths[0], EventFormat)
+                return self.output
+    """
+
+    max_processes: int = os.cpu_count() or 1
+    # The seconds between terminating and killing an external process
+    kill_timeout: float = 5.0
+
+    def backengine(self):
+        """Run `abackengine` in a new event loop. It cannot be called from a running
+        event loop, where `abackengine` is awaited instead."""
+        return asyncio.run(self.abackengine())
+
+    @abstractmethod
+    async def abackengine(self):
+        """Execute the intended operation of this class, as a coroutine."""
+        raise NotImplementedError
+
+    def on_stdout(self, line: str) -> None:
+        """Called with each line of the standard output of the external processes,
+        without the line break. The line is logged at the DEBUG level by default."""
+        logger.debug("%s: %s", self.name, line)
+
+    def on_stderr(self, line: str) -> None:
+        """Called with each line of the standard error of the external processes,
+        without the line break. The line is logged at the INFO level by default."""
+        logger.info("%s: %s", self.name, line)
+
+    async def run_process(
+        self,
+        program: str,
+        *args: str,
+        timeout: Optional[float] = None,
+        cwd: Optional[str] = None,
+        env: Optional[Mapping[str, str]] = None,
+        check: bool = True,
+        capture_output: bool = False,
+    ) -> subprocess.CompletedProcess:
+        """
+        Run an external program, streaming its output line by line to `on_stdout` and
+        `on_stderr`.
+
+        The process waits for a free slot of `max_processes` before it starts. If the
+        timeout expires or the coroutine is cancelled, the process is terminated, and
+        killed if it is still running after `kill_timeout` seconds.
+
+        :param program: The program to run.
+        :param args: The arguments of the program.
+        :param timeout: The timeout in seconds, defaults to none.
+        :param cwd: The working directory of the process. Defaults to `base_dir`, which
+                    is created.
+        :param env: The environment of the process, defaults to the one of this process.
+        :param check: Raise a CalledProcessError if the return code is not 0.
+        :param capture_output: Return the output of the process, besides streaming it.
+        :return: The completed process, with the captured stdout and stderr if any.
+        :raises subprocess.TimeoutExpired: If the timeout expires.
+        :raises subprocess.CalledProcessError: If `check` and the return code is not 0.
+        """
+        command = [program, *args]
+        if cwd is None:
+            cwd = self.base_dir
+            Path(cwd).mkdir(parents=True, exist_ok=True)
+        stdout: Optional[List[str]] = [] if capture_output else None
+        stderr: Optional[List[str]] = [] if capture_output else None
+
+        async with _process_semaphore():
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd,
+                env=env,
+            )
+            gathered = asyncio.gather(
+                self.__stream(process.stdout, self.on_stdout, stdout),
+                self.__stream(process.stderr, self.on_stderr, stderr),
+                process.wait(),
+            )
+            try:
+                await asyncio.wait_for(gathered, timeout)
+            except asyncio.TimeoutError:
+                await self.__terminate(process)
+                raise subprocess.TimeoutExpired(
+                    command, timeout, _joined(stdout), _joined(stderr)
+                ) from None
+            except BaseException:
+                # e.g. the cancellation of the calculator
+                await self.__terminate(process)
+                raise
+            finally:
+                # a cancelled gather holds a CancelledError, which is retrieved here
+                if gathered.done() and not gathered.cancelled():
+                    gathered.exception()
+
+        completed = subprocess.CompletedProcess(
+            command, process.returncode, _joined(stdout), _joined(stderr)
+        )
+        if check:
+            completed.check_returncode()
+        return completed
+
+    @staticmethod
+    async def __stream(
+        stream: asyncio.StreamReader,
+        callback: Callable[[str], None],
+        captured: Optional[List[str]],
+    ) -> None:
+        """Pass the lines of an output stream of a process to the callback. The lines
+        end with a line feed, a carriage return, e.g. the updates of a progress bar, or
+        both, and they may be of any length."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        while True:
+            chunk = await stream.read(_READ_SIZE)
+            text = decoder.decode(chunk, final=not chunk)
+            if captured is not None and text:
+                captured.append(text)
+            held_cr = pending.endswith("\r")
+            pending += text
+            if chunk and not held_cr and "\n" not in text and "\r" not in text:
+                continue
+            if chunk and pending.endswith("\r"):
+                # the line break may be a \r\n split between two chunks
+                *lines, pending = _LINE_BREAK.split(pending[:-1])
+                pending += "\r"
+            else:
+                *lines, pending = _LINE_BREAK.split(pending)
+            for line in lines:
+                callback(line)
+            if not chunk:
+                if pending:
+                    callback(pending)
+                return
+
+    async def __terminate(self, process: asyncio.subprocess.Process) -> None:
+        """Terminate a process, kill it if it does not exit in time"""
+        if process.returncode is not None:
+            return
+        with contextlib.suppress(ProcessLookupError):
+            process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), self.kill_timeout)
+        except asyncio.TimeoutError:
+            with contextlib.suppress(ProcessLookupError):
+                process.kill()
+            await process.wait()
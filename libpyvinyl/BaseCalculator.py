@@ -25,13 +25,20 @@
 ####################################################################################
 
 from abc import abstractmethod
-from typing import Union, Optional
+from collections import deque
+import asyncio
+import contextvars
+from concurrent.futures import Executor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Union, Optional, Tuple, Iterable, Iterator, Dict, Any
 from tempfile import mkstemp
 import copy
-import dill
 from pathlib import Path
+import itertools
 import logging
 import os
+import pickle
+import threading
+import uuid
 
 from libpyvinyl.AbstractBaseClass import AbstractBaseClass
 from libpyvinyl.BaseData import BaseData, DataCollection
@@ -46,6 +53,39 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s:%(message)s", level=logging.WARNING
 )
 
+# The calculator of the running `BaseCalculator.map` in a worker, by token
+_map_templates: Dict[str, "BaseCalculator"] = {}
+_map_lock = threading.Lock()
+
+
+def _map_template(token: str, payload: Optional[bytes]) -> "BaseCalculator":
+    """Return the target of a map or a sweep in this worker, unpickled once per worker"""
+    with _map_lock:
+        if token not in _map_templates:
+            if payload is None:
+                raise RuntimeError(
+                    f"Calculator: the worker was not initialized for the map {token}"
+                )
+            # Only the calculator of the latest map is kept by long-lived workers
+            _map_templates.clear()
+            _map_templates[token] = pickle.loads(payload)
+        return _map_templates[token]
+
+
+def _map_point(
+    token: str,
+    payload: Optional[bytes],
+    index: int,
+    parameter_set: Dict[str, Any],
+    instrument_base_dir: str,
+) -> Tuple[int, DataCollection]:
+    """Run the calculator of a map for one parameter set. Executed by the workers."""
+    calculator = _map_template(token, payload).clone()
+    calculator.set_parameters(parameter_set)
+    calculator.instrument_base_dir = instrument_base_dir
+    calculator.backengine()
+    return index, calculator.output
+
 
 class BaseCalculator(AbstractBaseClass):
     """
@@ -113,6 +153,7 @@ class BaseCalculator(AbstractBaseClass):
         self.__output_filenames = None
         self.__parameters = None
         self.__output: DataCollection = DataCollection()
+        self.__last_run: Optional[Tuple[int, Tuple[int, ...]]] = None
 
         self.name = name
         self.input = input
@@ -181,14 +222,48 @@ class BaseCalculator(AbstractBaseClass):
     def set_parameters(self, args_as_dict: bool = None, **kwargs):
         """
         Sets parameters contained in this calculator using dict or kwargs
+
+        The values are assigned atomically: if any of them is illegal, none of the
+        parameters is modified and a ValueError is raised.
+
+        :return: the change set, a dict mapping the names of the parameters whose value
+                 changed to (old value, new value) tuples
         """
         if args_as_dict is not None:
             parameter_dict = args_as_dict
         else:
             parameter_dict = kwargs
 
-        for key, parameter_value in parameter_dict.items():
-            self.parameters[key].value = parameter_value
+        return self.parameters.set_many(parameter_dict)
+
+    @property
+    def run_state(self) -> Tuple[int, Tuple[int, ...]]:
+        """
+        The version of the parameters and the versions of the input data objects of
+        this calculator, see `CalculatorParameters.version` and `BaseData.version`.
+        """
+        if self.input is None:
+            input_versions = ()
+        else:
+            input_versions = tuple(data.version for data in self.input.to_list())
+        return self.parameters.version, input_versions
+
+    @property
+    def last_run_state(self) -> Optional[Tuple[int, Tuple[int, ...]]]:
+        """The `run_state` recorded by `record_run`, `None` if no run was recorded."""
+        return self.__last_run
+
+    def record_run(self) -> None:
+        """Records the current `run_state` as the one the output was computed with."""
+        self.__last_run = self.run_state
+
+    @property
+    def is_up_to_date(self) -> bool:
+        """
+        True if neither the parameters nor the input data objects changed since the
+        last recorded run.
+        """
+        return self.__last_run is not None and self.__last_run == self.run_state
 
     @property
     def instrument_base_dir(self) -> str:
@@ -360,8 +435,52 @@ class BaseCalculator(AbstractBaseClass):
             output.add_data(output_data)
         self.__output = output
 
+    def clone(self, parameters: Optional[CalculatorParameters] = None):
+        """
+        Returns a lightweight copy of this calculator, e.g. for the many variants of a
+        parameter sweep.
+
+        The copy shares the input data objects with this calculator, in a new
+        DataCollection, and has shallow copies of the parameters, see
+        `CalculatorParameters.clone`. Its output is reset to new empty data objects of
+        the output data types, and it has no recorded run. The other attributes, e.g.
+        those of a subclass, are deep copied. Use `copy.deepcopy` for a copy which
+        shares nothing with this calculator.
+
+        :param parameters: The parameters for the new calculator, defaults to a clone of
+                           the parameters of this calculator.
+        :type  parameters: CalculatorParameters
+        :return: The new calculator.
+        """
+        new = copy.copy(self)
+        if self.__input is not None:
+            new.__input = DataCollection(*self.__input.to_list())
+        new.__output_keys = list(self.__output_keys)
+        new.__output_data_types = list(self.__output_data_types)
+        new.__output_filenames = list(self.__output_filenames)
+        new.__last_run = None
+        new.__init_output()
+        if parameters is None:
+            new.parameters = self.parameters.clone()
+        else:
+            new.parameters = parameters
+
+        # The attributes of the subclasses are deep copied, their references to the
+        # input data objects, the parameters and the output point to those of the copy
+        memo = {
+            id(self.__parameters): new.__parameters,
+            id(self.__output): new.__output,
+        }
+        if self.__input is not None:
+            memo[id(self.__input)] = new.__input
+            memo.update((id(data), data) for data in self.__input.to_list())
+        for name, value in vars(self).items():
+            if not name.startswith("_BaseCalculator__"):
+                new.__dict__[name] = copy.deepcopy(value, memo)
+        return new
+
     def __call__(self, parameters=None, **kwargs):
-        """The copy constructor
+        """The copy constructor, see `clone`
 
         :param parameters: The parameters for the new calculator.
         :type  parameters: CalculatorParameters
@@ -372,16 +491,93 @@ class BaseCalculator(AbstractBaseClass):
 
         """
 
-        new = copy.deepcopy(self)
-
+        new = self.clone(parameters)
         new.__dict__.update(kwargs)
-
-        if parameters is None:
-            new.parameters = copy.deepcopy(new.parameters)
-        else:
-            new.parameters = parameters
         return new
 
+    def map(
+        self,
+        parameter_sets: Iterable[Dict[str, Any]],
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        base_dir: Optional[str] = None,
+        ordered: bool = True,
+    ) -> Iterator:
+        """
+        Run this calculator for many parameter sets in parallel, yielding the outputs.
+
+        The calculator is pickled once, without its output, and sent to each worker
+        process when it starts. Each parameter set is then sent alone, as the values to
+        change on a clone of the calculator, see `clone`. The `instrument_base_dir` of
+        the parameter set with the index `i` is "`base_dir`/point_`i`", so that the
+        output files of the parameter sets do not collide.
+
+        Example::
+
+            for output in calculator.map({"energy": e} for e in energies):
+                print(output.get_data())
+
+        :param parameter_sets: The parameter sets, dicts mapping parameter names to
+                               values. They are consumed as the workers become free.
+        :param executor: An executor to run the parameter sets on. Defaults to a new
+                         process pool, whose workers receive the calculator when they
+                         start. Given an executor, the calculator is sent with each
+                         parameter set, and unpickled once per worker.
+        :param max_workers: The number of worker processes of the new process pool,
+                            and the number of parameter sets in flight is twice it.
+                            Defaults to the number of CPUs.
+        :param base_dir: The directory under which the output of each parameter set is
+                         written. Defaults to the `instrument_base_dir` of this calculator.
+        :param ordered: Yield the outputs in the order of the parameter sets. Otherwise
+                        yield (index, output) tuples as the parameter sets complete.
+        :return: An iterator of the output DataCollections, or of (index, output) tuples.
+        """
+        if base_dir is None:
+            base_dir = self.instrument_base_dir
+        token = uuid.uuid4().hex
+        payload = pickle.dumps(self.clone(), protocol=pickle.HIGHEST_PROTOCOL)
+        in_flight = 2 * (max_workers or os.cpu_count() or 1)
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_map_template,
+                initargs=(token, payload),
+            )
+            payload = None
+        points = enumerate(parameter_sets)
+        pending = deque()
+
+        def submit():
+            for index, parameter_set in itertools.islice(
+                points, in_flight - len(pending)
+            ):
+                point_dir = str(Path(base_dir) / f"point_{index:06d}")
+                pending.append(
+                    executor.submit(
+                        _map_point, token, payload, index, parameter_set, point_dir
+                    )
+                )
+
+        try:
+            submit()
+            while pending:
+                if ordered:
+                    yield pending.popleft().result()[1]
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        yield future.result()
+                submit()
+        finally:
+            for future in pending:
+                future.cancel()
+            if own_executor:
+                # the pending futures are cancelled above, as cancel_futures needs Python 3.9
+                executor.shutdown(wait=True)
+
     @classmethod
     def from_dump(cls, dumpfile: str):
         """Load a dill dump from a dumpfile.
@@ -390,6 +586,8 @@ class BaseCalculator(AbstractBaseClass):
         :return: The calculator object restored from the dumpfile.
 
         """
+        # dill is only imported when needed, as it is slow to import
+        import dill
 
         with open(dumpfile, "rb") as fhandle:
             try:
@@ -416,15 +614,68 @@ class BaseCalculator(AbstractBaseClass):
                 prefix=self.__class__.__name__[-1],
                 dir=os.getcwd(),
             )
+        import dill
+
         with open(fname, "wb") as file_handle:
             dill.dump(self, file_handle, **kwargs)
 
         return fname
 
+    def checkpoint(self, fname: Optional[str] = None, compress: bool = False) -> str:
+        """
+        Write a structured checkpoint of this calculator, see `Checkpoint`.
+
+        Unlike `dump`, the file mappings are stored by reference, and the arrays of the
+        dict mappings out of band, memory-mapped when the checkpoint is loaded unless
+        they are compressed.
+
+        :param fname: Filename (path) of the file to write.
+        :param compress: Deflate the arrays.
+        :return: The filename of the checkpoint
+        """
+        # Imported here as Checkpoint depends on BaseCalculator
+        from libpyvinyl.Checkpoint import Checkpoint
+
+        if fname is None:
+            _, fname = mkstemp(
+                suffix="_checkpoint.ckpt",
+                prefix=self.__class__.__name__[-1],
+                dir=os.getcwd(),
+            )
+        Checkpoint.write(self, fname, compress)
+        return fname
+
+    @classmethod
+    def from_checkpoint(cls, fname: str):
+        """Load a calculator from a checkpoint written by `checkpoint`.
+
+        :param fname: The file name of the checkpoint.
+        :return: The calculator object restored from the checkpoint.
+        """
+        from libpyvinyl.Checkpoint import Checkpoint
+
+        checkpoint = Checkpoint(fname)
+        if not issubclass(checkpoint.calculator_class, cls):
+            raise TypeError(f"The object in the file {fname} is not a {cls}")
+        return checkpoint.load()
+
     @abstractmethod
     def backengine(self):
         """Execute the intended operation of this class."""
         raise NotImplementedError
 
+    async def abackengine(self):
+        """
+        Execute the intended operation of this class as a coroutine, see
+        `Instrument.arun`.
+
+        By default `backengine` is run on a thread of the default executor of the
+        event loop, in the context of the coroutine. `AsyncBaseCalculator` implements
+        it natively for the calculators running external programs.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(None, context.run, self.backengine)
+
 
 # This project has received funding from the European Union's Horizon 2020 research and innovation programme under grant agreement No. 823852.
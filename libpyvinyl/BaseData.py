@@ -1,8 +1,53 @@
 """ :module BaseData: Module hosts the BaseData class."""
 
+import itertools
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping
 from typing import Union, Optional
 from abc import abstractmethod, ABCMeta
 from libpyvinyl.AbstractBaseClass import AbstractBaseClass
+from libpyvinyl.DataCache import DataCache
+from libpyvinyl.Profiler import Profiler, file_size
+
+# Source of the versions of the data objects. The versions are unique across all
+# the data objects, so that replacing a data object also changes the versions seen.
+_versions = itertools.count(1)
+
+
+def _is_sliceable(value: Any) -> bool:
+    """Whether a value of a data dict is split into chunks, i.e. is a sequence or an array"""
+    return isinstance(value, (list, tuple)) or getattr(value, "ndim", 0) > 0
+
+
+def iter_dict_chunks(data_dict: Mapping, chunk_size: int) -> Iterator[dict]:
+    """Split a data dict into chunks of at most `chunk_size` rows.
+
+    The arrays and sequences of the dict are sliced along their first axis, they must
+    have the same length. The other values, e.g. scalars, are part of every chunk. A
+    dict without arrays is yielded as a single chunk.
+
+    :param data_dict: The data dict to split.
+    :param chunk_size: The maximal number of rows of a chunk.
+    :return: An iterator over the chunks.
+    """
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise ValueError(f"chunk_size should be a positive int, not {chunk_size}")
+    lengths = {
+        key: len(value) for key, value in data_dict.items() if _is_sliceable(value)
+    }
+    if len(set(lengths.values())) > 1:
+        raise ValueError(f"The arrays to split have different lengths: {lengths}")
+    if not lengths:
+        yield dict(data_dict)
+        return
+    rows = next(iter(lengths.values()))
+    for start in range(0, rows, chunk_size):
+        yield {
+            key: value[start : start + chunk_size] if key in lengths else value
+            for key, value in data_dict.items()
+        }
 
 
 class BaseData(AbstractBaseClass):
@@ -33,6 +78,7 @@ class BaseData(AbstractBaseClass):
         :type file_format_class: class, optional
         :param file_format_kwargs: The kwargs needed to map the file, defaults to None.
         """
+        self.__version = next(_versions)
         self.__key = None
         self.__expected_data = None
         self.__data_dict = None
@@ -52,6 +98,21 @@ class BaseData(AbstractBaseClass):
 
         self.__check_consistency()
 
+    @property
+    def version(self) -> int:
+        """
+        The version of the mapping of this data object.
+
+        It changes whenever a dict or a file is mapped, e.g. through `set_dict` or
+        `set_file`. Modifications of the mapped dict in place or of the mapped file on
+        disk are not tracked.
+        """
+        return self.__version
+
+    def __changed(self):
+        """Gives the mapping of this data object a new version"""
+        self.__version = next(_versions)
+
     @property
     def key(self) -> str:
         """The key of the class instance for calculator usage"""
@@ -93,6 +154,7 @@ class BaseData(AbstractBaseClass):
             raise TypeError(
                 f"Data Class: data_dict should be None or a dict, not {type(value)}"
             )
+        self.__changed()
         self.__check_consistency()
 
     def set_dict(self, data_dict: dict):
@@ -130,6 +192,7 @@ class BaseData(AbstractBaseClass):
             raise TypeError(
                 f"Data Class: filename should be None or a str, not {type(value)}"
             )
+        self.__changed()
 
     @property
     def file_format_class(self):
@@ -146,6 +209,7 @@ class BaseData(AbstractBaseClass):
             raise TypeError(
                 f"Data Class: format_class should be None or a format class, not {type(value)}"
             )
+        self.__changed()
 
     @property
     def file_format_kwargs(self):
@@ -162,6 +226,7 @@ class BaseData(AbstractBaseClass):
             raise TypeError(
                 f"Data Class: file_format_kwargs should be None or a dict, not {type(value)}"
             )
+        self.__changed()
 
     @property
     def mapping_type(self):
@@ -214,8 +279,11 @@ class BaseData(AbstractBaseClass):
     @classmethod
     def list_formats(self):
         """Print supported formats"""
+        # Imported here as FormatRegistry depends on BaseFormat, which depends on BaseData
+        from libpyvinyl.FormatRegistry import FormatRegistry
+
         out_string = ""
-        supported_formats = self.supported_formats()
+        supported_formats = FormatRegistry.shared().supported_formats(self)
         for key in supported_formats:
             dicts = supported_formats[key]
             format_class = dicts["format_class"]
@@ -259,21 +327,45 @@ class BaseData(AbstractBaseClass):
             )
 
     @classmethod
-    def from_file(cls, filename: str, format_class, key: dict, **kwargs):
+    def detect_format(cls, filename: str):
+        """Detect the format class of a file among the formats supported by this
+        DataClass, by the extension of the filename or else by the magic bytes of the file.
+
+        :param filename: The filename of the file.
+        :type filename: str
+        :return: The FormatClass
+        :raises ValueError: If the format cannot be detected unambiguously.
+        """
+        # Imported here as FormatRegistry depends on BaseFormat, which depends on BaseData
+        from libpyvinyl.FormatRegistry import FormatRegistry
+
+        registry = FormatRegistry.shared()
+        supported_formats = registry.supported_formats(cls)
+        return registry.detect(
+            filename, [entry["format_class"] for entry in supported_formats.values()]
+        )
+
+    @classmethod
+    def from_file(cls, filename: str, format_class=None, key: str = None, **kwargs):
         """Create a Data Object mapping a file.
 
         :param filename: The filename of the file to map by this DataClass. It has to be `None` if a dict mapping was already set, defaults to None.
         :type filename: str, optional
-        :param file_format_class: The FormatClass to map the file by this DataClass, It has to be `None` if a dict mapping was already set, defaults to None
+        :param file_format_class: The FormatClass to map the file by this DataClass, It has to be `None` if a dict mapping was already set.
+        Defaults to None, the format is then detected with `detect_format`.
         :type file_format_class: class, optional
         :param file_format_kwargs: The kwargs needed to map the file, defaults to None.
         :type file_format_kwargs: dict, optional
-        :param key: The key to identify the Data Object.
-        :type key: str
+        :param key: The key to identify the Data Object, defaults to the name of the file.
+        :type key: str, optional
 
         :return: A Data Object
         :rtype: BaseData
         """
+        if format_class is None:
+            format_class = cls.detect_format(filename)
+        if key is None:
+            key = os.path.basename(os.path.normpath(filename))
         return cls(
             key,
             filename=filename,
@@ -281,6 +373,30 @@ class BaseData(AbstractBaseClass):
             file_format_kwargs=kwargs,
         )
 
+    @classmethod
+    def write_chunks(
+        cls, chunks: Iterable[dict], filename: str, format_class, key: str, **kwargs
+    ):
+        """Write data chunk by chunk into a file and create a Data Object mapping it.
+
+        The chunks are appended to the file with `format_class.append_chunk`, the file
+        is created by the first chunk if it does not exist. Only one chunk is held in
+        memory at a time.
+
+        :param chunks: An iterable of data dicts, e.g. from `iter_chunks`.
+        :param filename: The filename of the file to write.
+        :param format_class: The FormatClass to write the file.
+        :param key: The key to identify the Data Object.
+        :return: A Data Object
+        :rtype: BaseData
+        """
+        try:
+            for chunk in chunks:
+                format_class.append_chunk(filename, chunk, **kwargs)
+        finally:
+            DataCache.shared().invalidate(filename)
+        return cls.from_file(filename, format_class, key)
+
     @classmethod
     def from_dict(cls, data_dict: dict, key: str):
         """Create a Data Object mapping a data dict.
@@ -311,9 +427,81 @@ class BaseData(AbstractBaseClass):
         :return: A Data Object
         :rtype: BaseData
         """
+        try:
+            return self.__write(filename, format_class, key, **kwargs)
+        finally:
+            # the cached data of the file which was overwritten is outdated
+            DataCache.shared().invalidate(filename)
+
+    def plan_conversion(self, format_class):
+        """Return the plan of the conversions done by `write` to write the data into a
+        file of the `format_class`.
+
+        A dict mapping is written directly. A file mapping is converted along the
+        cheapest path of the `FormatGraph` of the formats supported by this DataClass,
+        according to the cost hints of the format classes: with a direct conversion,
+        by reading the data and writing it, or through intermediate formats.
+
+        :param format_class: The FormatClass to write the file.
+        :type format_class: class
+        :return: The plan, whose `str` describes the steps.
+        :rtype: ConversionPlan
+        """
+        # Imported here as FormatGraph depends on BaseFormat, which depends on BaseData
+        from libpyvinyl.FormatGraph import FormatGraph
+        from libpyvinyl.FormatRegistry import FormatRegistry
+
+        if self.mapping_type == dict:
+            return FormatGraph([]).plan(None, format_class)
+        supported_formats = FormatRegistry.shared().supported_formats(type(self))
+        graph = FormatGraph(
+            entry["format_class"] for entry in supported_formats.values()
+        )
+        return graph.plan(self.file_format_class, format_class)
+
+    def __write(self, filename: str, format_class, key: str = None, **kwargs):
+        """Write the data into a file with the format class, see `write`"""
+        plan = self.plan_conversion(format_class)
+        if len(plan) == 1:
+            return self.__convert(plan.steps[0], filename, key, **kwargs)
+
+        # The intermediate files are written next to the file and removed afterwards.
+        # The intermediate Data Objects keep the key so that the generated key is the
+        # same as for a single conversion.
+        intermediates = []
+        parent = os.path.dirname(os.path.abspath(filename))
+        try:
+            with tempfile.TemporaryDirectory(prefix=".conversion_", dir=parent) as tmp:
+                data = self
+                for index, step in enumerate(plan.steps[:-1]):
+                    extension = step.target.format_register()["ext"]
+                    intermediates.append(os.path.join(tmp, f"{index}{extension}"))
+                    data = data.__convert(step, intermediates[-1], self.key)
+                return data.__convert(plan.steps[-1], filename, key, **kwargs)
+        finally:
+            for intermediate in intermediates:
+                DataCache.shared().invalidate(intermediate)
+
+    def __convert(self, step, filename: str, key: str = None, **kwargs):
+        """Write the data into a file with one step of a ConversionPlan"""
+        profiler = Profiler.active
+        if profiler is not None:
+            if self.mapping_type != dict and step.direct:
+                name = f"{self.file_format_class.__name__}.convert"
+            else:
+                name = f"{step.target.__name__}.write"
+            with profiler.span(name, "format", filename=filename) as span:
+                data = self.__convert_step(step, filename, key, **kwargs)
+                span.bytes_written = file_size(filename)
+                return data
+        return self.__convert_step(step, filename, key, **kwargs)
+
+    def __convert_step(self, step, filename: str, key: str = None, **kwargs):
+        """Run one step of a ConversionPlan, see `__convert`"""
+        format_class = step.target
         if self.mapping_type == dict:
             return format_class.write(self, filename, key, **kwargs)
-        elif format_class in self.file_format_class.direct_convert_formats():
+        elif step.direct:
             return self.file_format_class.convert(
                 self, filename, format_class, key, **kwargs
             )
@@ -351,30 +539,134 @@ class BaseData(AbstractBaseClass):
                 "__get_dict_data() should not be called when self.__data_dict is None"
             )
 
+    def __read_file(self, **kwargs):
+        """Read the data dict of the file mapping with the format class"""
+        profiler = Profiler.active
+        if profiler is None:
+            data_to_read = self.__file_format_class.read(self.__filename, **kwargs)
+        else:
+            with profiler.span(
+                f"{self.__file_format_class.__name__}.read",
+                "format",
+                filename=self.__filename,
+            ) as span:
+                data_to_read = self.__file_format_class.read(self.__filename, **kwargs)
+                span.bytes_read = file_size(self.__filename)
+        # It will automatically check the data needed to be extracted.
+        self.__check_for_expected_data(data_to_read)
+        return data_to_read
+
     def __get_file_data(self, **kwargs):
-        """Get the data dict from a file mapping"""
+        """Get the data dict from a file mapping, through the process-wide read cache"""
         if self.__filename is not None:
-            data_to_read = self.__file_format_class.read(
-                self.__filename, **self.__file_format_kwargs, **kwargs
+            read_kwargs = dict(**self.__file_format_kwargs, **kwargs)
+            return DataCache.shared().get(
+                self.__filename,
+                self.__file_format_class,
+                lambda: self.__read_file(**read_kwargs),
+                **read_kwargs,
             )
-            # It will automatically check the data needed to be extracted.
-            self.__check_for_expected_data(data_to_read)
-            data_to_return = {}
-            for key in data_to_read.keys():
-                data_to_return[key] = data_to_read[key]
-            return data_to_return
         else:
             raise RuntimeError(
                 "__get_file_data() should not be called when self.__filename is None"
             )
 
-    def get_data(self, **kwargs):
-        """Return the data in a dictionary"""
+    def __get_file_keys(self, keys: Optional[List[str]], lazy: bool, **kwargs):
+        """Get the data of the given keys from a file mapping, reading only these keys
+        if the format class supports it"""
+        format_class = self.__file_format_class
+        read_kwargs = dict(**self.__file_format_kwargs, **kwargs)
+        file_keys = format_class.list_keys(self.__filename, **read_kwargs)
+        if file_keys is None:
+            # The format class can only read the whole file, which is cached.
+            data_dict = self.__get_file_data(**kwargs)
+            return data_dict if keys is None else self.__select(data_dict, keys)
+
+        # The expected data is checked against the metadata of the file.
+        self.__check_for_expected_data(dict.fromkeys(file_keys))
+        if keys is None:
+            keys = list(file_keys)
+        else:
+            self.__select(dict.fromkeys(file_keys), keys)
+        if lazy:
+            return format_class.read_lazy(self.__filename, keys, **read_kwargs)
+        return DataCache.shared().get(
+            self.__filename,
+            format_class,
+            lambda: format_class.read_keys(self.__filename, keys, **read_kwargs),
+            keys=tuple(keys),
+            **read_kwargs,
+        )
+
+    @staticmethod
+    def __select(data_dict, keys: List[str]) -> dict:
+        """Return the items of the given keys of a data dict"""
+        try:
+            return {key: data_dict[key] for key in keys}
+        except KeyError as e:
+            raise KeyError(f"Data dict key '{e.args[0]}' is not found.") from None
+
+    def get_data(self, keys: Optional[List[str]] = None, lazy: bool = False, **kwargs):
+        """Return the data in a dictionary
+
+        When the read cache is enabled, see `DataCache`, the arrays read from a file are
+        shared by the calls and read-only.
+
+        :param keys: The keys of the data to return, all of them if `None`. For a file
+                     mapping, only these keys are read if the format class supports it,
+                     see `BaseFormat.read_keys`.
+        :param lazy: For a file mapping, return a mapping whose values are read when they
+                     are accessed, see `BaseFormat.read_lazy`. The data is read eagerly if
+                     the format class cannot list the keys of a file.
+        :param kwargs: The kwargs passed to the read method of the format class.
+        """
+        profiler = Profiler.active
+        if profiler is not None:
+            with profiler.span(f"{self.key}.get_data", "data", keys=keys):
+                return self.__get_data(keys, lazy, kwargs)
+        return self.__get_data(keys, lazy, kwargs)
+
+    def __get_data(self, keys: Optional[List[str]], lazy: bool, kwargs: dict):
+        """Return the data in a dictionary, see `get_data`"""
         # From either a file or a python object to a python object
         if self.__data_dict is not None:
-            return self.__get_dict_data()
+            data_dict = self.__get_dict_data()
+            return data_dict if keys is None else self.__select(data_dict, keys)
         elif self.__filename is not None:
-            return self.__get_file_data(**kwargs)
+            if keys is None and not lazy:
+                return self.__get_file_data(**kwargs)
+            return self.__get_file_keys(keys, lazy, **kwargs)
+        else:
+            raise RuntimeError("Cannot read the data from either a dict or a file.")
+
+    def iter_chunks(
+        self, chunk_size: int, keys: Optional[List[str]] = None, **kwargs
+    ) -> Iterator[dict]:
+        """Iterate over the data in chunks of at most `chunk_size` rows, see `iter_dict_chunks`
+
+        For a file mapping, the chunks are read one by one with
+        `file_format_class.read_chunks`, so that data larger than the memory can be
+        processed.
+
+        :param chunk_size: The maximal number of rows of a chunk.
+        :param keys: The keys of the data to iterate over, all of them if `None`.
+        :param kwargs: The kwargs passed to the read method of the format class.
+        :return: An iterator over the chunks.
+        """
+        if self.__data_dict is not None:
+            return iter_dict_chunks(self.get_data(keys=keys), chunk_size)
+        elif self.__filename is not None:
+            format_class = self.__file_format_class
+            read_kwargs = dict(**self.__file_format_kwargs, **kwargs)
+            file_keys = format_class.list_keys(self.__filename, **read_kwargs)
+            if file_keys is not None:
+                # The expected data is checked against the metadata of the file.
+                self.__check_for_expected_data(dict.fromkeys(file_keys))
+                if keys is not None:
+                    self.__select(dict.fromkeys(file_keys), keys)
+            return format_class.read_chunks(
+                self.__filename, chunk_size, keys, **read_kwargs
+            )
         else:
             raise RuntimeError("Cannot read the data from either a dict or a file.")
 
@@ -385,6 +677,22 @@ class BaseData(AbstractBaseClass):
         return string
 
 
+class DataCollectionError(Exception):
+    """
+    Error raised when reading or writing some of the data objects of a DataCollection
+    concurrently failed.
+
+    :ivar results: The results of the data objects which succeeded, by key.
+    :ivar errors: The exceptions of the data objects which failed, by key.
+    """
+
+    def __init__(self, results: Dict[str, Any], errors: Dict[str, BaseException]):
+        self.results = results
+        self.errors = errors
+        message = "\n".join(f"{key}: {error!r}" for key, error in errors.items())
+        super().__init__(f"{len(errors)} data object(s) failed:\n{message}")
+
+
 # DataCollection class
 class DataCollection:
     """A collection of Data Objects"""
@@ -419,23 +727,56 @@ class DataCollection:
             assert isinstance(data, BaseData)
             self.data_object_dict[data.key] = data
 
-    def get_data(self):
+    def __map(
+        self, function: Callable[[str, BaseData], Any], max_workers: Optional[int]
+    ) -> Dict[str, Any]:
+        """Apply the function to each key and data object, on a thread pool if
+        `max_workers` is larger than 1"""
+        if max_workers is None or max_workers <= 1:
+            return {
+                key: function(key, obj) for key, obj in self.data_object_dict.items()
+            }
+
+        workers = max(1, min(max_workers, len(self.data_object_dict)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                key: executor.submit(function, key, obj)
+                for key, obj in self.data_object_dict.items()
+            }
+        results = {}
+        errors = {}
+        for key, future in futures.items():
+            error = future.exception()
+            if error is None:
+                results[key] = future.result()
+            else:
+                errors[key] = error
+        if errors:
+            raise DataCollectionError(results, errors) from next(iter(errors.values()))
+        return results
+
+    def get_data(self, max_workers: Optional[int] = None):
         """Get the data of the data object(s).
         When there is only one item in the DataCollection, it returns the data dict,
-        When there are more then one items, it returns a dictionary of the data dicts"""
+        When there are more then one items, it returns a dictionary of the data dicts
+
+        :param max_workers: The maximal number of data objects read at the same time on
+                            a thread pool, they are read one after the other by default.
+                            If some of them fail, a `DataCollectionError` holding the
+                            data dicts which were read is raised.
+        :type max_workers: int, optional
+        """
         if len(self.data_object_dict) == 1:
             return next(iter(self.data_object_dict.values())).get_data()
         else:
-            data_dicts = {}
-            for key, obj in self.data_object_dict.items():
-                data_dicts[key] = obj.get_data()
-            return data_dicts
+            return self.__map(lambda key, obj: obj.get_data(), max_workers)
 
     def write(
         self,
         filename: Union[str, dict],
         format_class,
         key: Union[str, dict] = None,
+        max_workers: Optional[int] = None,
         **kwargs,
     ):
         """Write the data object(s) to the file(s).
@@ -450,6 +791,11 @@ class DataCollection:
         :type format_class: class or dict
         :param key: The key(s) of the data object(s) mapping the written file(s), defaults to None.
         :type key: str or dict, optional
+        :param max_workers: The maximal number of files written at the same time on a
+                            thread pool, they are written one after the other by default.
+                            If some of them fail, a `DataCollectionError` holding the data
+                            objects which were written, by key in this collection, is raised.
+        :type max_workers: int, optional
         :return: A data object or a dict of data objects.
         :rtype: DataClass or dict
         """
@@ -459,13 +805,13 @@ class DataCollection:
             return obj.write(filename, format_class, key, **kwargs)
         else:
             assert isinstance(key, dict)
-            data_dicts = {}
-            for col_key, obj in self.data_object_dict.items():
-                written_data = obj.write(
+            written = self.__map(
+                lambda col_key, obj: obj.write(
                     filename[col_key], format_class[col_key], key[col_key], **kwargs
-                )
-                data_dicts[written_data.key] = written_data
-            return data_dicts
+                ),
+                max_workers,
+            )
+            return {written_data.key: written_data for written_data in written.values()}
 
     def get_data_object(self, key: str):
         """Get one data object by its key
@@ -1,6 +1,68 @@
+import weakref
 from abc import abstractmethod
+from collections.abc import Mapping
+from typing import Any, Callable, Iterable, Iterator, List, Optional
 from libpyvinyl.AbstractBaseClass import AbstractBaseClass
-from libpyvinyl.BaseData import BaseData
+from libpyvinyl.BaseData import BaseData, iter_dict_chunks
+
+# The subclasses of BaseFormat by registration number, i.e. in the order they are
+# defined, indexed by the FormatRegistry. The references are weak, so that the format
+# classes defined e.g. in a function can be garbage collected.
+_format_classes: "weakref.WeakValueDictionary[int, type]" = (
+    weakref.WeakValueDictionary()
+)
+_registrations = 0
+
+
+def _registration_count() -> int:
+    """Return the number of the subclasses of BaseFormat defined so far"""
+    return _registrations
+
+
+class LazyDict(Mapping):
+    """
+    Read-only mapping of data whose values are loaded when they are first accessed.
+
+    The keys are known up front, e.g. from the metadata of a file. `dict(lazy_dict)`
+    loads all the values.
+    """
+
+    def __init__(self, keys: Iterable[str], load: Callable[[str], Any]):
+        """
+        :param keys: The keys of the data.
+        :param load: A function returning the value of a key.
+        """
+        self.__keys = dict.fromkeys(keys)
+        self.__load = load
+        self.__values = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__values:
+            if key not in self.__keys:
+                raise KeyError(key)
+            self.__values[key] = self.__load(key)
+        return self.__values[key]
+
+    def __iter__(self):
+        return iter(self.__keys)
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+    def is_loaded(self, key: str) -> bool:
+        """Return True if the value of the key was already loaded."""
+        return key in self.__values
+
+    def __repr__(self):
+        values = ", ".join(
+            (
+                f"{key!r}: {self.__values[key]!r}"
+                if key in self.__values
+                else f"{key!r}: ..."
+            )
+            for key in self.__keys
+        )
+        return f"LazyDict({{{values}}})"
 
 
 class BaseFormat(AbstractBaseClass):
@@ -12,6 +74,12 @@ class BaseFormat(AbstractBaseClass):
         # Nothing needs to be done here.
         pass
 
+    def __init_subclass__(cls, **kwargs):
+        global _registrations
+        super().__init_subclass__(**kwargs)
+        _format_classes[_registrations] = cls
+        _registrations += 1
+
     @classmethod
     @abstractmethod
     def format_register(self):
@@ -56,6 +124,68 @@ class BaseFormat(AbstractBaseClass):
                 data_dict[key] = val[()]
         return data_dict
 
+    @classmethod
+    def list_keys(cls, filename: str, **kwargs) -> Optional[List[str]]:
+        """Return the keys of the data in the file from its metadata, without reading
+        the data. `None` means the keys are only known by reading the whole file.
+
+        Override this method together with `read_keys` in a concrete format class to
+        let `BaseData.get_data(keys=...)` read only the requested data.
+        """
+        return None
+
+    @classmethod
+    def read_keys(cls, filename: str, keys: List[str], **kwargs) -> dict:
+        """Read the data of the given keys from the file with the `filename` to a dictionary.
+
+        The default implementation reads the whole file. Override it in a concrete
+        format class which can read part of a file, e.g. some datasets of an HDF5 file.
+        """
+        data_dict = cls.read(filename, **kwargs)
+        return {key: data_dict[key] for key in keys}
+
+    @classmethod
+    def read_lazy(cls, filename: str, keys: List[str], **kwargs) -> Mapping:
+        """Return a mapping of the given keys whose values are read from the file with
+        the `filename` when they are accessed.
+
+        The default implementation reads each value with `read_keys`. Override it in a
+        concrete format class to return proxies instead, e.g. h5py datasets which are
+        read when they are sliced.
+        """
+        return LazyDict(keys, lambda key: cls.read_keys(filename, [key], **kwargs)[key])
+
+    @classmethod
+    def read_chunks(
+        cls,
+        filename: str,
+        chunk_size: int,
+        keys: Optional[List[str]] = None,
+        **kwargs,
+    ) -> Iterator[dict]:
+        """Iterate over the data of the file with the `filename` in chunks of at most
+        `chunk_size` rows, see `BaseData.iter_dict_chunks`.
+
+        The default implementation reads the data at once and slices it. Override it in
+        a concrete format class which can read part of the rows of a file.
+        """
+        if keys is None:
+            data_dict = cls.read(filename, **kwargs)
+        else:
+            data_dict = cls.read_keys(filename, keys, **kwargs)
+        return iter_dict_chunks(data_dict, chunk_size)
+
+    @classmethod
+    def append_chunk(cls, filename: str, chunk: dict, **kwargs) -> None:
+        """Append the rows of a chunk of data to the file with the `filename`, creating
+        the file if it does not exist. Used by `BaseData.write_chunks`.
+
+        Override it in a concrete format class which can append to a file.
+        """
+        raise NotImplementedError(
+            f"{cls.__name__} does not support writing data in chunks"
+        )
+
     @classmethod
     @abstractmethod
     def write(cls, object: BaseData, filename: str, key: str, **kwargs):
@@ -79,6 +209,37 @@ class BaseFormat(AbstractBaseClass):
         # Override this `direct_convert_formats` in a concrete format class
         return [Aformat, BFormat]
 
+    @classmethod
+    def magic_bytes(cls) -> List[bytes]:
+        """The byte strings which the files of this format start with, used to detect the
+        format of a file whose extension is missing or ambiguous, see `FormatRegistry`.
+
+        Override it in a concrete format class with a signature, e.g. `[b"\\x89HDF"]`.
+        """
+        return []
+
+    @classmethod
+    def read_cost(cls) -> float:
+        """Hint of the cost of reading a file of this format into a dict, relative to
+        the other costs. It is used to plan conversions, see `FormatGraph`.
+
+        Override it in a concrete format class which is slower or faster to read than
+        the usual formats, e.g. a text format which needs parsing.
+        """
+        return 1.0
+
+    @classmethod
+    def write_cost(cls) -> float:
+        """Hint of the cost of writing a dict into a file of this format, see `read_cost`."""
+        return 1.0
+
+    @classmethod
+    def convert_cost(cls, output_format_class) -> float:
+        """Hint of the cost of the direct conversion to a format listed by
+        `direct_convert_formats`, see `read_cost`. A direct conversion is used when it
+        is not more expensive than reading and writing the data."""
+        return 1.0
+
     @classmethod
     @abstractmethod
     def convert(
@@ -0,0 +1,249 @@
+"""
+:module CalculatorCache: Module hosting the CalculatorCache class, an opt-in
+content-addressed store for calculator results.
+"""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+from libpyvinyl.BaseData import DataCollection
+from libpyvinyl.DataCache import DataCache
+from libpyvinyl.Fingerprint import update_hash
+
+
+class CalculatorCache:
+    """
+    On-disk, content-addressed cache of calculator outputs.
+
+    A calculator run is identified by the concrete calculator class, the values and
+    units of its parameters and the content of its input `DataCollection`. The output
+    `DataCollection` of a run is stored under the fingerprint of these three items, so
+    that a later run with identical inputs maps the stored outputs instead of calling
+    `backengine()` again.
+
+    Dict mappings are stored as dill dumps of the data dicts, file mappings are stored
+    as copies of the mapped files and are copied back to their original location on a
+    cache hit. The total size of the store is bounded by `max_size`; the least recently
+    used entries are evicted first.
+
+    Example::
+
+        cache = CalculatorCache("./.vinyl_cache", max_size=2**30)
+        output = cache.run(calculator)
+    """
+
+    MANIFEST = "manifest.dill"
+
+    def __init__(self, cache_dir: str, max_size: Optional[int] = None):
+        """
+        :param cache_dir: The directory of the store. It is created if it does not exist.
+        :param max_size: The maximal size of the store in bytes. `None` means unbounded.
+        """
+        self.__cache_dir = None
+        self.__max_size = None
+        self.hits = 0
+        self.misses = 0
+
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    @property
+    def cache_dir(self) -> str:
+        """The directory of the store."""
+        return self.__cache_dir
+
+    @cache_dir.setter
+    def cache_dir(self, value: str):
+        if isinstance(value, str):
+            Path(value).mkdir(parents=True, exist_ok=True)
+            self.__cache_dir = value
+        else:
+            raise TypeError(
+                f"CalculatorCache: `cache_dir` is expected to be a str, not {type(value)}"
+            )
+
+    @property
+    def max_size(self) -> Optional[int]:
+        """The maximal size of the store in bytes."""
+        return self.__max_size
+
+    @max_size.setter
+    def max_size(self, value: Optional[int]):
+        if value is None or (isinstance(value, int) and value >= 0):
+            self.__max_size = value
+        else:
+            raise ValueError(
+                f"CalculatorCache: `max_size` is expected to be None or a non-negative int, not {value}"
+            )
+
+    @staticmethod
+    def fingerprint(calculator) -> str:
+        """Return the fingerprint identifying a run of the calculator.
+
+        :param calculator: The calculator to fingerprint.
+        :type calculator: BaseCalculator
+        :return: A hex digest
+        """
+        hasher = hashlib.sha256()
+        calculator_class = type(calculator)
+        hasher.update(
+            f"{calculator_class.__module__}.{calculator_class.__qualname__};".encode()
+        )
+        hasher.update(calculator.parameters.fingerprint().encode())
+        if calculator.input is not None:
+            for data_object in calculator.input.to_list():
+                update_hash(hasher, data_object.key)
+                update_hash(hasher, data_object.get_data())
+        return hasher.hexdigest()
+
+    def __entry_dir(self, fingerprint: str) -> Path:
+        return Path(self.cache_dir) / fingerprint
+
+    def __contains__(self, calculator) -> bool:
+        """Returns True if the result of the calculator is stored."""
+        return (self.__entry_dir(self.fingerprint(calculator)) / self.MANIFEST).exists()
+
+    def run(self, calculator) -> DataCollection:
+        """Return the output of the calculator, running `backengine()` only on a cache miss.
+
+        :param calculator: The calculator to run.
+        :type calculator: BaseCalculator
+        :return: The output of the calculator.
+        """
+        fingerprint = self.fingerprint(calculator)
+        if self.load(calculator, fingerprint):
+            self.hits += 1
+            return calculator.output
+
+        self.misses += 1
+        calculator.backengine()
+        self.store(calculator, fingerprint)
+        return calculator.output
+
+    def load(self, calculator, fingerprint: Optional[str] = None) -> bool:
+        """Map the stored outputs to the output data objects of the calculator.
+
+        :return: True if the outputs were found in the store, False otherwise.
+        """
+        if fingerprint is None:
+            fingerprint = self.fingerprint(calculator)
+        entry_dir = self.__entry_dir(fingerprint)
+        manifest_file = entry_dir / self.MANIFEST
+        if not manifest_file.exists():
+            return False
+
+        # dill is only imported when needed, as it is slow to import
+        import dill
+
+        with open(manifest_file, "rb") as fhandle:
+            manifest = dill.load(fhandle)
+        for key, record in manifest.items():
+            output_data = calculator.output[key]
+            if record["mapping"] == "dict":
+                output_data.set_dict(record["data"])
+            else:
+                filename = record["filename"]
+                Path(filename).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(entry_dir / record["stored_as"], filename)
+                DataCache.shared().invalidate(filename)
+                output_data.set_file(
+                    filename, record["format_class"], **record["format_kwargs"]
+                )
+        # Mark the entry as recently used.
+        os.utime(manifest_file)
+        return True
+
+    def store(self, calculator, fingerprint: Optional[str] = None) -> str:
+        """Store the current outputs of the calculator.
+
+        :return: The fingerprint the outputs were stored under.
+        """
+        if fingerprint is None:
+            fingerprint = self.fingerprint(calculator)
+        entry_dir = self.__entry_dir(fingerprint)
+        tmp_dir = Path(self.cache_dir) / (fingerprint + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        manifest = {}
+        for i, data_object in enumerate(calculator.output.to_list()):
+            if data_object.mapping_type == dict:
+                manifest[data_object.key] = {
+                    "mapping": "dict",
+                    "data": data_object.data_dict,
+                }
+            else:
+                stored_as = f"{i}_{Path(data_object.filename).name}"
+                shutil.copyfile(data_object.filename, tmp_dir / stored_as)
+                manifest[data_object.key] = {
+                    "mapping": "file",
+                    "filename": data_object.filename,
+                    "stored_as": stored_as,
+                    "format_class": data_object.file_format_class,
+                    "format_kwargs": data_object.file_format_kwargs,
+                }
+        import dill
+
+        with open(tmp_dir / self.MANIFEST, "wb") as fhandle:
+            dill.dump(manifest, fhandle)
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        self.evict()
+        return fingerprint
+
+    def __entries(self):
+        """Return a list of (last use, size, path) of the complete entries in the store."""
+        entries = []
+        for entry_dir in Path(self.cache_dir).iterdir():
+            manifest_file = entry_dir / self.MANIFEST
+            if entry_dir.suffix == ".tmp" or not manifest_file.exists():
+                continue
+            size = sum(f.stat().st_size for f in entry_dir.iterdir())
+            entries.append((manifest_file.stat().st_mtime_ns, size, entry_dir))
+        return entries
+
+    @property
+    def size(self) -> int:
+        """The total size of the stored entries in bytes."""
+        return sum(size for _, size, _ in self.__entries())
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the store fits `max_size`."""
+        if self.max_size is None:
+            return
+        entries = sorted(self.__entries(), key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        """Remove all the entries of the store and reset the statistics."""
+        for entry_dir in Path(self.cache_dir).iterdir():
+            if entry_dir.is_dir():
+                shutil.rmtree(entry_dir, ignore_errors=True)
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Return the hit/miss statistics and the size of the store."""
+        entries = self.__entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "size": sum(size for _, size, _ in entries),
+        }
+
+    def __str__(self):
+        stats = self.stats()
+        string = f"CalculatorCache: {self.cache_dir}\n"
+        string += f"hits = {stats['hits']}, misses = {stats['misses']}\n"
+        string += f"entries = {stats['entries']}, size = {stats['size']} bytes"
+        return string
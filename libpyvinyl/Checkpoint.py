@@ -0,0 +1,373 @@
+"""
+:module Checkpoint: Module hosting the Checkpoint class, the structured checkpoints of
+calculators written by `BaseCalculator.checkpoint`.
+"""
+
+import importlib
+import io
+import json
+import os
+import pickle
+import struct
+import tempfile
+import zipfile
+from typing import List, Optional
+
+import numpy
+from numpy.lib import format as npy
+
+from libpyvinyl.BaseCalculator import BaseCalculator
+from libpyvinyl.BaseData import BaseData, DataCollection
+from libpyvinyl.Parameters import CalculatorParameters
+
+VERSION = "libpyvinyl.checkpoint/1"
+HEADER = "header.json"
+PARAMETERS = "parameters.npz"
+STATE = "state.pkl"
+
+# The arrays larger than this need the zip64 extension
+_ZIP64_LIMIT = 2**31 - 2**20
+# The length of the fixed part of the local file header of a zip member
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+# The length of the zip64 extra field of a local file header
+_ZIP64_EXTRA = 20
+# The alignment of the stored NPY blocks, and the id of the extra field padding them,
+# as used by zipalign
+_ALIGNMENT = 64
+_PADDING_ID = 0xD935
+
+
+def _class_path(cls: type) -> str:
+    """Return the importable path of a class, "module:qualified name" """
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _import_class(path: str) -> type:
+    """Import the class of an importable path returned by `_class_path`"""
+    module, _, qualname = path.partition(":")
+    obj = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _padding(offset: int) -> bytes:
+    """Return an extra field which aligns the data of a zip member following it at offset"""
+    length = -(offset + 4) % _ALIGNMENT
+    return struct.pack("<HH", _PADDING_ID, length) + bytes(length)
+
+
+def _is_buffer(value) -> bool:
+    """True if the value is stored as an NPY block rather than pickled"""
+    return isinstance(value, numpy.ndarray) and not value.dtype.hasobject
+
+
+class Checkpoint:
+    """
+    A checkpoint of a calculator, written by `BaseCalculator.checkpoint`.
+
+    Unlike the dill dumps, a checkpoint is structured so that it can be inspected
+    without loading the data, and stores the arrays out of band. It is a zip archive
+    holding:
+
+     - ``header.json``: the version, the class and the attributes of the calculator,
+       and the description of its input and output data objects
+     - ``parameters.npz``: the parameters, in the binary schema of `BinaryCodec`
+     - ``<input|output>/<index>/<n>.npy``: the arrays of the dict mappings, as NPY blocks
+     - ``<input|output>/<index>/objects.pkl``: the other values of the dict mappings and
+       the kwargs of the file mappings, pickled
+     - ``state.pkl``: the other attributes of the calculator subclass, pickled
+
+    File mappings are stored by reference, i.e. their file name and format class.
+
+    The arrays are stored uncompressed by default, aligned to 64 bytes, and
+    memory-mapped from the archive when loaded, so that loading reads only what is
+    accessed. With `compress=True`
+    they are deflated, and decompressed when loaded. Opening a checkpoint only reads
+    its header::
+
+        calculator.checkpoint("plus.ckpt")
+        checkpoint = Checkpoint("plus.ckpt")
+        print(checkpoint.name, checkpoint.parameters)
+        calculator = checkpoint.load()
+    """
+
+    def __init__(self, filename: str):
+        """
+        :param filename: The filename of the checkpoint.
+        """
+        self.filename = filename
+        with zipfile.ZipFile(filename) as archive:
+            self.header = json.loads(archive.read(HEADER))
+        if self.header.get("version") != VERSION:
+            raise ValueError(
+                f"Checkpoint: {filename} has the version {self.header.get('version')}, expected {VERSION}"
+            )
+        self.__parameters = None
+
+    @property
+    def name(self) -> str:
+        """The name of the calculator."""
+        return self.header["name"]
+
+    @property
+    def calculator_class(self) -> type:
+        """The class of the calculator, which is imported."""
+        return _import_class(self.header["class"])
+
+    @property
+    def parameters(self) -> CalculatorParameters:
+        """The parameters of the calculator, decoded on the first access."""
+        if self.__parameters is None:
+            with zipfile.ZipFile(self.filename) as archive:
+                buffer = io.BytesIO(archive.read(PARAMETERS))
+            self.__parameters = CalculatorParameters.from_binary(buffer)
+        return self.__parameters
+
+    def data_keys(self, which: str = "output") -> List[str]:
+        """Return the keys of the input or output data objects.
+
+        :param which: "input" or "output".
+        """
+        return [entry["key"] for entry in self.header[which] or []]
+
+    def data(self, key: str, which: str = "output") -> BaseData:
+        """Load one input or output data object.
+
+        :param key: The key of the data object.
+        :param which: "input" or "output".
+        """
+        for entry in self.header[which] or []:
+            if entry["key"] == key:
+                with zipfile.ZipFile(self.filename) as archive:
+                    return self.__read_data(archive, entry)
+        raise KeyError(f"Checkpoint: no {which} data object with the key '{key}'")
+
+    def load(self) -> BaseCalculator:
+        """Load the calculator.
+
+        The calculator is restored without calling the `__init__` of its class: the
+        attributes of BaseCalculator are set by `BaseCalculator.__init__` and the other
+        attributes from the pickled state.
+        """
+        header = self.header
+        calculator_class = self.calculator_class
+        with zipfile.ZipFile(self.filename) as archive:
+            if header["input"] is None:
+                input = None
+            else:
+                input = DataCollection(
+                    *[self.__read_data(archive, entry) for entry in header["input"]]
+                )
+            output = [self.__read_data(archive, entry) for entry in header["output"]]
+            if STATE in archive.namelist():
+                state = pickle.loads(archive.read(STATE))
+            else:
+                state = {}
+
+        calculator = calculator_class.__new__(calculator_class)
+        BaseCalculator.__init__(
+            calculator,
+            header["name"],
+            input,
+            header["output_keys"],
+            [_import_class(path) for path in header["output_data_types"]],
+            header["output_filenames"],
+            header["instrument_base_dir"],
+            header["calculator_base_dir"],
+            # the decoded parameters stay with this checkpoint
+            self.parameters.clone(),
+        )
+        for data in output:
+            calculator.output[data.key] = data
+        calculator.__dict__.update(state)
+        return calculator
+
+    def __read_data(self, archive: zipfile.ZipFile, entry: dict) -> BaseData:
+        """Restore a data object from its entry in the header"""
+        data = _import_class(entry["class"])(entry["key"])
+        if entry["mapping"] is None:
+            return data
+        objects = {}
+        if entry["objects"] is not None:
+            objects = pickle.loads(archive.read(entry["objects"]))
+        if entry["mapping"] == "file":
+            data.set_file(
+                entry["filename"],
+                _import_class(entry["format_class"]),
+                **objects.get("format_kwargs", {}),
+            )
+        else:
+            values = objects.get("values", {})
+            data_dict = {}
+            for key in entry["keys"]:
+                if key in entry["arrays"]:
+                    data_dict[key] = self.__read_array(archive, entry["arrays"][key])
+                else:
+                    data_dict[key] = values[key]
+            data.set_dict(data_dict)
+        return data
+
+    def __read_array(self, archive: zipfile.ZipFile, member: str) -> numpy.ndarray:
+        """Read an NPY block, memory-mapped from the archive if it is not compressed"""
+        info = archive.getinfo(member)
+        if info.compress_type != zipfile.ZIP_STORED:
+            with archive.open(info) as fp:
+                return npy.read_array(fp, allow_pickle=False)
+
+        # The data of a stored member follows its local file header
+        with open(self.filename, "rb") as fp:
+            fp.seek(info.header_offset)
+            local_header = _LOCAL_HEADER.unpack(fp.read(_LOCAL_HEADER.size))
+            if local_header[0] != b"PK\x03\x04":
+                raise ValueError(f"Checkpoint: {member} of {self.filename} is corrupt")
+            name_length, extra_length = local_header[-2:]
+            fp.seek(name_length + extra_length, io.SEEK_CUR)
+            version = npy.read_magic(fp)
+            if version == (1, 0):
+                shape, fortran_order, dtype = npy.read_array_header_1_0(fp)
+            else:
+                shape, fortran_order, dtype = npy.read_array_header_2_0(fp)
+            offset = fp.tell()
+        if 0 in shape:
+            # numpy cannot memory-map empty arrays
+            return numpy.empty(shape, dtype, order="F" if fortran_order else "C")
+        return numpy.memmap(
+            self.filename,
+            dtype=dtype,
+            mode="r",
+            offset=offset,
+            shape=shape,
+            order="F" if fortran_order else "C",
+        )
+
+    @classmethod
+    def write(
+        cls, calculator: BaseCalculator, filename: str, compress: bool = False
+    ) -> None:
+        """Write a checkpoint of the calculator.
+
+        :param calculator: The calculator.
+        :param filename: The filename of the checkpoint.
+        :param compress: Deflate the arrays, which are then not memory-mapped when loaded.
+        """
+        compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        header = {
+            "version": VERSION,
+            "class": _class_path(type(calculator)),
+            "name": calculator.name,
+            "instrument_base_dir": calculator.instrument_base_dir,
+            "calculator_base_dir": calculator.calculator_base_dir,
+            "output_keys": list(calculator.output_keys),
+            "output_data_types": [
+                _class_path(data_type) for data_type in calculator.output_data_types
+            ],
+            "output_filenames": list(calculator.output_filenames),
+        }
+        # The archive is written next to the file which it then replaces, so that the
+        # memory maps of the previous file, e.g. of the calculator being written, stay valid
+        fd, tmp_file = tempfile.mkstemp(
+            prefix=".ckpt_", dir=os.path.dirname(os.path.abspath(filename))
+        )
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                cls.__write_archive(fp, calculator, header, compression)
+            os.replace(tmp_file, filename)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+
+    @classmethod
+    def __write_archive(
+        cls, fp, calculator: BaseCalculator, header: dict, compression: int
+    ) -> None:
+        """Write the archive of a checkpoint into a file object, see `write`"""
+        # Imported here as it is only needed to write the parameters
+        from libpyvinyl.Parameters.BinaryCodec import encode
+
+        with zipfile.ZipFile(fp, "w", allowZip64=True) as archive:
+            if calculator.input is None:
+                header["input"] = None
+            else:
+                header["input"] = [
+                    cls.__write_data(archive, f"input/{index}", data, compression)
+                    for index, data in enumerate(calculator.input.to_list())
+                ]
+            header["output"] = [
+                cls.__write_data(archive, f"output/{index}", data, compression)
+                for index, data in enumerate(calculator.output.to_list())
+            ]
+
+            buffer = io.BytesIO()
+            numpy.savez(buffer, **encode({"": calculator.parameters}))
+            archive.writestr(PARAMETERS, buffer.getvalue(), zipfile.ZIP_DEFLATED)
+
+            state = {
+                key: value
+                for key, value in vars(calculator).items()
+                if not key.startswith("_BaseCalculator__")
+            }
+            if state:
+                archive.writestr(
+                    STATE,
+                    pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL),
+                    zipfile.ZIP_DEFLATED,
+                )
+            archive.writestr(HEADER, json.dumps(header, indent=1))
+
+    @staticmethod
+    def __write_data(
+        archive: zipfile.ZipFile, prefix: str, data: BaseData, compression: int
+    ) -> dict:
+        """Write the arrays and the objects of a data object, return its header entry"""
+        entry = {"key": data.key, "class": _class_path(type(data)), "objects": None}
+        try:
+            mapping_type = data.mapping_type
+        except TypeError:
+            # a data object mapping nothing yet, e.g. the output before a run
+            entry["mapping"] = None
+            return entry
+
+        objects = {}
+        if mapping_type == dict:
+            entry["mapping"] = "dict"
+            entry["keys"] = list(data.data_dict)
+            entry["arrays"] = {}
+            values = {}
+            for index, (key, value) in enumerate(data.data_dict.items()):
+                if _is_buffer(value):
+                    member = f"{prefix}/{index}.npy"
+                    info = zipfile.ZipInfo(member)
+                    info.compress_type = compression
+                    force_zip64 = value.nbytes > _ZIP64_LIMIT
+                    if compression == zipfile.ZIP_STORED:
+                        # numpy aligns the data of an NPY block with its header, the
+                        # block itself is aligned so that the memory maps are aligned
+                        info.extra = _padding(
+                            archive.fp.tell()
+                            + _LOCAL_HEADER.size
+                            + len(member.encode())
+                            + (_ZIP64_EXTRA if force_zip64 else 0)
+                        )
+                    with archive.open(info, "w", force_zip64=force_zip64) as fp:
+                        npy.write_array(fp, value, allow_pickle=False)
+                    entry["arrays"][key] = member
+                else:
+                    values[key] = value
+            if values:
+                objects["values"] = values
+        else:
+            entry["mapping"] = "file"
+            entry["filename"] = data.filename
+            entry["format_class"] = _class_path(data.file_format_class)
+            if data.file_format_kwargs:
+                objects["format_kwargs"] = data.file_format_kwargs
+
+        if objects:
+            entry["objects"] = f"{prefix}/objects.pkl"
+            archive.writestr(
+                entry["objects"],
+                pickle.dumps(objects, protocol=pickle.HIGHEST_PROTOCOL),
+                zipfile.ZIP_DEFLATED,
+            )
+        return entry
@@ -0,0 +1,210 @@
+"""
+:module DataCache: Module hosting the DataCache class, the process-wide cache of the
+data read from files by `BaseData.get_data()`.
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy
+
+
+def _nbytes(obj: Any) -> int:
+    """Estimate the memory held by the data read from a file."""
+    if isinstance(obj, numpy.memmap):
+        # memory-mapped arrays are backed by the page cache, not by the process
+        return 0
+    if isinstance(obj, numpy.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (bytes, bytearray, str)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(_nbytes(key) + _nbytes(value) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sum(_nbytes(item) for item in obj)
+    return sys.getsizeof(obj)
+
+
+def _read_only(data: dict) -> dict:
+    """Return a copy of a data dict with read-only views of its arrays."""
+    data = dict(data)
+    for key, value in data.items():
+        if isinstance(value, numpy.ndarray) and value.flags.writeable:
+            value = value.view()
+            value.flags.writeable = False
+            data[key] = value
+    return data
+
+
+class DataCache:
+    """
+    In-memory least recently used cache of the data dicts read from files.
+
+    An entry is identified by the path, modification time and size of the file, the
+    format class reading it and the read kwargs, so that a file modified on disk is
+    read again. Files rewritten within the resolution of the file system clock with the
+    same size are only detected through `invalidate`, which `BaseData.write` calls for
+    the files it writes.
+
+    The total size of the cached data is bounded by `max_bytes`; the least recently
+    used entries are evicted first. The cached data is shared by all the callers of
+    `get`: the arrays of the returned dicts are read-only views, copy them to modify
+    them, and the other mutable values must not be modified in place.
+
+    The cache is disabled by default. The cache used by `BaseData` is returned by
+    `DataCache.shared()`, it is enabled by setting its size::
+
+        from libpyvinyl.DataCache import DataCache
+        DataCache.shared().max_bytes = 2**30
+        print(DataCache.shared().stats())
+    """
+
+    __shared = None
+
+    def __init__(self, max_bytes: int = 0):
+        """
+        :param max_bytes: The maximal size of the cached data in bytes. 0, the default,
+                          disables the cache.
+        """
+        self.__lock = threading.Lock()
+        self.__entries: "OrderedDict[Tuple, Tuple[dict, int]]" = OrderedDict()
+        self.__max_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def shared(cls) -> "DataCache":
+        """Return the process-wide cache used by `BaseData.get_data()`."""
+        if DataCache.__shared is None:
+            DataCache.__shared = DataCache()
+        return DataCache.__shared
+
+    @property
+    def max_bytes(self) -> int:
+        """The maximal size of the cached data in bytes."""
+        return self.__max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        if isinstance(value, int) and value >= 0:
+            self.__max_bytes = value
+            with self.__lock:
+                self.__evict()
+        else:
+            raise ValueError(
+                f"DataCache: `max_bytes` is expected to be a non-negative int, not {value}"
+            )
+
+    @staticmethod
+    def __key(
+        filename: str, format_class, keys: Optional[Tuple[str, ...]], kwargs: Dict
+    ) -> Optional[Tuple]:
+        """Return the key of an entry, None if the file or the kwargs cannot be keyed."""
+        try:
+            stat = os.stat(filename)
+            key = (
+                os.path.abspath(filename),
+                stat.st_mtime_ns,
+                stat.st_size,
+                format_class,
+                keys,
+                tuple(sorted(kwargs.items())),
+            )
+            hash(key)
+        except (OSError, TypeError):
+            return None
+        return key
+
+    def get(
+        self,
+        filename: str,
+        format_class,
+        read: Callable[[], dict],
+        keys: Optional[Tuple[str, ...]] = None,
+        **kwargs,
+    ) -> dict:
+        """Return the data dict of the file, calling `read` only on a cache miss.
+
+        :param filename: The filename of the file.
+        :param format_class: The FormatClass reading the file.
+        :param read: A function returning the data dict read from the file.
+        :param keys: The keys read from the file, `None` if the whole file is read.
+        :param kwargs: The kwargs of the read, they are part of the key of the entry.
+        :return: A shallow copy of the data dict, with read-only arrays if it is cached.
+        """
+        if self.max_bytes:
+            key = self.__key(filename, format_class, keys, kwargs)
+        else:
+            key = None
+        if key is not None:
+            with self.__lock:
+                entry = self.__entries.get(key)
+                if entry is not None:
+                    self.__entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[0])
+                self.misses += 1
+
+        data = read()
+        if key is None:
+            return data
+        size = _nbytes(data)
+        if size > self.max_bytes:
+            return data
+        data = _read_only(data)
+        with self.__lock:
+            if key not in self.__entries:
+                self.__entries[key] = (data, size)
+                self.bytes += size
+                self.__evict()
+        return dict(data)
+
+    def __evict(self) -> None:
+        """Remove the least recently used entries until the cache fits `max_bytes`."""
+        while self.bytes > self.max_bytes:
+            _, (_, size) = self.__entries.popitem(last=False)
+            self.bytes -= size
+
+    def invalidate(self, filename: str) -> None:
+        """Remove all the entries of the file, e.g. because it is being written.
+
+        :param filename: The filename of the file.
+        """
+        path = os.path.abspath(filename)
+        with self.__lock:
+            for key in [key for key in self.__entries if key[0] == path]:
+                _, size = self.__entries.pop(key)
+                self.bytes -= size
+
+    def clear(self) -> None:
+        """Remove all the entries and reset the statistics."""
+        with self.__lock:
+            self.__entries.clear()
+            self.bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return the hit/miss statistics, the number of entries and the bytes held."""
+        with self.__lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.__entries),
+                "bytes": self.bytes,
+            }
+
+    def __str__(self):
+        stats = self.stats()
+        string = "DataCache:\n"
+        string += f"hits = {stats['hits']}, misses = {stats['misses']}\n"
+        string += (
+            f"entries = {stats['entries']}, bytes = {stats['bytes']} / {self.max_bytes}"
+        )
+        return string
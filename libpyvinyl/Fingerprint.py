@@ -0,0 +1,53 @@
+"""
+:module Fingerprint: Module hosting the canonical hashing used to fingerprint
+parameters and calculator runs.
+"""
+
+import numpy
+from pint import Quantity
+
+
+def update_hash(hasher, obj) -> None:
+    """Feed a canonical byte representation of `obj` into `hasher`.
+
+    Dicts are hashed independently of their insertion order. Objects which are
+    not known are hashed through their dill pickle.
+
+    :param hasher: A hashlib hash object.
+    :param obj: The object to hash.
+    """
+    if obj is None or isinstance(obj, (bool, int, float, complex, str)):
+        hasher.update(f"{type(obj).__name__}:{obj!r};".encode())
+    elif isinstance(obj, bytes):
+        hasher.update(b"bytes:" + obj + b";")
+    elif isinstance(obj, Quantity):
+        hasher.update(b"quantity:")
+        update_hash(hasher, obj.magnitude)
+        hasher.update(f"{obj.units};".encode())
+    elif isinstance(obj, numpy.ndarray):
+        array = numpy.ascontiguousarray(obj)
+        hasher.update(f"ndarray:{array.dtype.str}:{array.shape}:".encode())
+        if array.dtype.hasobject:
+            for item in array.flat:
+                update_hash(hasher, item)
+        else:
+            hasher.update(array.tobytes())
+        hasher.update(b";")
+    elif isinstance(obj, numpy.generic):
+        update_hash(hasher, obj.item())
+    elif isinstance(obj, dict):
+        hasher.update(f"dict:{len(obj)}:".encode())
+        for key in sorted(obj, key=repr):
+            update_hash(hasher, key)
+            update_hash(hasher, obj[key])
+        hasher.update(b";")
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(f"{type(obj).__name__}:{len(obj)}:".encode())
+        for item in obj:
+            update_hash(hasher, item)
+        hasher.update(b";")
+    else:
+        # dill is only imported when needed, as it is slow to import
+        import dill
+
+        hasher.update(b"dill:" + dill.dumps(obj) + b";")
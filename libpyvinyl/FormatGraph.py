@@ -0,0 +1,134 @@
+"""
+:module FormatGraph: Module hosting the FormatGraph class, the graph of the conversions
+between the format classes, and its ConversionPlan.
+"""
+
+import heapq
+import itertools
+from typing import Iterable, List, NamedTuple, Optional
+
+
+class ConversionStep(NamedTuple):
+    """One conversion of a plan, from a file in the `source` format class to a file in
+    the `target` format class. If `direct` is True, it is done by `source.convert`,
+    otherwise by reading the data into a dict and writing it with `target.write`.
+    A `source` of None stands for a dict mapping, which is always written."""
+
+    source: Optional[type]
+    target: type
+    direct: bool
+    cost: float
+
+    def __str__(self):
+        source = "dict" if self.source is None else self.source.__name__
+        how = "convert" if self.direct else "read/write"
+        return f"{source} -> {self.target.__name__} ({how}, cost {self.cost:g})"
+
+
+class ConversionPlan:
+    """The cheapest sequence of conversions from a format class to another, as returned
+    by `FormatGraph.plan` and `BaseData.plan_conversion`."""
+
+    def __init__(self, steps: List[ConversionStep]):
+        self.steps = steps
+
+    @property
+    def cost(self) -> float:
+        """The total cost of the conversions."""
+        return sum(step.cost for step in self.steps)
+
+    @property
+    def formats(self) -> list:
+        """The format classes along the path, from the source to the target."""
+        return [self.steps[0].source] + [step.target for step in self.steps]
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def __str__(self):
+        string = f"ConversionPlan: {len(self.steps)} step(s), cost {self.cost:g}\n"
+        string += "\n".join(f"  {step}" for step in self.steps)
+        return string
+
+
+class FormatGraph:
+    """
+    Graph of the conversions between format classes.
+
+    There is an edge from each format class to each other one: reading the data into a
+    dict and writing it, with the cost `source.read_cost() + target.write_cost()`. The
+    direct conversions listed by `direct_convert_formats()` are edges with the cost
+    `source.convert_cost(target)`. The costs are hints relative to each other, defined
+    by the format classes. `plan` returns the cheapest path, which may go through
+    intermediate format classes, e.g. to skip parsing a text file twice::
+
+        print(FormatGraph().plan(TXTFormat, H5Format))
+    """
+
+    def __init__(self, format_classes: Optional[Iterable[type]] = None):
+        """
+        :param format_classes: The format classes which can be used as intermediate
+                               formats, defaults to all the registered format classes.
+        """
+        if format_classes is None:
+            format_classes = self.registered_format_classes()
+        self.format_classes = list(dict.fromkeys(format_classes))
+
+    @staticmethod
+    def registered_format_classes() -> List[type]:
+        """Return the format classes of the `FormatRegistry`."""
+        # Imported here as FormatRegistry is only needed for the default graph
+        from libpyvinyl.FormatRegistry import FormatRegistry
+
+        return FormatRegistry.shared().format_classes()
+
+    @staticmethod
+    def edge(source: type, target: type) -> ConversionStep:
+        """Return the cheapest single conversion from `source` to `target`."""
+        generic_cost = source.read_cost() + target.write_cost()
+        if target in source.direct_convert_formats():
+            direct_cost = source.convert_cost(target)
+            if direct_cost <= generic_cost:
+                return ConversionStep(source, target, True, direct_cost)
+        return ConversionStep(source, target, False, generic_cost)
+
+    def plan(self, source: Optional[type], target: type) -> ConversionPlan:
+        """Return the cheapest plan converting a file from `source` to `target`.
+
+        :param source: The format class of the file, None for a dict mapping.
+        :param target: The format class to convert to.
+        :return: A plan of one step at least, even if `source` is `target`.
+        """
+        if source is None:
+            return ConversionPlan([ConversionStep(None, target, False, 0.0)])
+
+        nodes = [node for node in self.format_classes if node is not target]
+        nodes.append(target)
+        # Dijkstra's algorithm, starting from the edges of the source so that the
+        # path has one step at least. Of equally cheap paths, the shortest is taken,
+        # the counter breaks the remaining ties as format classes cannot be compared.
+        counter = itertools.count()
+        queue = []
+        for node in nodes:
+            step = self.edge(source, node)
+            heapq.heappush(queue, (step.cost, 1, next(counter), [step]))
+        done = set()
+        while queue:
+            cost, length, _, steps = heapq.heappop(queue)
+            node = steps[-1].target
+            if node is target:
+                return ConversionPlan(steps)
+            if node in done:
+                continue
+            done.add(node)
+            for next_node in nodes:
+                if next_node not in done and next_node is not node:
+                    step = self.edge(node, next_node)
+                    heapq.heappush(
+                        queue,
+                        (cost + step.cost, length + 1, next(counter), steps + [step]),
+                    )
+        raise RuntimeError(f"No conversion from {source.__name__} to {target.__name__}")
@@ -0,0 +1,214 @@
+"""
+:module FormatRegistry: Module hosting the FormatRegistry class, the process-wide index of
+the format classes by key, file extension and magic bytes.
+"""
+
+import os
+import threading
+import warnings
+import weakref
+from typing import Dict, Iterable, List, Optional
+
+from libpyvinyl.BaseFormat import _format_classes, _registration_count
+
+# The entry point group of the format classes of other packages
+ENTRY_POINT_GROUP = "libpyvinyl.formats"
+
+
+def _extension_of(register: dict) -> str:
+    """Return the lower case file extension of a format register, with a leading dot"""
+    extension = register["ext"].lower()
+    if extension and not extension.startswith("."):
+        extension = "." + extension
+    return extension
+
+
+class FormatRegistry:
+    """
+    Index of the format classes, by key, file extension and magic bytes.
+
+    Every subclass of BaseFormat implementing `format_register` is registered when it
+    is defined. Format classes of other packages are discovered through the entry
+    points of the group "libpyvinyl.formats", e.g. in the `setup.py` of a package::
+
+        entry_points={"libpyvinyl.formats": ["MYFMT = mypackage.formats:MyFormat"]}
+
+    The index is built lazily on the first lookup, and updated with the format classes
+    defined since. It holds the format classes by their registration numbers, and
+    does not keep the format classes which are not used anymore alive. The registry used by `BaseData` is returned by
+    `FormatRegistry.shared()`::
+
+        from libpyvinyl.FormatRegistry import FormatRegistry
+        print(FormatRegistry.shared().detect("data.h5"))
+    """
+
+    __shared = None
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.clear()
+
+    @classmethod
+    def shared(cls) -> "FormatRegistry":
+        """Return the process-wide registry used by `BaseData`."""
+        if FormatRegistry.__shared is None:
+            FormatRegistry.__shared = FormatRegistry()
+        return FormatRegistry.__shared
+
+    def clear(self) -> None:
+        """Drop the index and the cached supported formats, they are rebuilt on the
+        next lookup, loading the entry points again."""
+        with self.__lock:
+            self.__entry_points_loaded = False
+            self.__indexed = 0
+            # the indexes hold the registration numbers of the format classes
+            self.__format_classes: List[int] = []
+            self.__by_key: Dict[str, List[int]] = {}
+            self.__by_extension: Dict[str, List[int]] = {}
+            # length of the magic bytes -> magic bytes -> format classes
+            self.__by_magic: Dict[int, Dict[bytes, List[int]]] = {}
+            self.__supported_formats: "weakref.WeakKeyDictionary[type, dict]" = (
+                weakref.WeakKeyDictionary()
+            )
+
+    def __update(self) -> None:
+        """Index the format classes defined since the last lookup"""
+        with self.__lock:
+            if not self.__entry_points_loaded:
+                self.__entry_points_loaded = True
+                self.__load_entry_points()
+            count = _registration_count()
+            while self.__indexed < count:
+                format_class = _format_classes.get(self.__indexed)
+                if format_class is not None:
+                    self.__index(self.__indexed, format_class)
+                self.__indexed += 1
+
+    @staticmethod
+    def __alive(numbers: List[int]) -> List[type]:
+        """Return the format classes with the registration numbers which still exist"""
+        format_classes = [_format_classes.get(number) for number in numbers]
+        return [cls for cls in format_classes if cls is not None]
+
+    @staticmethod
+    def __load_entry_points() -> None:
+        """Import the format classes of the entry points, which registers them"""
+        try:
+            from importlib.metadata import entry_points
+        except ImportError:  # Python < 3.8, through the importlib_metadata backport
+            from importlib_metadata import entry_points
+
+        found = entry_points()
+        if hasattr(found, "select"):
+            found = found.select(group=ENTRY_POINT_GROUP)
+        else:
+            found = found.get(ENTRY_POINT_GROUP, [])
+        for entry_point in found:
+            try:
+                entry_point.load()
+            except Exception as error:
+                warnings.warn(
+                    f"FormatRegistry: the format entry point {entry_point.name} cannot be loaded: {error!r}"
+                )
+
+    def __index(self, number: int, format_class: type) -> None:
+        """Add a format class to the indexes by its registration number"""
+        if getattr(format_class.format_register, "__isabstractmethod__", False):
+            return
+        register = format_class.format_register()
+        self.__format_classes.append(number)
+        self.__by_key.setdefault(register["key"], []).append(number)
+        extension = _extension_of(register)
+        if extension:
+            self.__by_extension.setdefault(extension, []).append(number)
+        for magic in format_class.magic_bytes():
+            by_magic = self.__by_magic.setdefault(len(magic), {})
+            by_magic.setdefault(bytes(magic), []).append(number)
+
+    def format_classes(self) -> List[type]:
+        """Return the registered format classes, in the order they were defined."""
+        self.__update()
+        return self.__alive(self.__format_classes)
+
+    def by_key(self, key: str) -> List[type]:
+        """Return the format classes registered with the key."""
+        self.__update()
+        return self.__alive(self.__by_key.get(key, []))
+
+    def by_extension(self, filename: str) -> List[type]:
+        """Return the format classes registered with the extension of the filename.
+        The longest matching extension is used, e.g. ".tar.gz" before ".gz"."""
+        self.__update()
+        name = os.path.basename(os.path.normpath(filename)).lower()
+        index = name.find(".", 1)
+        while index != -1:
+            if name[index:] in self.__by_extension:
+                return self.__alive(self.__by_extension[name[index:]])
+            index = name.find(".", index + 1)
+        return []
+
+    def by_magic(self, filename: str) -> List[type]:
+        """Return the format classes whose magic bytes start the file. The head of the
+        file is read once, directories match no format class."""
+        self.__update()
+        if not self.__by_magic or not os.path.isfile(filename):
+            return []
+        with open(filename, "rb") as fp:
+            head = fp.read(max(self.__by_magic))
+        format_classes = []
+        for length, by_magic in self.__by_magic.items():
+            format_classes.extend(self.__alive(by_magic.get(head[:length], [])))
+        return list(dict.fromkeys(format_classes))
+
+    def detect(self, filename: str, candidates: Optional[Iterable[type]] = None):
+        """Detect the format class of a file.
+
+        The format class is looked up by the extension of the filename first, without
+        opening the file. If no format class or several match, the head of the file is
+        compared with the magic bytes of the format classes.
+
+        :param filename: The filename of the file.
+        :param candidates: The format classes to choose from, defaults to all.
+        :return: The format class.
+        :raises ValueError: If the format cannot be detected unambiguously.
+        """
+        if candidates is not None:
+            candidates = list(candidates)
+
+        def allowed(format_classes):
+            if candidates is None:
+                return format_classes
+            return [cls for cls in format_classes if cls in candidates]
+
+        by_extension = allowed(self.by_extension(filename))
+        if len(by_extension) == 1:
+            return by_extension[0]
+        by_magic = allowed(self.by_magic(filename))
+        if by_extension:
+            by_magic = [cls for cls in by_magic if cls in by_extension]
+        if len(by_magic) == 1:
+            return by_magic[0]
+        matches = by_magic or by_extension
+        if matches:
+            names = ", ".join(cls.__name__ for cls in matches)
+            raise ValueError(
+                f"FormatRegistry: the format of {filename} is ambiguous between {names}"
+            )
+        raise ValueError(f"FormatRegistry: the format of {filename} is not detected")
+
+    def supported_formats(self, data_class) -> dict:
+        """Return the `supported_formats()` of a DataClass, which are cached."""
+        with self.__lock:
+            if data_class not in self.__supported_formats:
+                self.__supported_formats[data_class] = data_class.supported_formats()
+            return dict(self.__supported_formats[data_class])
+
+    def __str__(self):
+        self.__update()
+        string = "FormatRegistry:\n"
+        for format_class in self.__alive(self.__format_classes):
+            register = format_class.format_register()
+            string += (
+                f"{register['key']}: {format_class.__name__} ({register['ext']})\n"
+            )
+        return string
@@ -2,9 +2,14 @@
 :module Instrument: Module hosting the Instrument class
 """
 
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 from libpyvinyl.Parameters.Collections import InstrumentParameters
 from libpyvinyl import BaseCalculator
 from libpyvinyl.BaseData import DataCollection
+from libpyvinyl.Profiler import Profiler
 
 # typing
 from libpyvinyl.Parameters.Collections import MasterParameters
@@ -138,8 +143,8 @@ class Instrument:
 
         :param calculator: calculator
         """
-        self.__calculators[calculator.name] = calculator
         self.__parameters.add(calculator.name, calculator.parameters)
+        self.__calculators[calculator.name] = calculator
 
     def remove_calculator(self, calculator_name: str) -> None:
         """
@@ -151,13 +156,215 @@ class Instrument:
         del self.__calculators[calculator_name]
         del self.__parameters[calculator_name]
 
-    def run(self) -> None:
+    def dependency_graph(self) -> Dict[str, List[str]]:
+        """
+        Return the data dependencies between the calculators.
+
+        A calculator depends on another one if one of the output data objects of the latter
+        is found in its input `DataCollection`.
+
+        :return: a dict with the name of each calculator as key and the list of the names
+                 of the calculators it depends on as value.
+        """
+        producers = {}
+        for name, calculator in self.calculators.items():
+            for data_object in calculator.output.to_list():
+                producers[id(data_object)] = name
+
+        graph = {}
+        for name, calculator in self.calculators.items():
+            upstream = []
+            if calculator.input is not None:
+                for data_object in calculator.input.to_list():
+                    producer = producers.get(id(data_object))
+                    if producer not in (None, name) and producer not in upstream:
+                        upstream.append(producer)
+            graph[name] = upstream
+        return graph
+
+    def run(self, max_workers: Optional[int] = None, incremental: bool = False) -> None:
+        """
+        Run the entire simulation.
+
+        By default the calculators are run one after the other in the order they have
+        been provided. If `max_workers` is larger than 1, the calculators are scheduled
+        according to :meth:`~libpyvinyl.Instrument.dependency_graph` on a thread pool,
+        so that independent branches of the instrument run at the same time.
+
+        In incremental mode, a calculator is only run if it was never run by the
+        instrument, if its parameters or input data objects changed since its last
+        run, or if a calculator it depends on is run. The other calculators keep their
+        output.
+
+        :param max_workers: The maximal number of calculators running at the same time.
+        :param incremental: Whether to skip the calculators which are up to date.
+        """
+        profiler = Profiler.active
+        if profiler is not None:
+            with profiler.span(f"{self.name}.run", "instrument"):
+                return self.__run(max_workers, incremental)
+        return self.__run(max_workers, incremental)
+
+    def __run(self, max_workers: Optional[int], incremental: bool) -> None:
+        """Run the entire simulation, see `run`"""
+        graph = self.dependency_graph() if incremental else None
+        if max_workers is None or max_workers <= 1:
+            rerun = set()
+            for name, calculator in self.calculators.items():
+                if incremental and self.__is_up_to_date(name, graph, rerun):
+                    continue
+                self.__backengine(calculator)
+                calculator.record_run()
+                rerun.add(name)
+        else:
+            self.__run_graph(max_workers, graph)
+
+    def __is_up_to_date(
+        self, name: str, graph: Dict[str, List[str]], rerun: set
+    ) -> bool:
+        """Whether the calculator can be skipped in an incremental run"""
+        if any(upstream in rerun for upstream in graph[name]):
+            return False
+        return self.calculators[name].is_up_to_date
+
+    def __run_graph(
+        self, max_workers: int, graph: Optional[Dict[str, List[str]]] = None
+    ) -> None:
+        """
+        Run the calculators on a thread pool following the dependency graph. The
+        calculators which are up to date are skipped if the graph is given.
         """
-        Run the entire simulation,
-        i.e. all the calculators in the order they have been provided
+        incremental = graph is not None
+        if graph is None:
+            graph = self.dependency_graph()
+        pending = {name: set(upstream) for name, upstream in graph.items()}
+        running = {}
+        rerun = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                ready = [name for name in pending if not pending[name]]
+                for name in ready:
+                    del pending[name]
+                    if incremental and self.__is_up_to_date(name, graph, rerun):
+                        for upstream in pending.values():
+                            upstream.discard(name)
+                        continue
+                    # the backengine runs in the context of the run, e.g. its span
+                    future = executor.submit(
+                        contextvars.copy_context().run,
+                        self.__backengine,
+                        self.calculators[name],
+                    )
+                    running[future] = name
+                if not running:
+                    if ready:
+                        continue
+                    raise RuntimeError(
+                        f"Instrument: circular dependency between the calculators {list(pending)}"
+                    )
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        for other in running:
+                            other.cancel()
+                        raise error
+                    self.calculators[name].record_run()
+                    rerun.add(name)
+                    for upstream in pending.values():
+                        upstream.discard(name)
+
+    @staticmethod
+    def __backengine(calculator: BaseCalculator):
+        """Run the backengine of a calculator, recorded by the active Profiler"""
+        profiler = Profiler.active
+        if profiler is not None:
+            with profiler.span(f"{calculator.name}.backengine", "calculator"):
+                return calculator.backengine()
+        return calculator.backengine()
+
+    @staticmethod
+    async def __abackengine(calculator: BaseCalculator):
+        """Await the backengine of a calculator, recorded by the active Profiler"""
+        profiler = Profiler.active
+        if profiler is not None:
+            with profiler.span(f"{calculator.name}.abackengine", "calculator"):
+                return await calculator.abackengine()
+        return await calculator.abackengine()
+
+    async def arun(
+        self, max_workers: Optional[int] = None, incremental: bool = False
+    ) -> None:
+        """
+        Run the entire simulation as a coroutine.
+
+        The `abackengine` coroutines of the calculators are awaited following
+        :meth:`~libpyvinyl.Instrument.dependency_graph`, so that the independent
+        calculators, e.g. the `AsyncBaseCalculator`s running external programs, run at
+        the same time in the event loop. If a calculator fails, the running ones are
+        cancelled and the error is raised. The calculators are skipped in incremental
+        mode as in :meth:`~libpyvinyl.Instrument.run`::
+
+            asyncio.run(instrument.arun())
+
+        :param max_workers: The maximal number of calculators running at the same time,
+                            defaults to no limit.
+        :param incremental: Whether to skip the calculators which are up to date.
+        :raises ValueError: if max_workers is smaller than 1.
         """
-        for calculator in self.calculators.values():
-            calculator.backengine()
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+        profiler = Profiler.active
+        if profiler is not None:
+            with profiler.span(f"{self.name}.arun", "instrument"):
+                return await self.__arun(max_workers, incremental)
+        return await self.__arun(max_workers, incremental)
+
+    async def __arun(self, max_workers: Optional[int], incremental: bool) -> None:
+        """Run the entire simulation as a coroutine, see `arun`"""
+        graph = self.dependency_graph()
+        pending = {name: set(upstream) for name, upstream in graph.items()}
+        running = {}
+        rerun = set()
+        try:
+            while pending or running:
+                ready = [name for name in pending if not pending[name]]
+                for name in ready:
+                    if max_workers is not None and len(running) >= max_workers:
+                        break
+                    del pending[name]
+                    if incremental and self.__is_up_to_date(name, graph, rerun):
+                        for upstream in pending.values():
+                            upstream.discard(name)
+                        continue
+                    task = asyncio.ensure_future(
+                        self.__abackengine(self.calculators[name])
+                    )
+                    running[task] = name
+                if not running:
+                    if ready:
+                        continue
+                    raise RuntimeError(
+                        f"Instrument: circular dependency between the calculators {list(pending)}"
+                    )
+
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    name = running.pop(task)
+                    task.result()
+                    self.calculators[name].record_run()
+                    rerun.add(name)
+                    for upstream in pending.values():
+                        upstream.discard(name)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
 
     @property
     def output(self) -> DataCollection:
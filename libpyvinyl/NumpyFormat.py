@@ -0,0 +1,231 @@
+"""
+:module NumpyFormat: Module hosting the NumpyFormat class, a format of directories of
+memory-mapped NumPy arrays.
+"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+
+import numpy
+from numpy.lib import format as npy
+
+from libpyvinyl.BaseData import BaseData
+from libpyvinyl.BaseFormat import BaseFormat
+from libpyvinyl.DataCache import DataCache
+
+
+class NumpyFormat(BaseFormat):
+    """
+    Format storing each item of a data dict as a `.npy` file in a directory.
+
+    The directory holds a `header.json` file listing the keys of the data in their
+    order, and one `<key>.npy` file per key. The arrays are read with
+    `numpy.load(mmap_mode="r")`: reading is zero-copy, the returned arrays are
+    read-only memory maps of the files, and processes reading the same file share
+    the page cache. Scalars are stored as 0-d arrays.
+
+    A file is written into a temporary directory which then replaces the previous
+    one, so that the memory maps of the previous file stay valid.
+
+    Data can also be written in chunks with `BaseData.write_chunks`, which appends
+    rows to the arrays in place, and read in chunks with `BaseData.iter_chunks`, which
+    slices the memory maps, so that neither holds more than a chunk in memory.
+
+    To use it, register it in the `supported_formats` of a data class::
+
+        cls._add_ioformat(format_dict, NumpyFormat)
+    """
+
+    HEADER = "header.json"
+    VERSION = "libpyvinyl.numpy/1"
+
+    def __init__(self) -> None:
+        super().__init__()
+
+    @classmethod
+    def format_register(cls):
+        key = "NPY"
+        desciption = "Directory of memory-mapped NumPy arrays"
+        file_extension = ".npyd"
+        read_kwargs = ["mmap_mode"]
+        write_kwargs = [""]
+        return cls._create_format_register(
+            key, desciption, file_extension, read_kwargs, write_kwargs
+        )
+
+    @classmethod
+    def list_keys(cls, filename: str, **kwargs) -> List[str]:
+        """Return the keys of the data from the header of the directory."""
+        with open(os.path.join(filename, cls.HEADER), "r") as fp:
+            header = json.load(fp)
+        if header.get("version") != cls.VERSION:
+            raise ValueError(
+                f"NumpyFormat: {filename} has the version {header.get('version')}, expected {cls.VERSION}"
+            )
+        return header["keys"]
+
+    @classmethod
+    def read(cls, filename: str, mmap_mode: Optional[str] = "r") -> dict:
+        """Map the arrays of the directory with the `filename` to a dictionary.
+
+        :param mmap_mode: The `mmap_mode` of `numpy.load`, `None` to read the arrays into memory.
+        """
+        return cls.read_keys(filename, cls.list_keys(filename), mmap_mode)
+
+    @classmethod
+    def read_keys(
+        cls, filename: str, keys: List[str], mmap_mode: Optional[str] = "r"
+    ) -> dict:
+        """Map the arrays of the given keys of the directory with the `filename`."""
+        return {
+            key: numpy.load(
+                os.path.join(filename, f"{key}.npy"),
+                mmap_mode=mmap_mode,
+                allow_pickle=False,
+            )
+            for key in keys
+        }
+
+    @classmethod
+    def read_lazy(
+        cls, filename: str, keys: List[str], mmap_mode: Optional[str] = "r"
+    ) -> dict:
+        """Map the arrays of the given keys, memory maps are read when they are accessed."""
+        return cls.read_keys(filename, keys, mmap_mode)
+
+    @staticmethod
+    def __check_key(key: str) -> None:
+        """Raises a ValueError if the key cannot be used as a file name."""
+        if not key or key in (".", "..") or "/" in key or os.sep in key:
+            raise ValueError(f"NumpyFormat: the key {key!r} is not a valid file name")
+
+    @classmethod
+    def write(cls, object: BaseData, filename: str, key: str = None):
+        """Save the data of the `object` in the directory with the `filename`."""
+        cls.__write_directory(filename, object.get_data())
+
+        if key is None:
+            original_key = object.key
+            key = original_key + "_to_NumpyFormat"
+        return object.from_file(filename, cls, key)
+
+    @classmethod
+    def __write_directory(cls, filename: str, data_dict: dict) -> None:
+        """Write a data dict into a temporary directory which then replaces `filename`"""
+        arrays = {}
+        for data_key, value in data_dict.items():
+            cls.__check_key(data_key)
+            array = numpy.asarray(value)
+            if array.dtype.hasobject:
+                raise TypeError(
+                    f"NumpyFormat: the value of {data_key!r} cannot be stored as a numeric array"
+                )
+            arrays[data_key] = array
+
+        parent = os.path.dirname(os.path.abspath(filename))
+        tmp_dir = tempfile.mkdtemp(prefix=".npyd_", dir=parent)
+        try:
+            for data_key, array in arrays.items():
+                numpy.save(
+                    os.path.join(tmp_dir, f"{data_key}.npy"), array, allow_pickle=False
+                )
+            with open(os.path.join(tmp_dir, cls.HEADER), "w") as fp:
+                json.dump({"version": cls.VERSION, "keys": list(arrays)}, fp)
+            if os.path.isdir(filename):
+                # a non-empty directory cannot be replaced, it is moved away first
+                old_dir = tempfile.mkdtemp(prefix=".npyd_", dir=parent)
+                os.replace(filename, os.path.join(old_dir, "old"))
+                os.replace(tmp_dir, filename)
+                shutil.rmtree(old_dir, ignore_errors=True)
+            else:
+                os.replace(tmp_dir, filename)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    @classmethod
+    def append_chunk(cls, filename: str, chunk: dict, **kwargs) -> None:
+        """Append the rows of a chunk of data to the arrays of the directory.
+
+        The first chunk creates the directory, atomically. The following chunks must
+        have the same keys, and their arrays the same dtypes and the same shapes but
+        along the first axis; all of them are checked before any row is appended. 0-d
+        values, e.g. scalars, are written by the first chunk only.
+        """
+        try:
+            if not os.path.isdir(filename):
+                cls.__write_directory(filename, chunk)
+                return
+
+            keys = cls.list_keys(filename)
+            if set(keys) != set(chunk):
+                raise KeyError(
+                    f"NumpyFormat: the keys of the chunk {list(chunk)} differ from the keys {keys} of {filename}"
+                )
+            appends = []
+            for data_key in keys:
+                path = os.path.join(filename, f"{data_key}.npy")
+                rows = numpy.asarray(chunk[data_key])
+                grown = cls.__grown_header(path, rows)
+                if grown is not None:
+                    appends.append((path, grown, rows))
+            for path, (header, dtype), rows in appends:
+                with open(path, "r+b") as fp:
+                    fp.seek(0, os.SEEK_END)
+                    fp.write(numpy.ascontiguousarray(rows, dtype=dtype).tobytes())
+                    fp.seek(0)
+                    fp.write(header)
+        finally:
+            # the stat of the directory does not change when its files grow
+            DataCache.shared().invalidate(filename)
+
+    @staticmethod
+    def __grown_header(path: str, rows: numpy.ndarray) -> Optional[tuple]:
+        """Check rows can be appended to a .npy file and return the header of the grown
+        file with the dtype of the file, None for a 0-d array which is not appended"""
+        with open(path, "rb") as fp:
+            version = npy.read_magic(fp)
+            if version == (1, 0):
+                shape, fortran_order, dtype = npy.read_array_header_1_0(fp)
+            else:
+                shape, fortran_order, dtype = npy.read_array_header_2_0(fp)
+            data_offset = fp.tell()
+        if len(shape) == 0:
+            return None
+        if (
+            fortran_order
+            or rows.shape[1:] != shape[1:]
+            or not numpy.can_cast(rows.dtype, dtype, "same_kind")
+        ):
+            raise ValueError(
+                f"NumpyFormat: cannot append rows of shape {rows.shape} and dtype {rows.dtype} "
+                f"to {path} of shape {shape} and dtype {dtype}"
+            )
+        # numpy pads the header so that the length of the first axis can grow in place
+        header = io.BytesIO()
+        header_dict = {
+            "descr": npy.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (shape[0] + rows.shape[0],) + shape[1:],
+        }
+        if version == (1, 0):
+            npy.write_array_header_1_0(header, header_dict)
+        else:
+            npy.write_array_header_2_0(header, header_dict)
+        if header.tell() != data_offset:
+            raise RuntimeError(f"NumpyFormat: the header of {path} cannot grow")
+        return header.getvalue(), dtype
+
+    @staticmethod
+    def direct_convert_formats():
+        return []
+
+    @classmethod
+    def convert(
+        cls, obj: BaseData, output: str, output_format_class: str, key, **kwargs
+    ):
+        raise NotImplementedError
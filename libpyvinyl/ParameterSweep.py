@@ -0,0 +1,261 @@
+"""
+:module ParameterSweep: Module hosting the ParameterSweep class and the generators
+of sweep points.
+"""
+
+from collections import deque
+import copy
+from concurrent.futures import Executor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+import itertools
+import os
+from pathlib import Path
+import pickle
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import uuid
+
+import numpy
+import pint.errors
+
+from libpyvinyl.BaseCalculator import BaseCalculator, _map_template
+from libpyvinyl.BaseData import DataCollection
+from libpyvinyl.Instrument import Instrument
+from libpyvinyl.Parameters.Parameter import Parameter
+
+
+def grid_points(axes: Dict[str, Sequence]) -> List[Dict[str, Any]]:
+    """
+    Return the points of the cartesian product of the given axes.
+
+    :param axes: a dict with the parameter names as keys and the values to scan as values.
+    :return: a list of dicts mapping the parameter names to their values.
+    """
+    points = [{}]
+    for name, values in axes.items():
+        points = [dict(point, **{name: value}) for point in points for value in values]
+    return points
+
+
+def random_points(
+    ranges: Dict[str, Tuple[float, float]], n: int, seed: Optional[int] = None
+) -> List[Dict[str, float]]:
+    """
+    Return `n` points drawn uniformly in the given ranges.
+
+    :param ranges: a dict with the parameter names as keys and (low, high) tuples as values.
+    :param n: the number of points.
+    :param seed: the seed of the random number generator.
+    :return: a list of dicts mapping the parameter names to their values.
+    """
+    rng = numpy.random.default_rng(seed)
+    columns = {name: rng.uniform(low, high, n) for name, (low, high) in ranges.items()}
+    return [{name: float(columns[name][i]) for name in ranges} for i in range(n)]
+
+
+def latin_hypercube_points(
+    ranges: Dict[str, Tuple[float, float]], n: int, seed: Optional[int] = None
+) -> List[Dict[str, float]]:
+    """
+    Return `n` points of a latin hypercube sampling of the given ranges.
+
+    Each range is divided into `n` strata of equal width, and each stratum of each
+    parameter holds exactly one point.
+
+    :param ranges: a dict with the parameter names as keys and (low, high) tuples as values.
+    :param n: the number of points.
+    :param seed: the seed of the random number generator.
+    :return: a list of dicts mapping the parameter names to their values.
+    """
+    rng = numpy.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in ranges.items():
+        strata = (rng.permutation(n) + rng.uniform(0, 1, n)) / n
+        columns[name] = low + strata * (high - low)
+    return [{name: float(columns[name][i]) for name in ranges} for i in range(n)]
+
+
+def _run_point(
+    token: str,
+    payload: Optional[bytes],
+    index: int,
+    point: Dict[str, Any],
+    base_dir: str,
+) -> Tuple[int, Dict[str, Any], DataCollection]:
+    """Run the target for one point of the sweep. Executed by the pool workers."""
+    target = _map_template(token, payload)
+    if isinstance(target, Instrument):
+        target = copy.deepcopy(target)
+        for name, value in point.items():
+            if name in target.master:
+                target.master[name] = value
+            else:
+                calculator_name, parameter_name = name.split("/", 1)
+                target.parameters[calculator_name][parameter_name] = value
+    else:
+        target = target.clone()
+        target.set_parameters(point)
+
+    target.set_instrument_base_dir(base_dir)
+    if isinstance(target, Instrument):
+        target.run()
+    else:
+        target.backengine()
+    return index, point, target.output
+
+
+class ParameterSweep:
+    """
+    Run a calculator or an instrument for a list of parameter points.
+
+    The points are dicts mapping parameter names to values. For a calculator, the names
+    are the names of its parameters. For an instrument, a name is either the name of a
+    master parameter or "`calculator name`/`parameter name`".
+
+    Each point is run on a copy of the target whose `instrument_base_dir` is set to
+    "`base_dir`/point_`index`", so that the output files of the points do not collide.
+
+    Example::
+
+        points = grid_points({"energy": [1.0, 2.0], "Source/size": [0.1, 0.2]})
+        sweep = ParameterSweep(instrument, points)
+        for index, point, output in sweep.run(max_workers=4):
+            print(index, point, output.get_data())
+    """
+
+    def __init__(
+        self,
+        target: Union[BaseCalculator, Instrument],
+        points: List[Dict[str, Any]],
+        base_dir: Optional[str] = None,
+    ):
+        """
+        :param target: The calculator or instrument to run.
+        :param points: The list of parameter points.
+        :param base_dir: The directory under which the output of each point is written.
+                         Defaults to the `instrument_base_dir` of the target.
+        """
+        if not isinstance(target, (BaseCalculator, Instrument)):
+            raise TypeError(
+                f"ParameterSweep: `target` is expected to be a BaseCalculator or an Instrument, not {type(target)}"
+            )
+        self.target = target
+        self.points = list(points)
+        if base_dir is None:
+            base_dir = target.instrument_base_dir
+        self.base_dir = base_dir
+
+    def __len__(self):
+        return len(self.points)
+
+    def point_dir(self, index: int) -> str:
+        """The `instrument_base_dir` used for the point with the given index."""
+        return str(Path(self.base_dir) / f"point_{index:06d}")
+
+    def __resolve(self, name: str) -> List[Parameter]:
+        """Return the parameters constrained by the given name."""
+        if isinstance(self.target, BaseCalculator):
+            return [self.target.parameters[name]]
+
+        if name in self.target.master:
+            # the master parameter, the parameters it drives and the chained masters
+            targets = self.target.master.compile()[name]
+            return [self.target.master[name]] + [parameter for _, parameter in targets]
+
+        if "/" not in name:
+            raise KeyError(
+                f"{name} is neither a master parameter nor of the form 'calculator/parameter'."
+            )
+        calculator_name, parameter_name = name.split("/", 1)
+        return [self.target.parameters[calculator_name][parameter_name]]
+
+    def validate(self) -> None:
+        """
+        Check all the points against the constraints of the parameters.
+
+        A ValueError listing the illegal points is raised if any.
+        """
+        resolved = {}
+        errors = []
+        for index, point in enumerate(self.points):
+            for name, value in point.items():
+                if name not in resolved:
+                    resolved[name] = self.__resolve(name)
+                for parameter in resolved[name]:
+                    try:
+                        legal = parameter.is_legal(value)
+                    except (TypeError, pint.errors.DimensionalityError):
+                        legal = False
+                    if not legal:
+                        errors.append(
+                            f"point {index}: value {value} of '{name}' is illegal for parameter '{parameter.name}'"
+                        )
+        if errors:
+            raise ValueError("Illegal sweep points:\n" + "\n".join(errors))
+
+    def run(
+        self,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> Iterator[Tuple[int, Dict[str, Any], DataCollection]]:
+        """
+        Validate the points and run them, yielding the results as they complete.
+
+        The points are validated before this method returns. The target is pickled
+        once and sent to each worker process when it starts, and the points are
+        submitted as the workers become free, see `BaseCalculator.map`.
+
+        :param max_workers: The number of worker processes, used when no `executor` is given,
+                            and the number of points in flight is twice it. Defaults to
+                            the number of CPUs.
+        :param executor: An executor to run the points on. Defaults to a new process pool.
+                         Given an executor, the target is sent with each point, and
+                         unpickled once per worker.
+        :return: An iterator of (index, point, output) tuples in completion order.
+        """
+        self.validate()
+        return self.__run(max_workers, executor)
+
+    def __run(
+        self, max_workers: Optional[int], executor: Optional[Executor]
+    ) -> Iterator[Tuple[int, Dict[str, Any], DataCollection]]:
+        """Run the validated points, see `run`"""
+        target = self.target
+        if isinstance(target, BaseCalculator):
+            # the output of the calculator is not sent to the workers
+            target = target.clone()
+        token = uuid.uuid4().hex
+        payload = pickle.dumps(target, protocol=pickle.HIGHEST_PROTOCOL)
+        in_flight = 2 * (max_workers or os.cpu_count() or 1)
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_map_template,
+                initargs=(token, payload),
+            )
+            payload = None
+        points = enumerate(self.points)
+        pending = deque()
+
+        def submit():
+            for index, point in itertools.islice(points, in_flight - len(pending)):
+                pending.append(
+                    executor.submit(
+                        _run_point, token, payload, index, point, self.point_dir(index)
+                    )
+                )
+
+        try:
+            submit()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+                submit()
+        finally:
+            for future in pending:
+                future.cancel()
+            if own_executor:
+                # the pending futures are cancelled above, as cancel_futures needs Python 3.9
+                executor.shutdown(wait=True)
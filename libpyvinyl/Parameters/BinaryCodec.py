@@ -0,0 +1,344 @@
+"""
+:module BinaryCodec: Module hosting the binary serialization of parameter collections.
+
+The collections are stored as a set of flat NumPy arrays in a `.npz` archive, with the
+following schema (version 1):
+
+ - ``schema``: the schema identifier, "libpyvinyl.parameters/1"
+ - ``collections``: the names of the collections, "Master" for the master parameters
+ - ``units``: the table of unit strings, referenced by unit ids
+ - ``strings``: the table of string values, referenced by string ids
+ - ``objects``: a JSON list of the values which do not fit the columns below
+ - the parameter table, with one row per parameter:
+   ``parameter_collection``, ``parameter_name``, ``parameter_comment``,
+   ``parameter_has_comment``, ``parameter_is_master``, ``parameter_unit`` (unit id),
+   ``parameter_value`` (value id), ``parameter_intervals_are_legal`` and
+   ``parameter_options_are_legal`` (-1 for None, 0 for False and 1 for True)
+ - the interval table: ``interval_parameter``, ``interval_low``, ``interval_high``
+ - the option table: ``option_parameter``, ``option_value``
+ - the link table of the master parameters: ``link_parameter``, ``link_calculator``,
+   ``link_name``
+ - the value table, referenced by value ids: ``value_kind``, ``value_float``,
+   ``value_int``, ``value_unit`` (unit id) and ``value_ref`` (string, object or array
+   id)
+ - ``array_<id>``: the magnitudes of the array valued quantities, as native arrays
+
+Magnitudes and unit ids are stored separately, so that no quantity string needs to be
+formatted or parsed, and each distinct unit string is parsed once.
+"""
+
+from typing import Any, Dict, List
+
+import numpy
+from pint import Quantity
+
+from .Parameter import Parameter, _intern_unit, _unit_name
+
+SCHEMA = "libpyvinyl.parameters/1"
+
+# kinds of the values in the value table
+NONE = 0
+QUANTITY_FLOAT = 1
+QUANTITY_INT = 2
+INT = 3
+FLOAT = 4
+BOOL = 5
+STR = 6
+OBJECT = 7
+QUANTITY_ARRAY = 8
+
+# the columns of the tables and their types
+COLUMNS = {
+    "parameter_collection": numpy.int32,
+    "parameter_name": str,
+    "parameter_comment": str,
+    "parameter_has_comment": bool,
+    "parameter_is_master": bool,
+    "parameter_unit": numpy.int32,
+    "parameter_value": numpy.int32,
+    "parameter_intervals_are_legal": numpy.int8,
+    "parameter_options_are_legal": numpy.int8,
+    "interval_parameter": numpy.int32,
+    "interval_low": numpy.int32,
+    "interval_high": numpy.int32,
+    "option_parameter": numpy.int32,
+    "option_value": numpy.int32,
+    "link_parameter": numpy.int32,
+    "link_calculator": str,
+    "link_name": str,
+    "value_kind": numpy.uint8,
+    "value_float": numpy.float64,
+    "value_int": numpy.int64,
+    "value_unit": numpy.int32,
+    "value_ref": numpy.int32,
+}
+
+_LEGALITY = {None: -1, False: 0, True: 1}
+_LEGALITY_DECODE = {-1: None, 0: False, 1: True}
+
+
+def _is_column_number(value: Any) -> bool:
+    """Whether a number fits the float or int64 column of the value table"""
+    if isinstance(value, int):
+        return -(2**63) <= value < 2**63
+    return isinstance(value, float)
+
+
+def _is_column_array(value: Any) -> bool:
+    """Whether a magnitude can be stored as a native numeric array"""
+    return isinstance(value, numpy.ndarray) and value.dtype.kind in "biufc"
+
+
+class _Table:
+    """Interning table of hashable items, returning their ids"""
+
+    def __init__(self):
+        self.ids = {}
+        self.items = []
+
+    def __call__(self, item) -> int:
+        try:
+            return self.ids[item]
+        except KeyError:
+            self.ids[item] = len(self.items)
+            self.items.append(item)
+            return self.ids[item]
+
+
+class _Encoder:
+    """Accumulates the columns of the archive"""
+
+    def __init__(self):
+        self.units = _Table()
+        self.strings = _Table()
+        self.objects = []
+        self.magnitudes = []
+        self.columns = {name: [] for name in COLUMNS}
+
+    def value(self, value: Any) -> int:
+        """Appends a value to the value table and returns its id"""
+        kind, number, integer, unit, ref = NONE, 0.0, 0, -1, -1
+        if isinstance(value, Quantity) and _is_column_number(value.magnitude):
+            magnitude = value.magnitude
+            unit = self.units(_unit_name(value.units))
+            if isinstance(magnitude, int):
+                kind, integer = QUANTITY_INT, magnitude
+            else:
+                kind, number = QUANTITY_FLOAT, magnitude
+        elif isinstance(value, Quantity) and _is_column_array(value.magnitude):
+            unit = self.units(_unit_name(value.units))
+            kind, ref = QUANTITY_ARRAY, len(self.magnitudes)
+            self.magnitudes.append(value.magnitude)
+        elif isinstance(value, bool):
+            kind, integer = BOOL, int(value)
+        elif isinstance(value, int) and _is_column_number(value):
+            kind, integer = INT, value
+        elif isinstance(value, float):
+            kind, number = FLOAT, value
+        elif isinstance(value, str):
+            kind, ref = STR, self.strings(value)
+        elif value is not None:
+            kind, ref = OBJECT, len(self.objects)
+            self.objects.append(value)
+
+        columns = self.columns
+        columns["value_kind"].append(kind)
+        columns["value_float"].append(number)
+        columns["value_int"].append(integer)
+        columns["value_unit"].append(unit)
+        columns["value_ref"].append(ref)
+        return len(columns["value_kind"]) - 1
+
+    def parameter(self, collection: int, parameter: Parameter) -> None:
+        """Appends a parameter, its constraints and its links to the tables"""
+        columns = self.columns
+        index = len(columns["parameter_name"])
+        columns["parameter_collection"].append(collection)
+        columns["parameter_name"].append(parameter.name)
+        columns["parameter_comment"].append(parameter.comment or "")
+        columns["parameter_has_comment"].append(parameter.comment is not None)
+        columns["parameter_is_master"].append(hasattr(parameter, "links"))
+        columns["parameter_unit"].append(self.units(parameter.unit))
+        columns["parameter_value"].append(self.value(parameter.value_no_conversion))
+        columns["parameter_intervals_are_legal"].append(
+            _LEGALITY[parameter.get_intervals_are_legal()]
+        )
+        columns["parameter_options_are_legal"].append(
+            _LEGALITY[parameter.get_options_are_legal()]
+        )
+        for low, high in parameter.get_intervals():
+            columns["interval_parameter"].append(index)
+            columns["interval_low"].append(self.value(low))
+            columns["interval_high"].append(self.value(high))
+        for option in parameter.get_options():
+            columns["option_parameter"].append(index)
+            columns["option_value"].append(self.value(option))
+        for calculator, names in (getattr(parameter, "links", None) or {}).items():
+            # a master parameter may link to a list of master parameters
+            for name in [names] if isinstance(names, str) else names:
+                columns["link_parameter"].append(index)
+                columns["link_calculator"].append(calculator)
+                columns["link_name"].append(name)
+
+    def arrays(self, collection_names: List[str]) -> Dict[str, numpy.ndarray]:
+        """Returns the archive as a dict of arrays"""
+        # json_tricks is only imported when needed, as it is slow to import
+        import json_tricks as json
+        from .Collections import quantity_encode
+
+        arrays = {
+            "schema": numpy.array(SCHEMA),
+            "collections": numpy.array(collection_names, dtype=str),
+            "units": numpy.array(self.units.items, dtype=str),
+            "strings": numpy.array(self.strings.items, dtype=str),
+            "objects": numpy.array(
+                json.dumps(
+                    self.objects, allow_nan=True, extra_obj_encoders=[quantity_encode]
+                )
+            ),
+        }
+        for name, column in self.columns.items():
+            arrays[name] = numpy.array(column, dtype=COLUMNS[name])
+        for ref, magnitude in enumerate(self.magnitudes):
+            arrays[f"array_{ref}"] = magnitude
+        return arrays
+
+
+def encode(collections: Dict[str, Any]) -> Dict[str, numpy.ndarray]:
+    """
+    Encodes parameter collections into the arrays of the binary schema.
+
+    :param collections: a dict mapping collection names to CalculatorParameters objects
+    :return: a dict mapping array names to numpy arrays
+    """
+    encoder = _Encoder()
+    for index, parameters in enumerate(collections.values()):
+        for parameter in parameters:
+            encoder.parameter(index, parameter)
+    return encoder.arrays(list(collections.keys()))
+
+
+def _decode_values(arrays: Dict[str, numpy.ndarray]) -> List[Any]:
+    """Returns the list of the values of the value table"""
+    # json_tricks is only imported when needed, as it is slow to import
+    import json_tricks as json
+    from .Collections import quantity_decode
+
+    units = arrays["units"].tolist()
+    strings = arrays["strings"].tolist()
+    objects = json.loads(
+        str(arrays["objects"]), extra_obj_pairs_hooks=[quantity_decode]
+    )
+
+    values = []
+    for kind, number, integer, unit, ref in zip(
+        arrays["value_kind"].tolist(),
+        arrays["value_float"].tolist(),
+        arrays["value_int"].tolist(),
+        arrays["value_unit"].tolist(),
+        arrays["value_ref"].tolist(),
+    ):
+        if kind == QUANTITY_FLOAT:
+            values.append(Quantity(number, _intern_unit(units[unit])))
+        elif kind == QUANTITY_INT:
+            values.append(Quantity(integer, _intern_unit(units[unit])))
+        elif kind == INT:
+            values.append(integer)
+        elif kind == FLOAT:
+            values.append(number)
+        elif kind == BOOL:
+            values.append(bool(integer))
+        elif kind == STR:
+            values.append(strings[ref])
+        elif kind == OBJECT:
+            values.append(objects[ref])
+        elif kind == QUANTITY_ARRAY:
+            values.append(Quantity(arrays[f"array_{ref}"], _intern_unit(units[unit])))
+        else:
+            values.append(None)
+    return values
+
+
+def decode(arrays: Dict[str, numpy.ndarray]) -> Dict[str, List[Parameter]]:
+    """
+    Decodes the arrays of the binary schema into parameters.
+
+    :param arrays: a dict mapping array names to numpy arrays, e.g. a loaded npz archive
+    :return: a dict mapping collection names to lists of parameters
+    """
+    from .Collections import MASTER_KEY, MasterParameter
+
+    schema = str(arrays["schema"])
+    if schema != SCHEMA:
+        raise ValueError(f"Unsupported parameter schema {schema}, expected {SCHEMA}")
+
+    values = _decode_values(arrays)
+    units = arrays["units"].tolist()
+    names = arrays["parameter_name"].tolist()
+
+    intervals = [[] for _ in names]
+    for index, low, high in zip(
+        arrays["interval_parameter"].tolist(),
+        arrays["interval_low"].tolist(),
+        arrays["interval_high"].tolist(),
+    ):
+        intervals[index].append((values[low], values[high]))
+    options = [[] for _ in names]
+    for index, value in zip(
+        arrays["option_parameter"].tolist(), arrays["option_value"].tolist()
+    ):
+        options[index].append(values[value])
+    links = {}
+    for index, calculator, name in zip(
+        arrays["link_parameter"].tolist(),
+        arrays["link_calculator"].tolist(),
+        arrays["link_name"].tolist(),
+    ):
+        parameter_links = links.setdefault(index, {})
+        if calculator == MASTER_KEY and calculator in parameter_links:
+            previous = parameter_links[calculator]
+            masters = previous if isinstance(previous, list) else [previous]
+            parameter_links[calculator] = masters + [name]
+        else:
+            parameter_links[calculator] = name
+
+    collection_names = arrays["collections"].tolist()
+    collections = {name: [] for name in collection_names}
+    for index, (
+        collection,
+        comment,
+        has_comment,
+        is_master,
+        unit,
+        value,
+        ilegal,
+        olegal,
+    ) in enumerate(
+        zip(
+            arrays["parameter_collection"].tolist(),
+            arrays["parameter_comment"].tolist(),
+            arrays["parameter_has_comment"].tolist(),
+            arrays["parameter_is_master"].tolist(),
+            arrays["parameter_unit"].tolist(),
+            arrays["parameter_value"].tolist(),
+            arrays["parameter_intervals_are_legal"].tolist(),
+            arrays["parameter_options_are_legal"].tolist(),
+        )
+    ):
+        param_dict = {
+            "name": names[index],
+            "_Parameter__unit": units[unit],
+            "comment": comment if has_comment else None,
+            "_Parameter__value": values[value],
+            "_Parameter__intervals": intervals[index],
+            "_Parameter__intervals_are_legal": _LEGALITY_DECODE[ilegal],
+            "_Parameter__options": options[index],
+            "_Parameter__options_are_legal": _LEGALITY_DECODE[olegal],
+        }
+        if is_master:
+            param_dict["links"] = links.get(index, {})
+            parameter = MasterParameter.from_dict(param_dict)
+        else:
+            parameter = Parameter.from_dict(param_dict)
+        collections[collection_names[collection]].append(parameter)
+    return collections
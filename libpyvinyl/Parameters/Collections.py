@@ -1,15 +1,37 @@
 # Created by Mads Bertelsen and modified by Juncheng E
 
-import json_tricks as json
 from collections import OrderedDict
 import copy
+import hashlib
+import itertools
+from types import MappingProxyType
 
 from libpyvinyl.AbstractBaseClass import AbstractBaseClass
+from libpyvinyl.Fingerprint import update_hash
+from libpyvinyl.Profiler import Profiler, file_size
 from .Parameter import Parameter
 from pint import Unit, Quantity
 from pint.util import UnitsContainer
+import numpy
 
-from typing import Union
+from typing import Union, Any, Dict, List, Mapping, Tuple
+
+# key of the master parameters in links and in serialized instruments
+MASTER_KEY = "Master"
+
+# counts the changes to the structure of the collections, i.e. added or deleted
+# parameters and changed links, to invalidate the compiled master propagation plans
+_structure_changes = 0
+
+
+# Source of the versions of the parameter collections, unique across all collections
+_versions = itertools.count(1)
+
+
+def _record_structure_change() -> None:
+    """Records that parameters were added to or deleted from a collection, or relinked"""
+    global _structure_changes
+    _structure_changes += 1
 
 
 def quantity_encode(
@@ -37,7 +59,9 @@ def quantity_decode(dct):
     if "__quantity__" in dct:
         a = dct["__quantity__"]
         if "inf" in a:
-            return Quantity("inf", a.strip("inf"))
+            # the unit may contain the letters of inf, e.g. barn
+            magnitude, _, unit = a.partition(" ")
+            return Quantity(float(magnitude), unit)
         else:
             return Quantity(dct["__quantity__"])
     elif "__units__" in dct:
@@ -46,6 +70,72 @@ def quantity_decode(dct):
         return dct
 
 
+def _same_value(old: Any, new: Any) -> bool:
+    """Returns True if two parameter values are identical, arrays are compared elementwise"""
+    if type(old) is not type(new):
+        return False
+    if isinstance(old, numpy.ndarray):
+        return old.shape == new.shape and bool(numpy.all(old == new))
+    try:
+        return bool(old == new)
+    except ValueError:
+        return False
+
+
+def _state_value(state: Tuple[Any, Union[Unit, None]]) -> Any:
+    """Returns the value of a parameter from its Parameter._value_state"""
+    magnitude, unit = state
+    if unit is None:
+        return magnitude
+    return Quantity(magnitude, unit)
+
+
+def _assign_atomically(
+    assignments: List[Tuple[str, Parameter, Any]], report: bool = True
+) -> Union[Dict[str, Tuple[Any, Any]], None]:
+    """
+    Assigns values to parameters, either all of them or none of them.
+
+    All the assignments are attempted. If any of them fails, every parameter is
+    restored to its state before the call and a ValueError listing all the failures
+    is raised.
+
+    :param assignments: a list of (name, parameter, value) tuples
+    :param report: if False, the change set is not computed and None is returned
+    :return: the change set, a dict mapping the names of the parameters whose value
+             changed to (old value, new value) tuples
+    """
+    snapshots = {}
+    old_states = {}
+    errors = []
+    try:
+        for name, parameter, value in assignments:
+            if id(parameter) not in snapshots:
+                snapshots[id(parameter)] = (parameter, parameter._snapshot())
+            if report:
+                old_states.setdefault(name, (parameter, parameter._value_state()))
+            try:
+                parameter.value = value
+            except (TypeError, ValueError, NotImplementedError) as e:
+                errors.append(f"{name}: {e}")
+        if errors:
+            raise ValueError("Illegal parameter values:\n" + "\n".join(errors))
+    except BaseException:
+        for parameter, snapshot in snapshots.values():
+            parameter._restore(snapshot)
+        raise
+
+    if not report:
+        return None
+    changes = {}
+    for name, (parameter, old_state) in old_states.items():
+        new_state = parameter._value_state()
+        # the stored magnitudes are compared, in the unit they are stored in
+        if old_state[1] != new_state[1] or not _same_value(old_state[0], new_state[0]):
+            changes[name] = (_state_value(old_state), _state_value(new_state))
+    return changes
+
+
 class CalculatorParameters(AbstractBaseClass):
     """
     Collection of parameters related to a single calculator
@@ -58,9 +148,34 @@ class CalculatorParameters(AbstractBaseClass):
         Creates a Parameters object, optionally with list of parameter objects
         """
         self.parameters = OrderedDict()
+        # cached fingerprint, reset by the parameters through _changed
+        self.__fingerprint = None
+        # version and the fingerprint it was given for
+        self.__version = next(_versions)
+        self.__version_fingerprint = None
         if parameters is not None:
             self.add(parameters)
 
+    def clone(self) -> "CalculatorParameters":
+        """
+        Returns a copy of this collection with shallow copies of the parameters, see
+        `Parameter.__copy__`: the lists of intervals and options are copied, the values
+        are shared as they are replaced rather than modified by the parameters.
+
+        This collection keeps its parameters, so that the references to them held
+        elsewhere, e.g. by the compiled master parameters, keep driving this collection
+        only.
+        """
+        # the state is copied directly, __setstate__ would adopt the original parameters
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        new.parameters = OrderedDict(
+            (key, copy.copy(parameter)) for key, parameter in self.parameters.items()
+        )
+        new.__version = next(_versions)
+        new.__adopt()
+        return new
+
     def check_type(self, parameter):
         """
         Checks given parameter is of type Parameter
@@ -92,6 +207,9 @@ class CalculatorParameters(AbstractBaseClass):
                     raise RuntimeError("Duplicate parameter name in parameters!")
 
                 self.parameters[par.name] = par
+                par._add_owner(self)
+            self.__fingerprint = None
+            _record_structure_change()
             return
 
         # handle case where single parameter is given
@@ -100,6 +218,9 @@ class CalculatorParameters(AbstractBaseClass):
             raise RuntimeError("Duplicate parameter name in parameters!")
 
         self.parameters[parameter.name] = parameter
+        parameter._add_owner(self)
+        self.__fingerprint = None
+        _record_structure_change()
 
     def new_parameter(self, *args, **kwargs):
         """
@@ -128,13 +249,82 @@ class CalculatorParameters(AbstractBaseClass):
         """
         Sets value of parameter with given key to given value
         """
-        self.parameters[key].value = value
+        self[key].value = value
+
+    def set_many(self, values: Mapping[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+        """
+        Sets the values of several parameters at once, atomically.
+
+        Either all the values are assigned, or, if any of them is illegal, none of them
+        and a ValueError listing the illegal values is raised.
+
+        :param values: a mapping of parameter names to their new values
+        :return: the change set, a dict mapping the names of the parameters whose value
+                 changed to (old value, new value) tuples
+        """
+        return _assign_atomically(
+            [(key, self[key], value) for key, value in values.items()]
+        )
 
     def __delitem__(self, key):
         """
         Deletes parameter with given key
         """
-        del self.parameters[key]
+        self.parameters.pop(key)._remove_owner(self)
+        self.__fingerprint = None
+        _record_structure_change()
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # the version was drawn in another process, it may be drawn again in this one
+        self.__version = next(_versions)
+        self.__version_fingerprint = None
+        self.__adopt()
+
+    def __adopt(self) -> None:
+        """Registers this collection with its parameters, see Parameter._add_owner"""
+        for parameter in self.parameters.values():
+            parameter._add_owner(self)
+
+    def _changed(self) -> None:
+        """Invalidates the cached fingerprint, called when a parameter changes"""
+        self.__fingerprint = None
+
+    def fingerprint(self) -> str:
+        """
+        Returns a hex digest identifying the names, units, values and constraints of
+        the parameters, see Parameter.fingerprint.
+
+        The result is cached until a parameter is modified, or added or deleted through
+        the methods of this collection.
+        """
+        if self.__fingerprint is None:
+            hasher = hashlib.sha256()
+            update_hash(
+                hasher,
+                {
+                    key: parameter.fingerprint()
+                    for key, parameter in self.parameters.items()
+                },
+            )
+            self.__fingerprint = hasher.hexdigest()
+        return self.__fingerprint
+
+    @property
+    def version(self) -> int:
+        """
+        The version of the content of this collection.
+
+        It changes whenever the fingerprint changes, i.e. when a parameter is modified,
+        added or deleted, and is unique across all the collections. Setting a parameter
+        back to its previous value before the version is read again keeps the version.
+        """
+        fingerprint = self.fingerprint()
+        if fingerprint != self.__version_fingerprint:
+            if self.__version_fingerprint is not None:
+                self.__version = next(_versions)
+            self.__version_fingerprint = fingerprint
+        return self.__version
 
     def __iter__(self):
         """
@@ -176,6 +366,21 @@ class CalculatorParameters(AbstractBaseClass):
         :type  fname: str
 
         """
+        profiler = Profiler.active
+        if profiler is not None:
+            with profiler.span(
+                f"{cls.__name__}.from_json", "json", filename=fname
+            ) as span:
+                span.bytes_read = file_size(fname)
+                return cls.__from_json(fname)
+        return cls.__from_json(fname)
+
+    @classmethod
+    def __from_json(cls, fname: str):
+        """Initialize an instance from a json file, see `from_json`"""
+        # json_tricks is only imported when needed, as it is slow to import
+        import json_tricks as json
+
         with open(fname, "r") as fp:
             instance = cls.from_dict(
                 json.load(fp, extra_obj_pairs_hooks=[quantity_decode]),
@@ -194,18 +399,18 @@ class CalculatorParameters(AbstractBaseClass):
         """
         parameters = cls()
         for key in params_dict:
-            parameters.add(Parameter.from_dict(params_dict[key]))
+            # master parameters are serialized with their links
+            if "links" in params_dict[key]:
+                parameters.add(MasterParameter.from_dict(params_dict[key]))
+            else:
+                parameters.add(Parameter.from_dict(params_dict[key]))
 
         return parameters
 
     def to_dict(self):
         params = {}
         for key in self.parameters:
-            # Deepcopy to not modify the original parameters
-            params[key] = copy.deepcopy(self.parameters[key].__dict__)
-            a = params[key]
-            if "_Parameter__value_type" in a:
-                del a["_Parameter__value_type"]
+            params[key] = self.parameters[key].to_dict()
 
         return params
 
@@ -217,6 +422,20 @@ class CalculatorParameters(AbstractBaseClass):
         :type  fname: str
 
         """
+        profiler = Profiler.active
+        if profiler is not None:
+            with profiler.span(
+                f"{type(self).__name__}.to_json", "json", filename=fname
+            ) as span:
+                self.__to_json(fname)
+                span.bytes_written = file_size(fname)
+        else:
+            self.__to_json(fname)
+
+    def __to_json(self, fname: str):
+        """Save this parameters class to a json file, see `to_json`"""
+        import json_tricks as json
+
         with open(fname, "w") as fp:
             json.dump(
                 self.to_dict(),
@@ -226,6 +445,38 @@ class CalculatorParameters(AbstractBaseClass):
                 extra_obj_encoders=[quantity_encode],
             )
 
+    @classmethod
+    def from_binary(cls, fname: str):
+        """
+        Initialize an instance from a binary file written by to_binary.
+
+        :param fname: The filename (path) of the binary file.
+        :type  fname: str
+
+        """
+        from .BinaryCodec import decode
+
+        with numpy.load(fname, allow_pickle=False) as arrays:
+            collections = decode(arrays)
+        parameters = cls()
+        for parameter_list in collections.values():
+            parameters.add(parameter_list)
+
+        return parameters
+
+    def to_binary(self, fname: str):
+        """
+        Save this parameters class to a compact binary file, see BinaryCodec for the schema.
+
+        :param fname: Write to this file.
+        :type  fname: str
+
+        """
+        from .BinaryCodec import encode
+
+        with open(fname, "wb") as fp:
+            numpy.savez(fp, **encode({"": self}))
+
 
 class MasterParameter(Parameter):
     """
@@ -235,18 +486,52 @@ class MasterParameter(Parameter):
     master parameter should control parameters from.
     """
 
+    __slots__ = ("_MasterParameter__links",)
+
     def __init__(self, *args, **kwargs):
         """
         Create MasterParameter with uninitialized links
         """
-        self.links = None
+        self.__links = None
         super().__init__(*args, **kwargs)
 
+    def __copy__(self) -> "MasterParameter":
+        new = super().__copy__()
+        new.__links = self.__links
+        return new
+
+    @property
+    def links(self) -> Union[Mapping[str, Union[str, List[str]]], None]:
+        """
+        A read-only view of the links of this master parameter, set through add_links
+        """
+        return None if self.__links is None else MappingProxyType(self.__links)
+
+    @links.setter
+    def links(self, links):
+        self.add_links(links)
+
     def add_links(self, links):
         """
         Links is a dict with key being reference to calculator and name of parameter to overwrite
+
+        The key "Master" links to another master parameter, or to a list of master
+        parameters, which in turn propagate the value to their own links.
         """
-        self.links = links
+        self.__links = None if links is None else dict(links)
+        _record_structure_change()
+
+    def linked_masters(self) -> List[str]:
+        """
+        Returns the names of the master parameters this master parameter links to.
+        """
+        names = (self.__links or {}).get(MASTER_KEY, [])
+        return [names] if isinstance(names, str) else list(names)
+
+    def to_dict(self):
+        param_dict = {"links": copy.deepcopy(self.__links)}
+        param_dict.update(super().to_dict())
+        return param_dict
 
 
 class MasterParameters(CalculatorParameters):
@@ -266,20 +551,136 @@ class MasterParameters(CalculatorParameters):
         responsible.
         """
         self.parameters_dict = parameters_dict
+        # compiled propagation plan and the structure change count it was compiled at
+        self.__plan = None
+        self.__plan_count = None
+        # (collection key, parameter name, parameter) of the parameters each master
+        # parameter of the plan was resolved to, see __is_current
+        self.__sources = None
         super().__init__(*args, **kwargs)
 
     def __setitem__(self, key, value):
         """
         Set item that propagates change throughout all links
         """
-        master_parameter = self.parameters[key]
-
-        if master_parameter.links is not None:
-            for calculator in master_parameter.links:
-                calculator_par_name = master_parameter.links[calculator]
-                self.parameters_dict[calculator][calculator_par_name] = value
+        self.__propagate({key: value}, report=False)
 
-        self.parameters[key].value = value
+    def __resolve(self, key: str, path: List[str]) -> List[Tuple[str, Parameter]]:
+        """Returns the flattened targets of a master parameter, following chained masters"""
+        if key in path:
+            raise RuntimeError(
+                "Cyclic master parameter links: " + " -> ".join(path + [key])
+            )
+        if key in self.__plan and self.__is_current(key):
+            return self.__plan[key]
+
+        targets = []
+        master_parameter = self[key]
+        sources = [(MASTER_KEY, key, master_parameter)]
+        for calculator, name in (master_parameter.links or {}).items():
+            if calculator == MASTER_KEY:
+                for master_name in master_parameter.linked_masters():
+                    targets.extend(self.__resolve(master_name, path + [key]))
+                    targets.append((master_name, self[master_name]))
+                    sources.extend(self.__sources[master_name])
+            else:
+                parameter = self.parameters_dict[calculator][name]
+                targets.append((f"{calculator}/{name}", parameter))
+                sources.append((calculator, name, parameter))
+        self.__plan[key] = targets
+        self.__sources[key] = sources
+        return targets
+
+    def __is_current(self, key: str) -> bool:
+        """
+        Whether the parameters the master parameter was resolved to are still held by
+        their collections, which may have been replaced or edited directly
+        """
+        for calculator, name, parameter in self.__sources[key]:
+            if calculator == MASTER_KEY:
+                collection = self
+            else:
+                collection = self.parameters_dict.get(calculator)
+            if collection is None or collection.parameters.get(name) is not parameter:
+                return False
+        return True
+
+    def __targets(self, key: str) -> List[Tuple[str, Parameter]]:
+        """Returns the flattened targets of a master parameter from the cached plan"""
+        if self.__plan_count != _structure_changes:
+            self.__plan = {}
+            self.__sources = {}
+            self.__plan_count = _structure_changes
+        return self.__resolve(key, [])
+
+    def compile(self) -> Dict[str, List[Tuple[str, Parameter]]]:
+        """
+        Compiles the links of the master parameters into a flat propagation plan.
+
+        Links to other master parameters are followed, so that a master parameter
+        also drives the parameters linked to the masters it is linked to. The plan is
+        cached until parameters are added or deleted, or links are changed through
+        MasterParameter.links. The cached targets are also checked against the
+        collections, which may have been replaced or edited directly. Setting master
+        parameters compiles the plan of the masters being set as needed, calling this
+        method only validates all the links up front.
+
+        :return: a dict mapping the names of the master parameters to lists of
+                 (name, parameter) tuples of the parameters they drive, chained masters
+                 after the parameters they drive themselves
+        :raises RuntimeError: if the links of the master parameters form a cycle
+        :raises KeyError: if a linked parameter does not exist
+        """
+        return {key: self.__targets(key) for key in self.parameters}
+
+    def set_many(self, values: Mapping[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+        """
+        Sets the values of several master parameters and of the parameters they are
+        linked to at once, atomically.
+
+        The values are propagated in one pass over the compiled plan, and each driven
+        parameter is validated once, even when several of the given master parameters
+        drive it.
+
+        :param values: a mapping of master parameter names to their new values
+        :return: the change set, a dict mapping the names of the parameters whose value
+                 changed to (old value, new value) tuples. Linked parameters are named
+                 "`calculator name`/`parameter name`".
+        :raises ValueError: if a value is illegal, or two master parameters would set
+                 the same parameter to different values
+        """
+        return self.__propagate(values, report=True)
+
+    def __propagate(
+        self, values: Mapping[str, Any], report: bool
+    ) -> Union[Dict[str, Tuple[Any, Any]], None]:
+        """Assigns the values over the compiled plan, see set_many"""
+        profiler = Profiler.active
+        if profiler is not None:
+            with profiler.span("MasterParameters.propagate", "parameters"):
+                return self.__propagate_plan(values, report)
+        return self.__propagate_plan(values, report)
+
+    def __propagate_plan(
+        self, values: Mapping[str, Any], report: bool
+    ) -> Union[Dict[str, Tuple[Any, Any]], None]:
+        """Assigns the values over the compiled plan, see `__propagate`"""
+        assignments = []
+        assigned = {}
+        conflicts = []
+        for key, value in values.items():
+            master_parameter = self[key]
+            for name, parameter in self.__targets(key) + [(key, master_parameter)]:
+                if id(parameter) not in assigned:
+                    assigned[id(parameter)] = (key, value)
+                    assignments.append((name, parameter, value))
+                elif not _same_value(assigned[id(parameter)][1], value):
+                    conflicts.append(
+                        f"{name}: set by {assigned[id(parameter)][0]} and {key}"
+                    )
+        if conflicts:
+            raise ValueError("Conflicting parameter values:\n" + "\n".join(conflicts))
+        return _assign_atomically(assignments, report)
 
 
 class InstrumentParameters(AbstractBaseClass):
@@ -297,6 +698,9 @@ class InstrumentParameters(AbstractBaseClass):
         """
         self.parameters_dict = {}
         self.master = MasterParameters(self.parameters_dict)
+        # cached fingerprint and the fingerprints of the collections it was computed from
+        self.__fingerprint = None
+        self.__fingerprints = None
 
     @classmethod
     def from_json(cls, fname: str):
@@ -307,6 +711,20 @@ class InstrumentParameters(AbstractBaseClass):
         :type  fname: str
 
         """
+        profiler = Profiler.active
+        if profiler is not None:
+            with profiler.span(
+                f"{cls.__name__}.from_json", "json", filename=fname
+            ) as span:
+                span.bytes_read = file_size(fname)
+                return cls.__from_json(fname)
+        return cls.__from_json(fname)
+
+    @classmethod
+    def __from_json(cls, fname: str):
+        """Initialize an instance from a json file, see `from_json`"""
+        import json_tricks as json
+
         with open(fname, "r") as fp:
             instance = cls.from_dict(
                 json.load(fp, extra_obj_pairs_hooks=[quantity_decode])
@@ -329,16 +747,16 @@ class InstrumentParameters(AbstractBaseClass):
                 parameters.add(
                     key, CalculatorParameters.from_dict(instrument_dict[key])
                 )
-        if "Master" in instrument_dict.keys():
-            parameters.master = CalculatorParameters.from_dict(
-                instrument_dict["Master"]
+        if MASTER_KEY in instrument_dict.keys():
+            parameters.master.add(
+                list(CalculatorParameters.from_dict(instrument_dict[MASTER_KEY]))
             )
 
         return parameters
 
     def to_dict(self):
         params_collect = {}
-        params_collect["Master"] = self.master.to_dict()
+        params_collect[MASTER_KEY] = self.master.to_dict()
         for key in self.parameters_dict:
             params_collect[key] = self.parameters_dict[key].to_dict()
         return params_collect
@@ -351,6 +769,20 @@ class InstrumentParameters(AbstractBaseClass):
         :type  fname: str
 
         """
+        profiler = Profiler.active
+        if profiler is not None:
+            with profiler.span(
+                f"{type(self).__name__}.to_json", "json", filename=fname
+            ) as span:
+                self.__to_json(fname)
+                span.bytes_written = file_size(fname)
+        else:
+            self.__to_json(fname)
+
+    def __to_json(self, fname: str):
+        """Save this parameters class to a json file, see `to_json`"""
+        import json_tricks as json
+
         with open(fname, "w") as fp:
             json.dump(
                 self.to_dict(),
@@ -360,6 +792,46 @@ class InstrumentParameters(AbstractBaseClass):
                 extra_obj_encoders=[quantity_encode],
             )
 
+    @classmethod
+    def from_binary(cls, fname: str):
+        """
+        Initialize an instance from a binary file written by to_binary.
+
+        The master parameters are restored with their links.
+
+        :param fname: The filename (path) of the binary file.
+        :type  fname: str
+
+        """
+        from .BinaryCodec import decode
+
+        with numpy.load(fname, allow_pickle=False) as arrays:
+            collections = decode(arrays)
+        instrument = cls()
+        master = collections.pop(MASTER_KEY)
+        for key, parameter_list in collections.items():
+            parameters = CalculatorParameters()
+            parameters.add(parameter_list)
+            instrument.add(key, parameters)
+        instrument.master.add(master)
+
+        return instrument
+
+    def to_binary(self, fname: str):
+        """
+        Save this parameters class to a compact binary file, see BinaryCodec for the schema.
+
+        :param fname: Write to this file.
+        :type  fname: str
+
+        """
+        from .BinaryCodec import encode
+
+        collections = {MASTER_KEY: self.master}
+        collections.update(self.parameters_dict)
+        with open(fname, "wb") as fp:
+            numpy.savez(fp, **encode(collections))
+
     def add(self, key, parameters):
         """
         Here key could be a calculator object or a reference to such an object, like its name
@@ -370,22 +842,34 @@ class InstrumentParameters(AbstractBaseClass):
                 + " was provided with something else."
             )
 
+        if key == MASTER_KEY:
+            raise ValueError(
+                f"{MASTER_KEY} is reserved for the master parameters, it cannot name a "
+                "calculator."
+            )
         self.parameters_dict[key] = parameters
+        _record_structure_change()
 
     def add_master_parameter(self, name, links, **kwargs):
         """
         link: dict with keys and parameters for which this parameter should override
+
+        The key "Master" links to another master parameter, or to a list of master
+        parameters, which are then driven by this one.
         """
         master_parameter = MasterParameter(name, **kwargs)
         # Check the link keys correspond to keys in parameters_dict
         if not isinstance(links, dict):
             raise RuntimeError("links should be a dict")
 
+        master_parameter.add_links(links)
         for link_key in links:
-            if link_key not in self.parameters_dict:
+            if link_key != MASTER_KEY and link_key not in self.parameters_dict:
                 raise RuntimeError("A link had a key which was not recognized.")
+        for master_name in master_parameter.linked_masters():
+            if master_name not in self.master:
+                raise RuntimeError("A link had a master which was not recognized.")
 
-        master_parameter.add_links(links)
         self.master.add(master_parameter)
 
     def __getitem__(self, key):
@@ -399,6 +883,29 @@ class InstrumentParameters(AbstractBaseClass):
         Allows deletion of parameters of calculator with given name
         """
         del self.parameters_dict[key]
+        _record_structure_change()
+
+    def fingerprint(self) -> str:
+        """
+        Returns a hex digest identifying the master parameters and the parameters of
+        all the calculators, see CalculatorParameters.fingerprint.
+
+        The result is cached until the fingerprint of one of the collections changes,
+        or a collection of parameters is added or deleted.
+        """
+        fingerprints = [
+            self.master.fingerprint(),
+            {
+                key: parameters.fingerprint()
+                for key, parameters in self.parameters_dict.items()
+            },
+        ]
+        if fingerprints != self.__fingerprints:
+            hasher = hashlib.sha256()
+            update_hash(hasher, fingerprints)
+            self.__fingerprint = hasher.hexdigest()
+            self.__fingerprints = fingerprints
+        return self.__fingerprint
 
     def __repr__(self):
         """
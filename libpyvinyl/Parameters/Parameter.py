@@ -1,12 +1,21 @@
 # Created by Mads Bertelsen and modified by Juncheng E
 # Further modified by Shervin Nourbakhsh
 
+import copy
+import hashlib
 import math
+import numbers
+import operator
+import warnings
+import weakref
+from bisect import bisect_right
 import numpy
 from libpyvinyl.AbstractBaseClass import AbstractBaseClass
+from libpyvinyl.Fingerprint import update_hash
 
 from pint import Unit
 from pint import Quantity
+from pint.util import UnitsContainer
 import pint.errors
 
 # typing
@@ -15,6 +24,95 @@ from typing import Union, Any, Tuple, List, Dict, Optional
 # ValueTypes: TypeAlias = [str, bool, int, float, object, pint.Quantity]
 ValueTypes = Union[str, bool, int, float, pint.Quantity]
 
+# Conversion factors between two units, cached per (source unit, target unit) pair.
+# None is cached for units which are not related by a factor, e.g. degC and K.
+# The caches are keyed by the UnitsContainer of the units, which is much cheaper
+# to hash and compare than pint.Unit.
+_conversion_factors: Dict[Tuple[UnitsContainer, UnitsContainer], Union[float, None]] = (
+    {}
+)
+# Base units of each unit, cached.
+_base_units: Dict[UnitsContainer, Unit] = {}
+# String representation of each unit, cached as formatting units with pint is slow.
+_unit_names: Dict[UnitsContainer, str] = {}
+# Interned units, so that parameters declared with the same unit share one pint.Unit.
+_units_by_name: Dict[str, Unit] = {}
+_units_by_container: Dict[UnitsContainer, Unit] = {}
+# Shared, immutable placeholder for the intervals and options of unconstrained parameters.
+_NO_CONSTRAINTS: Tuple = ()
+
+
+def _convert_magnitude(magnitude: Any, source: Unit, target: Unit) -> Any:
+    """
+    Converts a magnitude, or an array of magnitudes, expressed in the source unit
+    into the target unit, using a cached conversion factor.
+
+    Raises a pint.errors.DimensionalityError if the units are not compatible.
+    """
+    if source is target:
+        return magnitude
+    key = (source._units, target._units)
+    try:
+        factor = _conversion_factors[key]
+    except KeyError:
+        factor = Quantity(1.0, source).m_as(target)
+        if Quantity(0.0, source).m_as(target) != 0.0:
+            factor = None
+        _conversion_factors[key] = factor
+    if factor is None:
+        return Quantity(magnitude, source).m_as(target)
+    if factor == 1:
+        return magnitude
+    return magnitude * factor
+
+
+def _intern_unit(unit: Union[str, Unit]) -> Unit:
+    """
+    Returns the shared pint.Unit equal to the given unit or unit string.
+
+    Raises a pint.errors.UndefinedUnitError if the string is not a valid unit.
+    """
+    if isinstance(unit, Unit):
+        return _units_by_container.setdefault(unit._units, unit)
+    try:
+        return _units_by_name[unit]
+    except KeyError:
+        parsed = Unit(unit)
+        interned = _units_by_container.setdefault(parsed._units, parsed)
+        _units_by_name[unit] = interned
+        return interned
+
+
+def _dimensionless() -> Unit:
+    """
+    Returns the dimensionless unit.
+
+    It is not created at import time, as the first unit loads the pint registry.
+    """
+    return _intern_unit("dimensionless")
+
+
+def _unit_name(unit: Union[str, Unit]) -> str:
+    """Returns the string representation of a unit"""
+    if not isinstance(unit, Unit):
+        return unit
+    try:
+        return _unit_names[unit._units]
+    except KeyError:
+        name = str(unit)
+        _unit_names[unit._units] = name
+        return name
+
+
+def _base_unit(unit: Unit) -> Unit:
+    """Returns the base units of the given unit"""
+    try:
+        return _base_units[unit._units]
+    except KeyError:
+        base = Quantity(1.0, unit).to_base_units().units
+        _base_units[unit._units] = base
+        return base
+
 
 class Parameter(AbstractBaseClass):
     """
@@ -27,6 +125,26 @@ class Parameter(AbstractBaseClass):
      - comment: a string with a brief description of the parameter and additional informations
     """
 
+    # Parameters are stored in slots rather than in an instance __dict__, as instruments
+    # can hold a very large number of them.
+    # The private slots are spelled with their mangled names, which dill expects when
+    # pickling the class by value.
+    __slots__ = (
+        "name",
+        "_Parameter__unit",
+        "comment",
+        "_Parameter__value",
+        "_Parameter__value_unit",
+        "_Parameter__intervals",
+        "_Parameter__intervals_are_legal",
+        "_Parameter__options",
+        "_Parameter__options_are_legal",
+        "_Parameter__value_type",
+        "_Parameter__constraints",
+        "_Parameter__fingerprint",
+        "_Parameter__owners",
+    )
+
     def __init__(
         self,
         name: str,
@@ -42,14 +160,24 @@ class Parameter(AbstractBaseClass):
 
         """
         self.name: str = name
-        self.__unit: Union[str, Unit] = Unit(unit) if unit != None else ""
+        self.__unit: Union[str, Unit] = _intern_unit(unit) if unit != None else ""
         self.comment: Union[str, None] = comment
+        # For quantities, only the magnitude is stored in __value and its unit in __value_unit.
+        # __value_unit is None if the value is not a quantity.
         self.__value: Union[ValueTypes, None] = None
-        self.__intervals: List[Tuple[Quantity, Quantity]] = []
+        self.__value_unit: Union[Unit, None] = None
+        # the lists of intervals and options are only created when the first one is added
+        self.__intervals: List[Tuple[Quantity, Quantity]] = _NO_CONSTRAINTS
         self.__intervals_are_legal: Union[bool, None] = None
-        self.__options: List = []
+        self.__options: List = _NO_CONSTRAINTS
         self.__options_are_legal: Union[bool, None] = None
         self.__value_type: Union[ValueTypes, None] = None
+        # compiled form of the intervals and options, see __compile_constraints
+        self.__constraints: Union[Dict, None] = None
+        # cached result of fingerprint
+        self.__fingerprint: Union[str, None] = None
+        # weak references to the collections holding this parameter, see _add_owner
+        self.__owners: Tuple = ()
 
     @classmethod
     def from_dict(cls, param_dict: Dict):
@@ -66,25 +194,82 @@ class Parameter(AbstractBaseClass):
             raise KeyError(
                 "name is a mandatory element of the dictionary, but has not been found"
             )
-        param = cls(
-            param_dict["name"], param_dict["_Parameter__unit"], param_dict["comment"]
-        )
-        for key in param_dict:
-            param.__dict__[key] = param_dict[key]
+        # the unit is set with the other attributes, as it may not be a valid pint unit
+        param = cls(param_dict["name"], comment=param_dict["comment"])
+        for key, value in param_dict.items():
+            try:
+                setattr(param, key, value)
+            except AttributeError:
+                # e.g. a field written by another version of libpyvinyl
+                warnings.warn(
+                    f"{key} is not an attribute of {cls.__name__}, it is ignored"
+                )
+
+        # the unit is stored as a string in json
+        if isinstance(param.__unit, str) and param.__unit != "":
+            param.unit = param.__unit
+        elif isinstance(param.__unit, Unit):
+            param.__unit = _intern_unit(param.__unit)
+        if isinstance(param.__value, Quantity):
+            param.__value_unit = _intern_unit(param.__value.units)
+            param.__value = param.__value.magnitude
+        if len(param.__intervals) == 0:
+            param.__intervals = _NO_CONSTRAINTS
+        if len(param.__options) == 0:
+            param.__options = _NO_CONSTRAINTS
 
         # set the value type, making the necessary promotions
         param.__set_value_type(param.value)
+        if param.__value_type == Quantity and param.__value_unit is None:
+            param.__value_unit = param.__pint_unit()
         for interval in param.__intervals:
             param.__set_value_type(interval[0])
             param.__set_value_type(interval[1])
         for option in param.__options:
             param.__set_value_type(option)
+        param.__constraints = None
         return param
 
+    def __copy__(self) -> "Parameter":
+        """
+        Returns a copy of this parameter, e.g. for a cloned collection. The lists
+        of intervals and options are copied, the values are shared as they are replaced
+        rather than modified by the parameter.
+        """
+        new = object.__new__(type(self))
+        for slot, value in zip(Parameter.__slots__, _get_slots(self)):
+            setattr(new, slot, value)
+        if new.__intervals is not _NO_CONSTRAINTS:
+            new.__intervals = list(new.__intervals)
+        if new.__options is not _NO_CONSTRAINTS:
+            new.__options = list(new.__options)
+        # the copy does not belong to the collections of this parameter
+        new.__owners = ()
+        attributes = getattr(self, "__dict__", None)
+        if attributes:
+            new.__dict__.update(copy.deepcopy(attributes))
+        return new
+
+    def to_dict(self) -> Dict:
+        """
+        Returns a dictionary describing this parameter, from which it can be recreated
+        with from_dict. The value is returned as a pint.Quantity if it is one.
+        """
+        return {
+            "name": self.name,
+            "_Parameter__unit": self.__unit,
+            "comment": self.comment,
+            "_Parameter__value": copy.deepcopy(self.value_no_conversion),
+            "_Parameter__intervals": copy.deepcopy(list(self.__intervals)),
+            "_Parameter__intervals_are_legal": self.__intervals_are_legal,
+            "_Parameter__options": copy.deepcopy(list(self.__options)),
+            "_Parameter__options_are_legal": self.__options_are_legal,
+        }
+
     @property
     def unit(self) -> str:
         """Returning the units as a string"""
-        return str(self.__unit)
+        return _unit_name(self.__unit)
 
     @unit.setter
     def unit(self, uni: str) -> None:
@@ -97,33 +282,43 @@ class Parameter(AbstractBaseClass):
         It is stored as a string otherwise.
         """
         try:
-            self.__unit = Unit(uni)
+            self.__unit = _intern_unit(uni)
         except pint.errors.UndefinedUnitError:
             self.__unit = uni
+        self.__changed()
+
+    def __pint_unit(self) -> Union[Unit, None]:
+        """Returns the unit as a pint.Unit, None if it is not a valid unit"""
+        if isinstance(self.__unit, Unit):
+            return self.__unit
+        if self.__unit == "":
+            return _dimensionless()
+        return None
 
     @property
     def value_no_conversion(self) -> ValueTypes:
         """
-        Returning the object stored in value with no conversions
+        Returning the value with no unit conversion, as a pint.Quantity if it is one
         """
-        return self.__value
+        if self.__value_unit is None:
+            return self.__value
+        return Quantity(self.__value, self.__value_unit)
 
     @property
     def pint_value(self) -> Quantity:
         """Returning the value as a pint object if available, an error otherwise"""
-        if not isinstance(self.__value, Quantity):
+        if self.__value_unit is None:
             raise TypeError("The parameter value is not of pint.Quantity type")
-        return self.__value
+        return Quantity(self.__value, self.__value_unit)
 
     @property
     def value(self) -> ValueTypes:
         """
         Returns the magnitude of a Quantity or the stored value otherwise
         """
-        if isinstance(self.__value, Quantity):
-            return self.__value.m_as(self.__unit)
-        else:
+        if self.__value_unit is None or self.__value_unit is self.__unit:
             return self.__value
+        return _convert_magnitude(self.__value, self.__value_unit, self.__pint_unit())
 
     @staticmethod
     def __is_type_compatible(t1: type, t2: Union[None, type]) -> bool:
@@ -152,9 +347,9 @@ class Parameter(AbstractBaseClass):
         if t2 == float or t2 == int or t2 == numpy.float64:
             t2 = Quantity
 
-        if "quantity" in str(t1):
+        if "quantity" in str(t1) or (isinstance(t1, type) and issubclass(t1, Quantity)):
             t1 = Quantity
-        if "quantity" in str(t2):
+        if "quantity" in str(t2) or (isinstance(t2, type) and issubclass(t2, Quantity)):
             t2 = Quantity
 
         if t1 == t2:
@@ -183,7 +378,9 @@ class Parameter(AbstractBaseClass):
 
         It will raise an exception if the type is not coherent to what previously is declared.
         """
-        if (
+        if isinstance(value, numpy.ndarray) and value.dtype.kind in "fiub":
+            value = {"f": 0.0, "i": 0, "u": 0, "b": False}[value.dtype.kind]
+        elif (
             hasattr(value, "__iter__")
             and not isinstance(value, str)
             and not isinstance(value, Quantity)
@@ -196,6 +393,9 @@ class Parameter(AbstractBaseClass):
         # if value is a float, than can be used as a quantity -> promotion
         elif isinstance(value, float):
             self.__value_type = Quantity
+        # quantities of the registry classes, e.g. created with libpyvinyl.Q_
+        elif isinstance(value, Quantity):
+            self.__value_type = Quantity
         else:  # cannot be treated as a quantity
             self.__value_type = type(value)
 
@@ -213,14 +413,18 @@ class Parameter(AbstractBaseClass):
         v = value
         # First case: value is a list, it might be good to double check
         # that all the members are of the same type
-        if isinstance(value, list):
+        if isinstance(value, numpy.ndarray) and value.dtype.kind in "fiub":
+            # numpy arrays are homogeneous, only the type of the elements is checked
+            vtype = {"f": float, "i": int, "u": int, "b": bool}[value.dtype.kind]
+        elif isinstance(value, (list, numpy.ndarray)):
             vtype = type(value[0])
-            for v in value:
-                if not self.__is_type_compatible(vtype, type(v)):
+            # check each distinct type of the members only once
+            for t in set(map(type, value)):
+                if not self.__is_type_compatible(vtype, t):
                     raise TypeError(
                         "Iterable object passed as value for the parameter, but it is made of inhomogeneous types: ",
                         vtype,
-                        type(v),
+                        t,
                     )
         elif isinstance(value, dict):
             raise NotImplementedError("Dictionaries are not accepted")
@@ -243,21 +447,35 @@ class Parameter(AbstractBaseClass):
         :type value: str | boolean | int | float | object | pint.Quantity
         If value is a float, it is internally converted to a pint.Quantity
         """
-        if (
-            self.__unit is not None
-            and isinstance(value, pint.Quantity)
-            and value.check(self.__unit) is False
-        ):
-            raise pint.errors.DimensionalityError(value.units, self.__unit)
+        unit = self.__pint_unit()
+        if isinstance(value, Quantity):
+            if unit is None:
+                magnitude, magnitude_unit = value.magnitude, value.units
+            else:
+                # raises a DimensionalityError if the units are not compatible
+                magnitude = _convert_magnitude(value.magnitude, value.units, unit)
+                magnitude_unit = unit
+        else:
+            magnitude, magnitude_unit = value, unit
 
         self.__check_compatibility(value)
         self.__set_value_type(value)
-        value = self.__to_quantity(value)
-        if self.is_legal(value):
-            self.__value = value
-        else:
+        if not self.is_legal(value):
             raise ValueError("Value of parameter '" + self.name + "' illegal.")
 
+        if self.__value_type == Quantity:
+            if magnitude_unit is None:
+                # the unit of this parameter is not valid, the conversion raises an error
+                self.__to_quantity(value)
+            if isinstance(magnitude, list):
+                magnitude = numpy.asarray(magnitude)
+            self.__value = magnitude
+            self.__value_unit = magnitude_unit
+        else:
+            self.__value = value
+            self.__value_unit = None
+        self.__changed()
+
     def add_interval(
         self,
         min_value: Union[ValueTypes, None],
@@ -301,13 +519,17 @@ class Parameter(AbstractBaseClass):
                 # should it throw an expection?
                 raise ValueError("Parameter", "interval", "multiple validities")
 
+        if self.__intervals is _NO_CONSTRAINTS:
+            self.__intervals = []
         self.__intervals.append(
             (self.__to_quantity(min_value), self.__to_quantity(max_value))
         )
+        self.__constraints = None
+        self.__changed()
 
         # if the interval has been added after assignement of the value of the parameter,
         # the latter should be checked
-        if not self.value_no_conversion is None:
+        if self.__value is not None:
             if self.is_legal(self.value) is False:
                 raise ValueError(
                     "Value "
@@ -337,15 +559,19 @@ class Parameter(AbstractBaseClass):
         self.__check_compatibility(option)
         self.__set_value_type(option)  # it could have been max_value
 
+        if self.__options is _NO_CONSTRAINTS:
+            self.__options = []
         if isinstance(option, list):
             for op in option:
                 self.__options.append(self.__to_quantity(op))
         else:
             self.__options.append(self.__to_quantity(option))
+        self.__constraints = None
+        self.__changed()
 
         # if the option has been added after assignement of the value of the parameter,
         # the latter should be checked
-        if not self.value_no_conversion is None:
+        if self.__value is not None:
             if self.is_legal(self.value) is False:
                 raise ValueError(
                     "Value "
@@ -354,17 +580,353 @@ class Parameter(AbstractBaseClass):
                 )
 
     def get_options(self):
+        if self.__options is _NO_CONSTRAINTS:
+            return []
         return self.__options
 
     def get_options_are_legal(self):
         return self.__options_are_legal
 
     def get_intervals(self):
+        if self.__intervals is _NO_CONSTRAINTS:
+            return []
         return self.__intervals
 
     def get_intervals_are_legal(self):
         return self.__intervals_are_legal
 
+    def _snapshot(self) -> Tuple:
+        """
+        Returns the internal state of this parameter, to be restored with _restore.
+        Used by the collections to roll back a failed batch of assignments.
+        """
+        return _get_slots(self)
+
+    def _value_state(self) -> Tuple[Any, Union[Unit, None]]:
+        """
+        Returns the stored magnitude and unit of the value, see value_no_conversion.
+        Used by the collections to detect changes without creating quantities.
+        """
+        return self.__value, self.__value_unit
+
+    def _restore(self, snapshot: Tuple) -> None:
+        """Restores the internal state returned by _snapshot"""
+        for slot, value in zip(Parameter.__slots__, snapshot):
+            setattr(self, slot, value)
+        # the restored fingerprint is valid, but the collections have to recompute theirs
+        self.__notify_owners()
+
+    def __getstate__(self) -> Tuple[Union[Dict, None], Dict[str, Any]]:
+        """Returns the state of the slots, without the references to the collections"""
+        slots = {}
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(self, slot):
+                    slots[slot] = getattr(self, slot)
+        slots["_Parameter__owners"] = ()
+        return getattr(self, "__dict__", None) or None, slots
+
+    def _add_owner(self, owner) -> None:
+        """
+        Registers a collection holding this parameter. Its _changed method is called
+        whenever the value, unit or constraints of this parameter change.
+        """
+        self._remove_owner(owner)
+        self.__owners += (weakref.ref(owner),)
+
+    def _remove_owner(self, owner) -> None:
+        """Unregisters a collection which no longer holds this parameter"""
+        self.__owners = tuple(
+            ref for ref in self.__owners if ref() is not None and ref() is not owner
+        )
+
+    def __notify_owners(self) -> None:
+        """Invalidates the cached fingerprints of the collections of this parameter"""
+        for ref in self.__owners:
+            owner = ref()
+            if owner is not None:
+                owner._changed()
+
+    def __changed(self) -> None:
+        """Invalidates the fingerprint after a change of the value, unit or constraints"""
+        self.__fingerprint = None
+        self.__notify_owners()
+
+    @staticmethod
+    def __canonical(value: Any, unit: Union[Unit, None] = None) -> Any:
+        """
+        Returns the value with quantities expressed as magnitudes in base units.
+        Real magnitudes are converted to floats, such that 1 m and 1.0 m are equal.
+
+        :param unit: the unit of value if it is the magnitude of a quantity
+        """
+        if isinstance(value, Quantity):
+            value, unit = value.magnitude, value.units
+        if unit is None:
+            return value
+        base = _base_unit(unit)
+        magnitude = _convert_magnitude(value, unit, base)
+        if isinstance(magnitude, numbers.Real) and not isinstance(magnitude, bool):
+            magnitude = float(magnitude)
+        elif isinstance(magnitude, numpy.ndarray) and magnitude.dtype.kind in "biuf":
+            magnitude = magnitude.astype(numpy.float64)
+        return ("quantity", magnitude, _unit_name(base))
+
+    def fingerprint(self) -> str:
+        """
+        Returns a hex digest identifying the unit, value and constraints of this parameter.
+
+        Quantities are hashed as magnitudes in base units, such that assigning 1 m or
+        100 cm to the parameter gives the same fingerprint. The name and the comment are
+        not part of the fingerprint. The result is cached until the parameter changes.
+        """
+        if self.__fingerprint is None:
+            hasher = hashlib.sha256()
+            update_hash(
+                hasher,
+                [
+                    _unit_name(self.__unit),
+                    self.__canonical(self.__value, self.__value_unit),
+                    [
+                        (self.__canonical(low), self.__canonical(high))
+                        for low, high in self.__intervals
+                    ],
+                    self.__intervals_are_legal,
+                    [self.__canonical(option) for option in self.__options],
+                    self.__options_are_legal,
+                ],
+            )
+            self.__fingerprint = hasher.hexdigest()
+        return self.__fingerprint
+
+    @staticmethod
+    def __option_key(value: Any, number_unit: Union[Unit, None] = None) -> Tuple:
+        """
+        Returns a hashable key of the value such that two values have the same key
+        if they are equal. Numbers are normalised to base units.
+
+        :param number_unit: the unit of value if it is a plain number, None if it has no unit.
+        """
+        if isinstance(value, Quantity):
+            magnitude, unit = value.magnitude, value.units
+        elif isinstance(value, numbers.Number) and not isinstance(value, bool):
+            if number_unit is None:
+                return ("number", value, _dimensionless())
+            magnitude, unit = value, number_unit
+        else:
+            hash(value)
+            return ("object", type(value), value)
+        base = _base_unit(unit)
+        return ("number", _convert_magnitude(magnitude, unit, base), base)
+
+    @staticmethod
+    def __interval_magnitude(
+        value: Any, unit: Unit, number_unit: Union[Unit, None] = None
+    ) -> Union[float, None]:
+        """
+        Returns the magnitude of value in the given unit, None if value is not a number
+        or if it can only be compared to the interval boundaries through pint.
+
+        :param number_unit: the unit of value if it is a plain number, None if it has no unit.
+        """
+        if isinstance(value, Quantity):
+            return _convert_magnitude(value.magnitude, value.units, unit)
+        if isinstance(value, numbers.Number) and not isinstance(value, bool):
+            if number_unit is not None:
+                return _convert_magnitude(value, number_unit, unit)
+            if unit == _dimensionless():
+                return value
+        return None
+
+    def __compile_constraints(self) -> Dict:
+        """
+        Compiles the intervals into a sorted table of disjoint intervals and the options
+        into a hashed set.
+
+        Either of them is None if the values cannot be compiled, e.g. non-hashable
+        options or intervals of non-numerical values. The linear scan is used in that case.
+        """
+        options = set()
+        try:
+            for option in self.__options:
+                options.add(self.__option_key(option))
+        except TypeError:
+            options = None
+
+        unit = _dimensionless()
+        for value in [interval[0] for interval in self.__intervals] + list(
+            self.__options
+        ):
+            if isinstance(value, Quantity):
+                unit = _base_unit(value.units)
+                break
+
+        # magnitudes of the numerical options, used to validate arrays of values
+        option_magnitudes = []
+        for option in self.__options:
+            try:
+                magnitude = self.__interval_magnitude(option, unit)
+            except pint.errors.DimensionalityError:
+                continue
+            if magnitude is not None:
+                option_magnitudes.append(magnitude)
+        option_magnitudes = numpy.array(option_magnitudes, dtype=float)
+
+        intervals = []
+        try:
+            for interval in self.__intervals:
+                low = self.__interval_magnitude(interval[0], unit)
+                high = self.__interval_magnitude(interval[1], unit)
+                if low is None or high is None:
+                    raise TypeError("Interval boundaries are not numbers")
+                intervals.append((low, high))
+        except (TypeError, pint.errors.DimensionalityError):
+            return {
+                "options": options,
+                "option_magnitudes": option_magnitudes,
+                "unit": unit,
+                "starts": None,
+                "ends": None,
+            }
+
+        # merge the closed intervals, so that they can be searched by bisection
+        starts, ends = [], []
+        for low, high in sorted(
+            interval for interval in intervals if interval[0] <= interval[1]
+        ):
+            if len(ends) > 0 and low <= ends[-1]:
+                ends[-1] = max(ends[-1], high)
+            else:
+                starts.append(low)
+                ends.append(high)
+
+        return {
+            "options": options,
+            "option_magnitudes": option_magnitudes,
+            "unit": unit,
+            "starts": starts,
+            "ends": ends,
+        }
+
+    def __number_unit(self) -> Union[Unit, None]:
+        """Returns the unit of the plain numbers given as values, None if they have no unit"""
+        if self.__value_type == Quantity:
+            return self.__pint_unit()
+        return None
+
+    def __in_options(self, value: Any, constraints: Dict) -> bool:
+        """Returns True if value is one of the options"""
+        if len(self.__options) == 0:
+            return False
+        if constraints["options"] is not None:
+            try:
+                key = self.__option_key(value, self.__number_unit())
+                return key in constraints["options"]
+            except TypeError:
+                pass
+        value = self.__to_quantity(value)
+        for option in self.__options:
+            if option == value:
+                return True
+        return False
+
+    def __in_intervals(self, value: Any, constraints: Dict) -> bool:
+        """Returns True if value is in one of the intervals"""
+        if len(self.__intervals) == 0:
+            return False
+        if constraints["starts"] is not None:
+            magnitude = self.__interval_magnitude(
+                value, constraints["unit"], self.__number_unit()
+            )
+            if magnitude is not None:
+                if magnitude != magnitude:  # NaN is in no interval
+                    return False
+                i = bisect_right(constraints["starts"], magnitude) - 1
+                return i >= 0 and magnitude <= constraints["ends"][i]
+        value = self.__to_quantity(value)
+        for interval in self.__intervals:
+            if interval[0] <= value <= interval[1]:
+                return True
+        return False
+
+    @staticmethod
+    def __numeric_array(values: Any) -> Union[numpy.ndarray, Quantity, None]:
+        """
+        Returns values as a numerical numpy array, or as a Quantity wrapping one,
+        if they can be validated at once. None is returned otherwise.
+        """
+        if isinstance(values, Quantity):
+            magnitude = values.magnitude
+            if isinstance(magnitude, numpy.ndarray) and magnitude.dtype.kind in "fiu":
+                return values
+            return None
+        if isinstance(values, numpy.ndarray):
+            return values if values.dtype.kind in "fiu" else None
+        if isinstance(values, list) and len(values) > 0:
+            if set(map(type, values)) <= {int, float, numpy.float64}:
+                return numpy.asarray(values)
+        return None
+
+    def __is_legal_array(
+        self, values: Union[numpy.ndarray, Quantity]
+    ) -> Union[bool, None]:
+        """
+        Vectorized version of is_legal for numerical arrays.
+
+        All the values are checked with the same type and unit, and the constraints are
+        evaluated with numpy comparisons on the array of magnitudes.
+        None is returned if the constraints cannot be evaluated this way.
+        """
+        if isinstance(values, Quantity):
+            vtype = Quantity
+            magnitudes = values.magnitude
+        else:
+            vtype = float if values.dtype.kind == "f" else int
+            magnitudes = values
+
+        if self.__is_type_compatible(vtype, self.__value_type) is False:
+            return False
+
+        if len(self.__options) == 0 and len(self.__intervals) == 0:
+            return True
+
+        if self.__constraints is None:
+            self.__constraints = self.__compile_constraints()
+        constraints = self.__constraints
+        if constraints["starts"] is None:
+            return None
+
+        unit = constraints["unit"]
+        try:
+            number_unit = self.__number_unit()
+            if isinstance(values, Quantity):
+                magnitudes = _convert_magnitude(magnitudes, values.units, unit)
+            elif number_unit is not None:
+                magnitudes = _convert_magnitude(magnitudes, number_unit, unit)
+            elif unit != _dimensionless():
+                return None
+        except pint.errors.DimensionalityError:
+            if len(self.__intervals) > 0:
+                raise
+            # values of a different dimension are never equal to an option
+            return not self.__options_are_legal
+
+        if len(self.__intervals) > 0:
+            legal = numpy.full(magnitudes.shape, not self.__intervals_are_legal)
+            if len(constraints["starts"]) > 0:
+                i = numpy.searchsorted(constraints["starts"], magnitudes, "right") - 1
+                ends = numpy.asarray(constraints["ends"])
+                in_intervals = (i >= 0) & (magnitudes <= ends[numpy.maximum(i, 0)])
+                legal[in_intervals] = self.__intervals_are_legal
+        else:
+            legal = numpy.full(magnitudes.shape, not self.__options_are_legal)
+
+        if len(self.__options) > 0:
+            in_options = numpy.isin(magnitudes, constraints["option_magnitudes"])
+            legal[in_options] = self.__options_are_legal
+
+        return bool(legal.all())
+
     def is_legal(self, values: Union[ValueTypes, None] = None) -> bool:
         """
         Checks whether or not given or contained value is legal given constraints.
@@ -372,7 +934,16 @@ class Parameter(AbstractBaseClass):
         """
 
         if values is None:
-            values = self.__value
+            values = self.value_no_conversion
+
+        array = self.__numeric_array(values)
+        if array is not None:
+            legal = self.__is_legal_array(array)
+            if legal is not None:
+                return legal
+            if isinstance(values, Quantity):
+                # validate the elements one by one
+                return all(self.is_legal(value) for value in values)
 
         if (
             not hasattr(values, "__iter__")
@@ -385,21 +956,26 @@ class Parameter(AbstractBaseClass):
             if self.__is_type_compatible(type(values), self.__value_type) is False:
                 return False
 
-            value = self.__to_quantity(values)
+            if self.__value_type == Quantity and self.__pint_unit() is None:
+                # the unit of this parameter is not valid, the conversion raises an error
+                self.__to_quantity(values)
+            value = values
 
             # obvious, if no conditions are defined, the value is always legal
             if len(self.__options) == 0 and len(self.__intervals) == 0:
                 return True
 
+            if self.__constraints is None:
+                self.__constraints = self.__compile_constraints()
+            constraints = self.__constraints
+
             # first check if the value is in any defined discrete value
-            for option in self.__options:
-                if option == value:
-                    return self.__options_are_legal
+            if self.__in_options(value, constraints):
+                return self.__options_are_legal
 
             # secondly check if it is in any defined interval
-            for interval in self.__intervals:
-                if interval[0] <= value <= interval[1]:
-                    return self.__intervals_are_legal
+            if self.__in_intervals(value, constraints):
+                return self.__intervals_are_legal
 
             # at this point the value has not been found in any interval
             # if intervals where defined and were forbidden intervals, the value should be accepted
@@ -432,13 +1008,17 @@ class Parameter(AbstractBaseClass):
         """
         Clear the intervals of this parameter.
         """
-        self.__intervals = []
+        self.__intervals = _NO_CONSTRAINTS
+        self.__constraints = None
+        self.__changed()
 
     def clear_options(self) -> None:
         """
         Clear the option values of this parameter.
         """
-        self.__options = []
+        self.__options = _NO_CONSTRAINTS
+        self.__constraints = None
+        self.__changed()
 
     def print_line(self) -> str:
         """
@@ -506,3 +1086,7 @@ class Parameter(AbstractBaseClass):
             string += "    " + str(option) + "\n"
 
         return string
+
+
+# reads all the slots of a parameter at once, see Parameter._snapshot
+_get_slots = operator.attrgetter(*Parameter.__slots__)
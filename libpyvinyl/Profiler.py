@@ -0,0 +1,294 @@
+"""
+:module Profiler: Module hosting the Profiler class, the opt-in instrumentation of the
+calculators, the data objects, the format classes and the parameters.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+# The innermost open span of the current thread or asyncio task
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "libpyvinyl_span", default=None
+)
+
+
+def file_size(filename: str) -> Optional[int]:
+    """Return the size of a file in bytes, None if it is not a file."""
+    try:
+        return os.stat(filename).st_size if os.path.isfile(filename) else None
+    except OSError:
+        return None
+
+
+class Span:
+    """
+    A timed operation recorded by a `Profiler`, see `Profiler.span`.
+
+    The bytes read and written are set by the instrumented code, e.g. the size of the
+    file read by a format class.
+    """
+
+    __slots__ = (
+        "name",
+        "category",
+        "args",
+        "parent",
+        "thread",
+        "start_ns",
+        "wall_ns",
+        "cpu_ns",
+        "child_ns",
+        "bytes_read",
+        "bytes_written",
+        "peak_memory",
+        "error",
+        "_profiler",
+        "_token",
+        "_cpu_start",
+        "_memory_start",
+    )
+
+    def __init__(self, profiler: "Profiler", name: str, category: str, args: dict):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.parent: Optional[Span] = None
+        self.thread = 0
+        self.start_ns = 0
+        self.wall_ns = 0
+        self.cpu_ns = 0
+        # the wall time of the child spans of the same thread
+        self.child_ns = 0
+        self.bytes_read: Optional[int] = None
+        self.bytes_written: Optional[int] = None
+        # the peak of the traced memory at the end of the span minus the traced memory
+        # at its start, if traced
+        self.peak_memory: Optional[int] = None
+        self.error: Optional[str] = None
+        self._profiler = profiler
+
+    @property
+    def self_ns(self) -> int:
+        """The wall time not spent in the child spans of the same thread."""
+        return max(self.wall_ns - self.child_ns, 0)
+
+    def __enter__(self) -> "Span":
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self)
+        self.thread = threading.get_ident()
+        if self._profiler.memory:
+            self._memory_start = tracemalloc.get_traced_memory()[0]
+        self._cpu_start = time.thread_time_ns()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.wall_ns = time.perf_counter_ns() - self.start_ns
+        self.cpu_ns = time.thread_time_ns() - self._cpu_start
+        if self._profiler.memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1] - self._memory_start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        parent = self.parent
+        if parent is not None:
+            if parent.thread == self.thread:
+                parent.child_ns += self.wall_ns
+        self._profiler._record(self)
+
+
+class Profiler:
+    """
+    Opt-in profiler of the calculators, the data objects, the format classes and the
+    parameters.
+
+    While a profiler is active, the following operations are recorded as `Span`s, with
+    their wall and CPU time, the bytes read and written and, with `memory=True`, the
+    peak memory they allocated:
+
+     - ``instrument``: `Instrument.run` and `Instrument.arun`
+     - ``calculator``: the backengines of the calculators run by an instrument
+     - ``data``: `BaseData.get_data`
+     - ``format``: the reads, writes and conversions of the format classes
+     - ``parameters``: the propagation of the master parameters
+     - ``json``: the JSON I/O of the parameters
+
+    The spans nest in the thread or asyncio task they run in, and the spans of the
+    calculators run on a thread pool are children of the run of the instrument. When
+    no profiler is active, the instrumented code only checks `Profiler.active`.
+    Example::
+
+        with Profiler() as profiler:
+            instrument.run()
+        profiler.write_chrome_trace("trace.json")
+        print(profiler.summary())
+
+    The trace can be opened with https://ui.perfetto.dev or chrome://tracing.
+
+    The memory is traced with tracemalloc, which slows the profiled code down. The
+    peak memory of a span is the peak of the traced memory at its end minus the traced
+    memory at its start. The peak is not reset, as the spans nest and may run at the
+    same time: a span which allocates less than an earlier one reports the earlier peak
+    as an upper bound, and the peaks cover all threads.
+    """
+
+    # The active profiler, checked by the instrumented code
+    active: Optional["Profiler"] = None
+
+    def __init__(self, memory: bool = False):
+        """
+        :param memory: Trace the peak memory of the spans with tracemalloc.
+        """
+        self.memory = memory
+        self.__spans: List[Span] = []
+        self.__start_ns: Optional[int] = None
+        self.__started_tracemalloc = False
+
+    @property
+    def spans(self) -> List[Span]:
+        """The recorded spans, in the order they ended."""
+        return list(self.__spans)
+
+    def start(self) -> None:
+        """Activate this profiler."""
+        if Profiler.active is not None:
+            raise RuntimeError("Profiler: another profiler is already active")
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracemalloc = True
+        if self.__start_ns is None:
+            self.__start_ns = time.perf_counter_ns()
+        Profiler.active = self
+
+    def stop(self) -> None:
+        """Deactivate this profiler. The recorded spans are kept."""
+        if Profiler.active is self:
+            Profiler.active = None
+        if self.__started_tracemalloc:
+            tracemalloc.stop()
+            self.__started_tracemalloc = False
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def span(self, name: str, category: str, **args) -> Span:
+        """Return a span to record an operation with, as a context manager::
+
+            profiler = Profiler.active
+            if profiler is not None:
+                with profiler.span("MyFormat.read", "format", filename=filename) as span:
+                    ...
+                    span.bytes_read = os.path.getsize(filename)
+
+        :param name: The name of the operation.
+        :param category: The category of the operation.
+        :param args: The arguments shown in the trace, which are converted to str.
+        """
+        return Span(self, name, category, args)
+
+    def _record(self, span: Span) -> None:
+        """Record an ended span"""
+        self.__spans.append(span)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Return the spans in the Chrome trace event format, which Perfetto reads."""
+        pid = os.getpid()
+        start_ns = self.__start_ns or 0
+        threads = {thread.ident: thread.name for thread in threading.enumerate()}
+        events = []
+        for ident in sorted({span.thread for span in self.__spans}):
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": ident,
+                    "args": {"name": threads.get(ident, f"Thread {ident}")},
+                }
+            )
+        for span in self.__spans:
+            args = {key: str(value) for key, value in span.args.items()}
+            args["cpu_ms"] = span.cpu_ns / 1e6
+            for key in ["bytes_read", "bytes_written", "peak_memory", "error"]:
+                if getattr(span, key) is not None:
+                    args[key] = getattr(span, key)
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": (span.start_ns - start_ns) / 1e3,
+                    "dur": span.wall_ns / 1e3,
+                    "pid": pid,
+                    "tid": span.thread,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, filename: str) -> None:
+        """Write the spans in the Chrome trace event format, see `chrome_trace`.
+
+        :param filename: The filename of the JSON file.
+        """
+        with open(filename, "w") as fp:
+            json.dump(self.chrome_trace(), fp)
+
+    def summary(self) -> str:
+        """Return a table of the spans aggregated by name, the longest first.
+
+        The self time of a span excludes its child spans of the same thread, and the
+        peak memory is the largest of the spans.
+        """
+        rows: Dict[tuple, dict] = {}
+        for span in self.__spans:
+            row = rows.setdefault(
+                (span.name, span.category),
+                {
+                    "calls": 0,
+                    "wall": 0,
+                    "self": 0,
+                    "cpu": 0,
+                    "read": 0,
+                    "written": 0,
+                    "peak": None,
+                },
+            )
+            row["calls"] += 1
+            row["wall"] += span.wall_ns
+            row["self"] += span.self_ns
+            row["cpu"] += span.cpu_ns
+            row["read"] += span.bytes_read or 0
+            row["written"] += span.bytes_written or 0
+            if span.peak_memory is not None:
+                peak = row["peak"]
+                row["peak"] = max(
+                    span.peak_memory, span.peak_memory if peak is None else peak
+                )
+
+        name_width = max([len(name) for name, _ in rows] + [4])
+        string = (
+            f"{'name':<{name_width}} {'category':<10} {'calls':>6} {'wall ms':>10} "
+            f"{'self ms':>10} {'cpu ms':>10} {'read MiB':>9} {'written MiB':>11} "
+            f"{'peak MiB':>9}\n"
+        )
+        for (name, category), row in sorted(
+            rows.items(), key=lambda item: -item[1]["wall"]
+        ):
+            peak = "" if row["peak"] is None else f"{row['peak'] / 2**20:.2f}"
+            string += (
+                f"{name:<{name_width}} {category:<10} {row['calls']:>6} "
+                f"{row['wall'] / 1e6:>10.3f} {row['self'] / 1e6:>10.3f} "
+                f"{row['cpu'] / 1e6:>10.3f} {row['read'] / 2**20:>9.2f} "
+                f"{row['written'] / 2**20:>11.2f} {peak:>9}\n"
+            )
+        return string
@@ -10,8 +10,19 @@ from .BaseData import BaseData
 from .Parameters.Parameter import Parameter
 from .Instrument import Instrument
 
-# 3rd party imports
-from pint import UnitRegistry
 
-ureg = UnitRegistry()
-Q_ = ureg.Quantity
+def __getattr__(name):
+    """
+    Creates the unit registry on first access.
+
+    `ureg` is the pint application registry, i.e. the registry Parameter uses for its
+    units, so that quantities created with `Q_` can be assigned to parameters.
+    Loading the unit definitions is slow, so it is deferred until the first unit is used.
+    """
+    if name == "ureg":
+        from pint import get_application_registry
+
+        return get_application_registry()
+    if name == "Q_":
+        return __getattr__("ureg").Quantity
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
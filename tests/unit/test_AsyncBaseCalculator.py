@@ -0,0 +1,209 @@
+import asyncio
+import subprocess
+import sys
+import time
+
+import pytest
+
+from libpyvinyl.AsyncBaseCalculator import AsyncBaseCalculator
+from libpyvinyl.Instrument import Instrument
+from libpyvinyl.Parameters import CalculatorParameters
+from test_BaseCalculator import PlusCalculator, NumberData
+
+
+class EchoCalculator(AsyncBaseCalculator):
+    """Runs a python script which prints the sum of its input and sleeps"""
+
+    def __init__(self, name, input, output_keys="echo_result", **kwargs):
+        super().__init__(name, input, output_keys, NumberData, **kwargs)
+        self.lines = []
+
+    def init_parameters(self):
+        parameters = CalculatorParameters()
+        parameters.new_parameter("sleep", unit="s").value = 0.0
+        parameters.new_parameter("exit_code").value = 0
+        self.parameters = parameters
+
+    def on_stdout(self, line):
+        self.lines.append(line)
+
+    async def abackengine(self):
+        total = sum(data.get_data()["number"] for data in self.input.to_list())
+        script = (
+            "import sys, time;"
+            f"print('start', flush=True);"
+            f"print('warning', file=sys.stderr);"
+            f"time.sleep({self.parameters['sleep'].value});"
+            f"print({total});"
+            f"sys.exit({self.parameters['exit_code'].value})"
+        )
+        completed = await self.run_process(
+            sys.executable, "-c", script, timeout=5, capture_output=True
+        )
+        number = float(completed.stdout.split()[-1])
+        self.output[self.output_keys[0]].set_dict({"number": number})
+        return self.output
+
+
+@pytest.fixture()
+def inputs():
+    return [
+        NumberData.from_dict({"number": 1}, "input1"),
+        NumberData.from_dict({"number": 2}, "input2"),
+    ]
+
+
+def test_run_process(inputs, tmpdir):
+    """Test running an external program and streaming its output"""
+    echo = EchoCalculator("echo", inputs, instrument_base_dir=str(tmpdir))
+    output = echo.backengine()
+    assert output["echo_result"].get_data()["number"] == 3
+    assert echo.lines == ["start", "3"]
+    assert tmpdir.join("echo").isdir()
+
+    completed = asyncio.run(
+        echo.run_process(
+            sys.executable, "-c", "import sys; print('x', file=sys.stderr)"
+        )
+    )
+    assert completed.returncode == 0
+    assert completed.stderr is None
+
+
+def test_run_process_long_output(inputs, tmpdir):
+    """Test streaming progress updates and lines longer than the stream buffer"""
+    echo = EchoCalculator("echo", inputs, instrument_base_dir=str(tmpdir))
+    script = (
+        "import sys;"
+        "[sys.stdout.write(f'progress {i}\\r') for i in range(20000)];"
+        "print('x' * 200000);"
+        "print('done', end='\\r\\n')"
+    )
+    completed = asyncio.run(
+        echo.run_process(sys.executable, "-c", script, capture_output=True)
+    )
+    assert len(echo.lines) == 20002
+    assert echo.lines[0] == "progress 0"
+    assert echo.lines[19999] == "progress 19999"
+    assert echo.lines[-2:] == ["x" * 200000, "done"]
+    assert completed.stdout.endswith("progress 19999\r" + "x" * 200000 + "\ndone\r\n")
+
+
+def test_run_process_errors(inputs, tmpdir):
+    """Test the return code is checked and the timeout kills the process"""
+    echo = EchoCalculator("echo", inputs, instrument_base_dir=str(tmpdir))
+    echo.parameters["exit_code"] = 3
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        echo.backengine()
+    assert error.value.returncode == 3
+    assert error.value.stderr == "warning\n"
+
+    echo.parameters["exit_code"] = 0
+    with pytest.raises(subprocess.TimeoutExpired) as error:
+        asyncio.run(
+            echo.run_process(
+                sys.executable,
+                "-c",
+                "import time; print('started', flush=True); time.sleep(60)",
+                timeout=0.5,
+            )
+        )
+    assert echo.lines[-1] == "started"
+
+
+def test_run_process_cancel(inputs, tmpdir):
+    """Test cancelling a calculator terminates its process"""
+    echo = EchoCalculator("echo", inputs, instrument_base_dir=str(tmpdir))
+    echo.parameters["sleep"] = 60
+
+    async def cancel():
+        task = asyncio.ensure_future(echo.abackengine())
+        while not echo.lines:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    start = time.perf_counter()
+    asyncio.run(cancel())
+    assert time.perf_counter() - start < 5
+
+
+def test_instrument_arun(inputs, tmpdir, monkeypatch):
+    """Test awaiting the calculators of an instrument concurrently"""
+    monkeypatch.setattr(AsyncBaseCalculator, "max_processes", 2)
+    running = []
+    peak = []
+
+    class CountingCalculator(EchoCalculator):
+        def on_stdout(self, line):
+            super().on_stdout(line)
+            if line == "start":
+                running.append(self.name)
+                peak.append(len(running))
+
+        async def run_process(self, *args, **kwargs):
+            try:
+                return await super().run_process(*args, **kwargs)
+            finally:
+                running.remove(self.name)
+
+    instrument = Instrument("async", instrument_base_dir=str(tmpdir))
+    for i in range(4):
+        echo = CountingCalculator(
+            f"echo{i}",
+            inputs,
+            output_keys=f"echo{i}",
+            instrument_base_dir=str(tmpdir),
+        )
+        echo.parameters["sleep"] = 0.2
+        instrument.add_calculator(echo)
+    # A synchronous calculator depending on the last external one
+    plus = PlusCalculator(
+        "plus", [echo.output["echo3"], inputs[1]], instrument_base_dir=str(tmpdir)
+    )
+    instrument.add_calculator(plus)
+
+    asyncio.run(instrument.arun())
+    assert plus.output["plus_result"].get_data()["number"] == 5
+    assert all(calculator.is_up_to_date for calculator in [plus, echo])
+    # The semaphore holds two processes back
+    assert len(peak) == 4
+    assert max(peak) == 2
+
+    asyncio.run(instrument.arun(incremental=True))
+    assert len(peak) == 4
+
+
+def test_instrument_arun_max_workers(inputs, tmpdir):
+    """Test arun rejects a limit which would never let a calculator run"""
+    instrument = Instrument("async", instrument_base_dir=str(tmpdir))
+    instrument.add_calculator(
+        EchoCalculator("echo", inputs, instrument_base_dir=str(tmpdir))
+    )
+    for max_workers in [0, -1]:
+        with pytest.raises(ValueError):
+            asyncio.run(instrument.arun(max_workers=max_workers))
+
+
+def test_instrument_arun_error(inputs, tmpdir, monkeypatch):
+    """Test a failing calculator cancels the running ones"""
+    monkeypatch.setattr(AsyncBaseCalculator, "max_processes", 2)
+    slow = EchoCalculator(
+        "slow", inputs, output_keys="slow", instrument_base_dir=str(tmpdir)
+    )
+    slow.parameters["sleep"] = 60
+    failing = EchoCalculator(
+        "failing", inputs, output_keys="failing", instrument_base_dir=str(tmpdir)
+    )
+    failing.parameters["sleep"] = 0.2
+    failing.parameters["exit_code"] = 1
+    instrument = Instrument("async", instrument_base_dir=str(tmpdir))
+    instrument.add_calculator(slow)
+    instrument.add_calculator(failing)
+
+    start = time.perf_counter()
+    with pytest.raises(subprocess.CalledProcessError):
+        asyncio.run(instrument.arun())
+    assert time.perf_counter() - start < 5
+    assert slow.last_run_state is None
@@ -2,13 +2,18 @@ import unittest
 import pytest
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 from pathlib import Path
 
+import numpy
+
 from libpyvinyl.BaseCalculator import BaseCalculator
 from libpyvinyl.BaseData import BaseData, DataCollection
+from libpyvinyl.Checkpoint import Checkpoint
 from libpyvinyl.Parameters import CalculatorParameters
 from libpyvinyl.AbstractBaseClass import AbstractBaseClass
+from test_BaseData import TXTFormat
 
 
 class NumberData(BaseData):
@@ -198,6 +203,98 @@ class BaseCalculatorTest(unittest.TestCase):
         self.assertEqual(new_calculator.parameters["plus_times"].value, 5)
         self.assertEqual(self.__default_calculator.parameters["plus_times"].value, 1)
 
+    def test_clone(self):
+        """Test the lightweight copy of a calculator."""
+        calculator = PlusCalculator("plus", self.__default_input)
+        calculator.backengine()
+        calculator.record_run()
+        clone = calculator.clone()
+        self.assertIsInstance(clone, PlusCalculator)
+        # The input data objects are shared, in a new collection
+        self.assertIsNot(clone.input, calculator.input)
+        self.assertIs(clone.input["input1"], calculator.input["input1"])
+        clone.input["input1"] = NumberData.from_dict({"number": 5}, "input1")
+        self.assertEqual(calculator.input["input1"].get_data()["number"], 1)
+        # The output is reset
+        self.assertEqual(calculator.output["plus_result"].get_data()["number"], 2)
+        self.assertRaises(TypeError, lambda: clone.output["plus_result"].mapping_type)
+        self.assertIsNone(clone.last_run_state)
+        # The parameters are copied on write
+        clone.parameters["plus_times"] = 3
+        self.assertEqual(calculator.parameters["plus_times"].value, 1)
+        clone.backengine()
+        self.assertEqual(clone.output["plus_result"].get_data()["number"], 16)
+        self.assertEqual(calculator.output["plus_result"].get_data()["number"], 2)
+
+    def test_clone_held_reference(self):
+        """Test a parameter held before a copy keeps driving the original only."""
+        calculator = PlusCalculator("plus", self.__default_input)
+        plus_times = calculator.parameters["plus_times"]
+        new = calculator()
+        plus_times.value = 5
+        self.assertEqual(new.parameters["plus_times"].value, 1)
+        plus_times.value = 7
+        self.assertEqual(calculator.parameters["plus_times"].value, 7)
+        self.assertEqual(new.parameters["plus_times"].value, 1)
+
+    def test_clone_attributes(self):
+        """Test the attributes of a subclass are not shared with the copy."""
+        calculator = PlusCalculator("plus", self.__default_input)
+        calculator.history = [calculator.input["input1"]]
+        calculator.settings = {"parameters": calculator.parameters}
+        clone = calculator.clone()
+        clone.history.append(None)
+        self.assertEqual(len(calculator.history), 1)
+        # the references to the input and the parameters follow the copy
+        self.assertIs(clone.history[0], calculator.input["input1"])
+        self.assertIs(clone.settings["parameters"], clone.parameters)
+
+    def test_map(self):
+        """Test running a calculator for many parameter sets on a process pool."""
+        calculator = PlusCalculator("plus", self.__default_input)
+        base_dir = os.path.abspath("test_map")
+        self.__dirs_to_remove.append(base_dir)
+        parameter_sets = ({"plus_times": times} for times in range(1, 6))
+        outputs = list(calculator.map(parameter_sets, max_workers=2, base_dir=base_dir))
+        self.assertEqual(
+            [output["plus_result"].get_data()["number"] for output in outputs],
+            [2, 3, 4, 5, 6],
+        )
+        # Each parameter set runs in its own directory, on a clone
+        self.assertTrue(os.path.isdir(os.path.join(base_dir, "point_000004")))
+        self.assertEqual(calculator.parameters["plus_times"].value, 1)
+        self.assertRaises(
+            TypeError, lambda: calculator.output["plus_result"].mapping_type
+        )
+
+    def test_map_executor(self):
+        """Test mapping on a given executor, in completion order."""
+        calculator = PlusCalculator("plus", self.__default_input)
+        base_dir = os.path.abspath("test_map_executor")
+        self.__dirs_to_remove.append(base_dir)
+        parameter_sets = [{"plus_times": times} for times in range(1, 11)]
+        with ThreadPoolExecutor(3) as executor:
+            results = dict(
+                calculator.map(
+                    parameter_sets,
+                    executor=executor,
+                    max_workers=3,
+                    base_dir=base_dir,
+                    ordered=False,
+                )
+            )
+            self.assertEqual(sorted(results), list(range(10)))
+            self.assertEqual(results[9]["plus_result"].get_data()["number"], 11)
+            # Illegal parameter sets raise when their output is reached
+            calculator.parameters["plus_times"].add_interval(1, 10, True)
+            outputs = calculator.map(
+                [{"plus_times": 1}, {"plus_times": 11}],
+                executor=executor,
+                base_dir=base_dir,
+            )
+            self.assertEqual(next(outputs)["plus_result"].get_data()["number"], 2)
+            self.assertRaises(ValueError, next, outputs)
+
     def test_dump(self):
         """Test dumping to file."""
         calculator = self.__default_calculator
@@ -252,6 +349,86 @@ class BaseCalculatorTest(unittest.TestCase):
 
         self.assertIsNotNone(calculator.data)
 
+    def test_checkpoint(self):
+        """Test writing and loading a checkpoint."""
+        calculator = self.__default_calculator()
+        calculator.parameters["plus_times"] = 3
+        calculator.backengine()
+        array = numpy.arange(12.0).reshape(3, 4)
+        calculator.output["plus_result"].set_dict({"number": array, "unit": "m"})
+        calculator.note = "extra attribute"
+        self.__dirs_to_remove.append("PlusCalculator")
+
+        for compress in [False, True]:
+            fname = calculator.checkpoint(compress=compress)
+            self.__files_to_remove.append(fname)
+            # The header is read without loading the data
+            checkpoint = Checkpoint(fname)
+            self.assertEqual(checkpoint.name, "plus")
+            self.assertEqual(checkpoint.data_keys("input"), ["input1", "input2"])
+            self.assertEqual(checkpoint.parameters["plus_times"].value, 3)
+            self.assertEqual(
+                checkpoint.data("input2", "input").get_data(), {"number": 1}
+            )
+
+            loaded = PlusCalculator.from_checkpoint(fname)
+            self.assertIsInstance(loaded, PlusCalculator)
+            self.assertEqual(loaded.input.get_data(), calculator.input.get_data())
+            self.assertEqual(loaded.parameters["plus_times"].value, 3)
+            self.assertEqual(loaded.note, "extra attribute")
+            data = loaded.output["plus_result"].get_data()
+            self.assertEqual(data["unit"], "m")
+            numpy.testing.assert_array_equal(data["number"], array)
+            # The stored arrays are memory-mapped, aligned
+            self.assertEqual(isinstance(data["number"], numpy.memmap), not compress)
+            self.assertTrue(data["number"].flags.aligned)
+            loaded.parameters["plus_times"] = 1
+            self.assertEqual(checkpoint.parameters["plus_times"].value, 3)
+
+    def test_checkpoint_rewrite(self):
+        """Test checkpointing a loaded calculator over its own checkpoint."""
+        calculator = self.__default_calculator()
+        array = numpy.arange(12.0).reshape(3, 4)
+        calculator.output["plus_result"].set_dict({"number": array})
+        fname = calculator.checkpoint("test_checkpoint_rewrite.ckpt")
+        self.__files_to_remove.append(fname)
+
+        loaded = PlusCalculator.from_checkpoint(fname)
+        mapped = loaded.output["plus_result"].get_data()["number"]
+        self.assertIsInstance(mapped, numpy.memmap)
+        loaded.parameters["plus_times"] = 4
+        self.assertEqual(loaded.checkpoint(fname), fname)
+        # The memory maps of the replaced file stay valid
+        numpy.testing.assert_array_equal(mapped, array)
+        reloaded = PlusCalculator.from_checkpoint(fname)
+        self.assertEqual(reloaded.parameters["plus_times"].value, 4)
+        numpy.testing.assert_array_equal(
+            reloaded.output["plus_result"].get_data()["number"], array
+        )
+        self.assertFalse([f for f in os.listdir(".") if f.startswith(".ckpt_")])
+
+    def test_checkpoint_references(self):
+        """Test that file mappings and empty outputs are checkpointed by reference."""
+        txt_file = os.path.abspath("test_checkpoint_input.txt")
+        self.__files_to_remove.append(txt_file)
+        with open(txt_file, "w") as f:
+            f.write("4")
+        input_data = NumberData("input1")
+        input_data.set_file(txt_file, TXTFormat)
+        calculator = PlusCalculator("plus", input_data)
+        fname = calculator.checkpoint("test_checkpoint.ckpt")
+        self.__files_to_remove.append(fname)
+
+        loaded = BaseCalculator.from_checkpoint(fname)
+        self.assertEqual(loaded.input["input1"].filename, txt_file)
+        self.assertIs(loaded.input["input1"].file_format_class, TXTFormat)
+        self.assertRaises(TypeError, lambda: loaded.output["plus_result"].mapping_type)
+
+        class OtherCalculator(PlusCalculator):
+            pass
+
+        self.assertRaises(TypeError, OtherCalculator.from_checkpoint, fname)
+
     def test_attributes(self):
         """Test that all required attributes are present."""
 
@@ -287,6 +464,19 @@ class BaseCalculatorTest(unittest.TestCase):
         calculator.set_parameters({"plus_times": 9})
         self.assertEqual(calculator.parameters["plus_times"].value, 9)
 
+    def test_set_parameters_is_atomic(self):
+        calculator = self.__default_calculator()
+        calculator.parameters.new_parameter("label")
+        calculator.parameters["label"] = "first"
+        calculator.parameters["plus_times"] = 1
+
+        changes = calculator.set_parameters(plus_times=3, label="first")
+        self.assertEqual(changes, {"plus_times": (1, 3)})
+
+        with self.assertRaises(ValueError):
+            calculator.set_parameters(plus_times=4, label=5)
+        self.assertEqual(calculator.parameters["plus_times"].value, 3)
+
     def test_collection_get_data(self):
         calculator = self.__default_calculator
         print(calculator.input)
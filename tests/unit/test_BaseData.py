@@ -1,8 +1,8 @@
 import pytest
 import numpy as np
 import h5py
-from libpyvinyl.BaseData import BaseData, DataCollection
-from libpyvinyl.BaseFormat import BaseFormat
+from libpyvinyl.BaseData import BaseData, DataCollection, DataCollectionError
+from libpyvinyl.BaseFormat import BaseFormat, LazyDict
 
 
 class NumberData(BaseData):
@@ -135,6 +135,18 @@ class H5Format(BaseFormat):
         data_dict = {"number": number}
         return data_dict
 
+    @classmethod
+    def list_keys(cls, filename: str) -> list:
+        """List the datasets of the file from its metadata."""
+        with h5py.File(filename, "r") as h5:
+            return list(h5.keys())
+
+    @classmethod
+    def read_keys(cls, filename: str, keys: list) -> dict:
+        """Read only the given datasets of the file."""
+        with h5py.File(filename, "r") as h5:
+            return {key: h5[key][()] for key in keys}
+
     @classmethod
     def write(cls, object: NumberData, filename: str, key: str = None):
         """Save the data with the `filename`."""
@@ -191,6 +203,22 @@ def test_create_data_with_set_dict():
     assert test_data.get_data()["number"] == 4
 
 
+def test_data_version(txt_file):
+    """Test the version of a data object changes when a dict or a file is mapped"""
+    test_data = NumberData(key="test_data")
+    other_data = NumberData(key="other_data")
+    version = test_data.version
+    assert other_data.version != version
+    test_data.set_dict({"number": 4})
+    assert test_data.version != version
+    version = test_data.version
+    test_data.get_data()
+    assert test_data.version == version
+    test_data.set_dict(None)
+    test_data.set_file(txt_file, TXTFormat)
+    assert test_data.version != version
+
+
 def test_create_data_with_set_file(txt_file):
     """Test set file after in an empty data instance"""
     test_data = NumberData(key="test_data")
@@ -248,6 +276,54 @@ def test_check_key_from_dict():
         test_data.get_data()
 
 
+@pytest.fixture()
+def h5_file(tmp_path_factory):
+    fn_path = tmp_path_factory.mktemp("test_data") / "test.h5"
+    h5_file = str(fn_path)
+    with h5py.File(h5_file, "w") as h5:
+        h5["number"] = 4
+        h5["extra"] = np.arange(10)
+    return h5_file
+
+
+def test_get_data_keys(h5_file, txt_file):
+    """Test reading only some keys of the data"""
+    test_data = NumberData.from_file(h5_file, H5Format, "test_data")
+    assert test_data.get_data(keys=["number"]) == {"number": 4}
+    assert list(test_data.get_data(keys=["extra"])["extra"]) == list(range(10))
+    with pytest.raises(KeyError, match="'missing' is not found"):
+        test_data.get_data(keys=["missing"])
+
+    # TXTFormat cannot list the keys of a file, the whole file is read
+    test_data = NumberData.from_file(txt_file, TXTFormat, "test_data")
+    assert test_data.get_data(keys=["number"]) == {"number": 4}
+    test_data = NumberData.from_dict({"number": 4, "extra": 1}, "test_data")
+    assert test_data.get_data(keys=["number"]) == {"number": 4}
+
+
+def test_get_data_lazy(h5_file):
+    """Test the values of lazily read data are read when accessed"""
+    test_data = NumberData.from_file(h5_file, H5Format, "test_data")
+    lazy_data = test_data.get_data(lazy=True)
+    assert isinstance(lazy_data, LazyDict)
+    assert sorted(lazy_data) == ["extra", "number"]
+    assert not lazy_data.is_loaded("number")
+    assert lazy_data["number"] == 4
+    assert lazy_data.is_loaded("number")
+    assert not lazy_data.is_loaded("extra")
+    assert list(test_data.get_data(keys=["extra"], lazy=True)) == ["extra"]
+
+
+def test_check_key_from_metadata(tmpdir):
+    """Test the expected data is checked against the keys in the file"""
+    fn = str(tmpdir / "no_number.h5")
+    with h5py.File(fn, "w") as h5:
+        h5["extra"] = 1
+    test_data = NumberData.from_file(fn, H5Format, "test_data")
+    with pytest.raises(KeyError, match="Expected data dict key 'number'"):
+        test_data.get_data(keys=["extra"])
+
+
 def test_create_data_from_file_wrong_param(txt_file):
     """Test creating a data instance from a file in a wrong file format type"""
     with pytest.raises(TypeError):
@@ -395,6 +471,36 @@ def test_DataCollection_two_data_write(txt_file, tmpdir):
     assert new_collection["test_dict_to_TXTFormat"].get_data()["number"] == 5
 
 
+def test_DataCollection_concurrent(txt_file, tmpdir):
+    """Test reading and writing a DataCollection instance on a thread pool"""
+    objects = [
+        NumberData.from_dict({"number": i}, f"test_dict_{i}") for i in range(4)
+    ] + [NumberData.from_file(txt_file, TXTFormat, "test_txt")]
+    collection = DataCollection(*objects)
+    data_dicts = collection.get_data(max_workers=3)
+    assert list(data_dicts) == [obj.key for obj in objects]
+    assert data_dicts == collection.get_data()
+
+    filenames = {obj.key: str(tmpdir / f"{obj.key}.txt") for obj in objects}
+    format_classes = {obj.key: TXTFormat for obj in objects}
+    keys = {obj.key: None for obj in objects}
+    written = collection.write(filenames, format_classes, keys, max_workers=3)
+    assert list(written) == [f"{obj.key}_to_TXTFormat" for obj in objects]
+    assert written["test_dict_2_to_TXTFormat"].get_data()["number"] == 2
+
+
+def test_DataCollection_concurrent_errors(tmpdir):
+    """Test that the errors of a concurrent read do not lose the completed results"""
+    good = NumberData.from_dict({"number": 5}, "good")
+    missing = NumberData.from_file(str(tmpdir / "missing.txt"), TXTFormat, "missing")
+    collection = DataCollection(good, missing)
+    with pytest.raises(DataCollectionError) as excinfo:
+        collection.get_data(max_workers=2)
+    assert excinfo.value.results == {"good": {"number": 5}}
+    assert list(excinfo.value.errors) == ["missing"]
+    assert isinstance(excinfo.value.errors["missing"], OSError)
+
+
 def test_DataCollection_add_data(txt_file):
     """Test adding data to a DataCollection instance"""
     my_dict = {"number": 5}
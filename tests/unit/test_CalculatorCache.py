@@ -0,0 +1,78 @@
+import pytest
+
+from test_BaseCalculator import PlusCalculator, NumberData
+from libpyvinyl.CalculatorCache import CalculatorCache
+
+
+class CountingPlusCalculator(PlusCalculator):
+    """PlusCalculator counting the calls of its backengine"""
+
+    calls = 0
+
+    def backengine(self):
+        CountingPlusCalculator.calls += 1
+        return super().backengine()
+
+
+@pytest.fixture()
+def calculator(tmpdir):
+    CountingPlusCalculator.calls = 0
+    input1 = NumberData.from_dict({"number": 1}, "input1")
+    input2 = NumberData.from_dict({"number": 2}, "input2")
+    return CountingPlusCalculator(
+        "plus", [input1, input2], instrument_base_dir=str(tmpdir)
+    )
+
+
+def test_cache_hit(calculator, tmpdir):
+    """Test a second identical run is served from the cache"""
+    cache = CalculatorCache(str(tmpdir / "cache"))
+    assert cache.run(calculator).get_data()["number"] == 3
+    new_calculator = calculator()
+    new_calculator.output["plus_result"].data_dict = None
+    assert new_calculator in cache
+    assert cache.run(new_calculator).get_data()["number"] == 3
+    assert CountingPlusCalculator.calls == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_cache_miss_on_parameter_change(calculator, tmpdir):
+    """Test changed parameters are not served from the cache"""
+    cache = CalculatorCache(str(tmpdir / "cache"))
+    cache.run(calculator)
+    calculator.parameters["plus_times"] = 3
+    assert cache.run(calculator).get_data()["number"] == 7
+    assert CountingPlusCalculator.calls == 2
+    assert cache.misses == 2
+
+
+def test_cache_miss_on_input_change(calculator, tmpdir):
+    """Test changed input data are not served from the cache"""
+    cache = CalculatorCache(str(tmpdir / "cache"))
+    fingerprint = cache.fingerprint(calculator)
+    calculator.input["input2"] = NumberData.from_dict({"number": 5}, "input2")
+    assert cache.fingerprint(calculator) != fingerprint
+    assert cache.run(calculator).get_data()["number"] == 6
+
+
+def test_cache_eviction(calculator, tmpdir):
+    """Test the least recently used entries are evicted"""
+    cache = CalculatorCache(str(tmpdir / "cache"))
+    cache.run(calculator)
+    entry_size = cache.size
+    cache.max_size = entry_size
+    calculator.parameters["plus_times"] = 2
+    cache.run(calculator)
+    assert cache.stats()["entries"] == 1
+    calculator.parameters["plus_times"] = 1
+    assert calculator not in cache
+
+
+def test_cache_clear(calculator, tmpdir):
+    """Test clearing the cache"""
+    cache = CalculatorCache(str(tmpdir / "cache"))
+    cache.run(calculator)
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "entries": 0, "size": 0}
@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pytest
+
+from test_BaseData import NumberData, TXTFormat, H5Format
+from libpyvinyl.DataCache import DataCache
+
+
+class CountingTXTFormat(TXTFormat):
+    """TXTFormat counting the calls of its read"""
+
+    reads = 0
+
+    @classmethod
+    def read(cls, filename: str) -> dict:
+        CountingTXTFormat.reads += 1
+        return super().read(filename)
+
+
+@pytest.fixture()
+def shared_cache():
+    cache = DataCache.shared()
+    cache.clear()
+    cache.max_bytes = 2**28
+    yield cache
+    cache.max_bytes = 0
+    cache.clear()
+
+
+@pytest.fixture()
+def txt_data(tmpdir, shared_cache):
+    CountingTXTFormat.reads = 0
+    filename = str(tmpdir / "number.txt")
+    np.savetxt(filename, np.array([4.0]), fmt="%.3f")
+    return NumberData.from_file(filename, CountingTXTFormat, "number")
+
+
+def test_disabled(tmpdir):
+    """Test the cache is opt-in"""
+    assert DataCache.shared().max_bytes == 0
+    CountingTXTFormat.reads = 0
+    filename = str(tmpdir / "number.txt")
+    np.savetxt(filename, np.array([4.0]), fmt="%.3f")
+    data = NumberData.from_file(filename, CountingTXTFormat, "number")
+    data.get_data()
+    data.get_data()
+    assert CountingTXTFormat.reads == 2
+    assert DataCache.shared().stats()["entries"] == 0
+
+
+def test_cache_hit(txt_data):
+    """Test the file is only read once by repeated calls of get_data"""
+    assert txt_data.get_data()["number"] == 4
+    data = txt_data.get_data()
+    assert data["number"] == 4
+    # the returned dict is a copy
+    data["number"] = 5
+    assert txt_data.get_data()["number"] == 4
+    assert CountingTXTFormat.reads == 1
+    stats = DataCache.shared().stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["bytes"] > 0
+
+
+def test_modified_file(txt_data):
+    """Test a file modified on disk is read again"""
+    txt_data.get_data()
+    np.savetxt(txt_data.filename, np.array([12.0]), fmt="%.3f")
+    os.utime(txt_data.filename, ns=(0, 0))
+    assert txt_data.get_data()["number"] == 12
+    assert CountingTXTFormat.reads == 2
+
+
+def test_invalidate_on_write(txt_data, tmpdir):
+    """Test writing a file through BaseData.write invalidates its entries"""
+    txt_data.get_data()
+    other = NumberData.from_dict({"number": 6}, "other")
+    # the same size as the original file, the modification time is the only change
+    other.write(txt_data.filename, TXTFormat)
+    assert DataCache.shared().stats()["entries"] == 0
+    assert txt_data.get_data()["number"] == 6
+
+
+def test_eviction(txt_data, tmpdir):
+    """Test the least recently used entries are evicted beyond max_bytes"""
+    cache = DataCache(max_bytes=100)
+    read = lambda: {"array": np.zeros(8)}
+    h5_file = str(tmpdir / "number.h5")
+    open(h5_file, "w").close()
+    cache.get(txt_data.filename, TXTFormat, read)
+    cache.get(h5_file, H5Format, read)
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == 64 + len("array")
+    cache.get(h5_file, H5Format, read)
+    assert cache.stats()["hits"] == 1
+    cache.max_bytes = 0
+    assert cache.stats()["entries"] == 0
+
+
+def test_read_only_arrays(tmpdir):
+    """Test the cached arrays cannot be modified in place by a caller"""
+    cache = DataCache(max_bytes=2**20)
+    filename = str(tmpdir / "number.txt")
+    open(filename, "w").close()
+    array = np.arange(4.0)
+    read = lambda: {"array": array}
+    data = cache.get(filename, TXTFormat, read)
+    with pytest.raises(ValueError):
+        data["array"][0] = 10.0
+    # a copy can be modified without affecting the later results
+    copy = data["array"].copy()
+    copy[0] = 10.0
+    assert list(cache.get(filename, TXTFormat, read)["array"]) == [0, 1, 2, 3]
+    # the array returned by the read is left writeable
+    assert array.flags.writeable
+    # the data too large to be cached is returned as read
+    cache.max_bytes = 8
+    assert cache.get(filename, H5Format, read)["array"].flags.writeable
@@ -0,0 +1,150 @@
+import os
+
+import h5py
+import numpy as np
+import pytest
+
+from libpyvinyl.BaseFormat import BaseFormat
+from libpyvinyl.FormatGraph import FormatGraph
+from test_BaseData import NumberData, TXTFormat, H5Format, txt_file
+
+
+class CSVNumberData(NumberData):
+    @classmethod
+    def supported_formats(self):
+        format_dict = {}
+        self._add_ioformat(format_dict, CSVFormat)
+        self._add_ioformat(format_dict, NPYFormat)
+        self._add_ioformat(format_dict, TXTFormat)
+        self._add_ioformat(format_dict, H5Format)
+        return format_dict
+
+
+class CSVFormat(BaseFormat):
+    """A text format which is slow to parse, with a direct conversion to NPYFormat"""
+
+    @classmethod
+    def format_register(self):
+        return self._create_format_register("CSV", "CSV format for tests", ".csv")
+
+    @classmethod
+    def read(cls, filename: str) -> dict:
+        return {"number": float(np.loadtxt(filename))}
+
+    @classmethod
+    def write(cls, object, filename: str, key: str = None):
+        np.savetxt(filename, np.array([object.get_data()["number"]]))
+        return object.from_file(filename, cls, key or object.key + "_to_CSVFormat")
+
+    @classmethod
+    def read_cost(cls) -> float:
+        return 10.0
+
+    @staticmethod
+    def direct_convert_formats():
+        return [NPYFormat]
+
+    @classmethod
+    def convert(cls, obj, output: str, output_format_class, key=None, **kwargs):
+        np.save(output, np.loadtxt(obj.filename))
+        return obj.from_file(
+            output, output_format_class, key or obj.key + "_from_CSVFormat"
+        )
+
+
+class NPYFormat(BaseFormat):
+    """A binary format with a direct conversion to H5Format"""
+
+    @classmethod
+    def format_register(self):
+        return self._create_format_register("NPY1", "NPY format for tests", ".npy")
+
+    @classmethod
+    def read(cls, filename: str) -> dict:
+        return {"number": float(np.load(filename))}
+
+    @classmethod
+    def write(cls, object, filename: str, key: str = None):
+        np.save(filename, np.array(object.get_data()["number"]))
+        return object.from_file(filename, cls, key or object.key + "_to_NPYFormat")
+
+    @staticmethod
+    def direct_convert_formats():
+        return [H5Format]
+
+    @classmethod
+    def convert(cls, obj, output: str, output_format_class, key=None, **kwargs):
+        with h5py.File(output, "w") as h5:
+            h5["number"] = float(np.load(obj.filename))
+        return obj.from_file(
+            output, output_format_class, key or obj.key + "_from_NPYFormat"
+        )
+
+
+@pytest.fixture()
+def csv_file(tmp_path):
+    csv_file = str(tmp_path / "test.csv")
+    with open(csv_file, "w") as f:
+        f.write("4")
+    return csv_file
+
+
+def test_registered_format_classes():
+    """Test listing the concrete format classes"""
+    format_classes = FormatGraph.registered_format_classes()
+    assert CSVFormat in format_classes
+    assert H5Format in format_classes
+    assert BaseFormat not in format_classes
+
+
+def test_plan():
+    """Test the cheapest paths between format classes"""
+    graph = FormatGraph([CSVFormat, NPYFormat, TXTFormat, H5Format])
+    # reading and writing costs 2, a direct conversion 1
+    assert graph.edge(TXTFormat, H5Format).direct
+    assert graph.edge(H5Format, TXTFormat).cost == 2.0
+    plan = graph.plan(CSVFormat, H5Format)
+    assert plan.formats == [CSVFormat, NPYFormat, H5Format]
+    assert plan.cost == 2.0
+    plan = graph.plan(CSVFormat, TXTFormat)
+    assert plan.formats == [CSVFormat, NPYFormat, TXTFormat]
+    assert [step.direct for step in plan] == [True, False]
+    assert plan.cost == 3.0
+    # Without the intermediate format, the CSV file is read
+    plan = FormatGraph([CSVFormat, TXTFormat]).plan(CSVFormat, TXTFormat)
+    assert plan.formats == [CSVFormat, TXTFormat]
+    assert plan.cost == 11.0
+    # A plan has one step at least
+    plan = graph.plan(H5Format, H5Format)
+    assert plan.formats == [H5Format, H5Format]
+    assert "H5Format -> H5Format (read/write, cost 2)" in str(plan)
+
+
+def test_plan_conversion(txt_file):
+    """Test planning the conversions of Data Objects"""
+    data = NumberData.from_dict({"number": 4}, "test_dict")
+    plan = data.plan_conversion(TXTFormat)
+    assert plan.formats == [None, TXTFormat]
+    assert "dict -> TXTFormat" in str(plan)
+    # Only the formats supported by NumberData are used
+    data = NumberData.from_file(txt_file, TXTFormat, "test_txt")
+    plan = data.plan_conversion(H5Format)
+    assert plan.formats == [TXTFormat, H5Format]
+    assert plan.steps[0].direct
+
+
+def test_write_multi_hop(csv_file, tmp_path):
+    """Test writing a file through an intermediate format"""
+    data = CSVNumberData.from_file(csv_file, CSVFormat, "test_csv")
+    assert data.plan_conversion(H5Format).formats == [CSVFormat, NPYFormat, H5Format]
+    h5_file = str(tmp_path / "test.h5")
+    written = data.write(h5_file, H5Format)
+    assert written.key == "test_csv_from_NPYFormat"
+    assert written.file_format_class is H5Format
+    assert written.get_data()["number"] == 4
+    # The intermediate file is removed
+    assert sorted(os.listdir(tmp_path)) == ["test.csv", "test.h5"]
+
+    written = data.write(str(tmp_path / "test.txt"), TXTFormat, "test_txt")
+    assert written.key == "test_txt"
+    assert written.get_data()["number"] == 4
@@ -0,0 +1,158 @@
+import gc
+import importlib.metadata
+import os
+import weakref
+
+import h5py
+import pytest
+
+from libpyvinyl.BaseFormat import BaseFormat
+from libpyvinyl.FormatRegistry import FormatRegistry, ENTRY_POINT_GROUP
+from test_BaseData import NumberData, TXTFormat, H5Format, txt_file
+
+
+class MagicH5Format(H5Format):
+    """H5Format detected by the signature of HDF5 files"""
+
+    @classmethod
+    def magic_bytes(cls):
+        return [b"\x89HDF\r\n\x1a\n"]
+
+
+class MagicNumberData(NumberData):
+    @classmethod
+    def supported_formats(self):
+        format_dict = {}
+        self._add_ioformat(format_dict, TXTFormat)
+        self._add_ioformat(format_dict, MagicH5Format)
+        return format_dict
+
+
+class PluginFormat(BaseFormat):
+    @classmethod
+    def format_register(self):
+        return self._create_format_register("PLUGIN", "Plugin format", "plg")
+
+    @classmethod
+    def read(cls, filename: str) -> dict:
+        return {}
+
+    @classmethod
+    def write(cls, object, filename: str, key: str = None):
+        raise NotImplementedError
+
+    @staticmethod
+    def direct_convert_formats():
+        return []
+
+    @classmethod
+    def convert(cls, obj, output, output_format_class, key=None, **kwargs):
+        raise NotImplementedError
+
+
+@pytest.fixture()
+def h5_file(tmp_path):
+    h5_file = str(tmp_path / "test.h5")
+    with h5py.File(h5_file, "w") as h5:
+        h5["number"] = 8.0
+    return h5_file
+
+
+def test_registry_index():
+    """Test looking up format classes by key and by extension"""
+    registry = FormatRegistry()
+    assert TXTFormat in registry.format_classes()
+    assert BaseFormat not in registry.format_classes()
+    assert PluginFormat in registry.by_key("PLUGIN")
+    # The extension is normalized with a leading dot
+    assert registry.by_extension("data.PLG") == [PluginFormat]
+    assert registry.by_extension("archive.tar.plg") == [PluginFormat]
+    assert registry.by_extension("data") == []
+    assert "PLUGIN: PluginFormat (plg)" in str(registry)
+
+
+def test_registry_update():
+    """Test that the format classes defined after a lookup are registered"""
+    registry = FormatRegistry()
+    assert registry.by_key("LATE") == []
+
+    class LateFormat(PluginFormat):
+        @classmethod
+        def format_register(self):
+            return self._create_format_register("LATE", "Late format", ".late")
+
+    assert registry.by_key("LATE") == [LateFormat]
+
+    # the registry does not keep the format classes alive
+    late_format = weakref.ref(LateFormat)
+    del LateFormat
+    gc.collect()
+    assert late_format() is None
+    assert registry.by_key("LATE") == []
+    assert FormatRegistry().by_key("LATE") == []
+
+
+def test_detect(h5_file, tmp_path):
+    """Test detecting the format of files by extension and by magic bytes"""
+    registry = FormatRegistry()
+    candidates = [TXTFormat, MagicH5Format]
+    assert registry.detect("test.txt", candidates) is TXTFormat
+    # H5Format and MagicH5Format share the extension, the magic bytes decide
+    assert registry.detect(h5_file, [H5Format, MagicH5Format]) is MagicH5Format
+
+    class OtherTXTFormat(TXTFormat):
+        pass
+
+    with pytest.raises(ValueError, match="ambiguous between TXTFormat, OtherTXTFormat"):
+        registry.detect("test.txt", [TXTFormat, OtherTXTFormat])
+    no_extension = str(tmp_path / "test")
+    os.rename(h5_file, no_extension)
+    assert registry.detect(no_extension, candidates) is MagicH5Format
+    with pytest.raises(ValueError, match="not detected"):
+        registry.detect(no_extension, [TXTFormat])
+
+
+def test_from_file_detect(h5_file, txt_file):
+    """Test creating Data Objects without naming the format class"""
+    data = MagicNumberData.from_file(h5_file)
+    assert data.file_format_class is MagicH5Format
+    assert data.key == "test.h5"
+    assert data.get_data()["number"] == 8.0
+    data = NumberData.from_file(txt_file, key="test_txt")
+    assert data.file_format_class is TXTFormat
+    assert data.key == "test_txt"
+
+
+def test_supported_formats_cached():
+    """Test that the supported formats of a DataClass are computed once"""
+    calls = []
+
+    class CountingData(NumberData):
+        @classmethod
+        def supported_formats(self):
+            calls.append(self)
+            return NumberData.supported_formats()
+
+    registry = FormatRegistry()
+    assert "TXT" in registry.supported_formats(CountingData)
+    assert "H5" in registry.supported_formats(CountingData)
+    assert len(calls) == 1
+
+
+def test_entry_points(monkeypatch):
+    """Test the discovery of the format classes of other packages"""
+    entry_points = [
+        importlib.metadata.EntryPoint(
+            "PLUGIN", "test_FormatRegistry:PluginFormat", ENTRY_POINT_GROUP
+        ),
+        importlib.metadata.EntryPoint(
+            "BROKEN", "not_a_module:Format", ENTRY_POINT_GROUP
+        ),
+    ]
+    monkeypatch.setattr(
+        importlib.metadata,
+        "entry_points",
+        lambda: importlib.metadata.EntryPoints(entry_points),
+    )
+    with pytest.warns(UserWarning, match="BROKEN"):
+        assert FormatRegistry().by_key("PLUGIN") == [PluginFormat]
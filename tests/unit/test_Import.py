@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+
+def run_python(code):
+    """Run code in a fresh interpreter and return its stdout"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def test_import_is_lazy():
+    """Test importing libpyvinyl loads neither dill, json_tricks nor the unit definitions"""
+    code = "\n".join(
+        [
+            "import sys, pint, libpyvinyl",
+            "registry = pint.get_application_registry().get()",
+            "print('dill' in sys.modules, 'json_tricks' in sys.modules, type(registry).__name__)",
+        ]
+    )
+    assert run_python(code) == "False False LazyRegistry"
+
+
+def test_shared_registry():
+    """Test quantities of libpyvinyl.Q_ can be assigned to parameters"""
+    from libpyvinyl import Q_, ureg, Parameter
+
+    parameter = Parameter("length", unit="m")
+    parameter.add_interval(Q_(0, "m"), Q_(1, "m"), True)
+    parameter.value = Q_(30, "cm")
+    assert parameter.value == 0.3
+    assert parameter.pint_value + Q_(1, ureg.meter) == Q_(1.3, "m")
+    assert not parameter.is_legal(Q_(2, "m"))
@@ -114,6 +114,94 @@ class InstrumentTest(unittest.TestCase):
             my_instrument.calculators["test2"].base_dir, "test/PlusCalculator"
         )
 
+    def testDependencyGraph(self):
+        """Testing the dependency graph of chained calculators"""
+        input1 = NumberData.from_dict({"number": 1}, "input1")
+        input2 = NumberData.from_dict({"number": 2}, "input2")
+        calculator1 = PlusCalculator("first", [input1, input2], output_keys="first")
+        calculator2 = PlusCalculator("second", [input1, input2], output_keys="second")
+        calculator3 = PlusCalculator(
+            "third", [calculator1.output["first"], calculator2.output["second"]]
+        )
+        my_instrument = Instrument("myInstrument")
+        my_instrument.add_calculator(calculator1)
+        my_instrument.add_calculator(calculator2)
+        my_instrument.add_calculator(calculator3)
+        graph = my_instrument.dependency_graph()
+        self.assertEqual(
+            graph, {"first": [], "second": [], "third": ["first", "second"]}
+        )
+
+    def testRunParallel(self):
+        """Testing running independent branches on a thread pool"""
+        input1 = NumberData.from_dict({"number": 1}, "input1")
+        input2 = NumberData.from_dict({"number": 2}, "input2")
+        calculator1 = PlusCalculator("first", [input1, input2], output_keys="first")
+        calculator2 = PlusCalculator("second", [input1, input2], output_keys="second")
+        calculator2.parameters["plus_times"] = 2
+        calculator3 = PlusCalculator(
+            "third", [calculator1.output["first"], calculator2.output["second"]]
+        )
+        my_instrument = Instrument("myInstrument")
+        my_instrument.add_calculator(calculator1)
+        my_instrument.add_calculator(calculator2)
+        my_instrument.add_calculator(calculator3)
+        my_instrument.set_instrument_base_dir("test_parallel")
+        self.__dirs_to_remove.append("test_parallel")
+        my_instrument.run(max_workers=2)
+        self.assertEqual(my_instrument.output.get_data()["number"], 8)
+
+    def testRunIncremental(self):
+        """Testing incremental runs only re-run the calculators affected by a change"""
+        input1 = NumberData.from_dict({"number": 1}, "input1")
+        input2 = NumberData.from_dict({"number": 2}, "input2")
+        calculator1 = PlusCalculator("first", [input1, input2], output_keys="first")
+        calculator2 = PlusCalculator("second", [input1, input2], output_keys="second")
+        calculator3 = PlusCalculator(
+            "third", [calculator1.output["first"], calculator2.output["second"]]
+        )
+        my_instrument = Instrument("myInstrument")
+        my_instrument.add_calculator(calculator1)
+        my_instrument.add_calculator(calculator2)
+        my_instrument.add_calculator(calculator3)
+        my_instrument.set_instrument_base_dir("test_incremental")
+        self.__dirs_to_remove.append("test_incremental")
+
+        for max_workers in [None, 2]:
+            my_instrument.run(max_workers=max_workers, incremental=True)
+            self.assertTrue(calculator3.is_up_to_date)
+            versions = [
+                c.output.to_list()[0].version for c in (calculator1, calculator2)
+            ]
+
+            # nothing changed, nothing is run
+            my_instrument.run(max_workers=max_workers, incremental=True)
+            self.assertEqual(
+                [c.output.to_list()[0].version for c in (calculator1, calculator2)],
+                versions,
+            )
+
+            calculator2.parameters["plus_times"] = 2
+            self.assertFalse(calculator2.is_up_to_date)
+            my_instrument.run(max_workers=max_workers, incremental=True)
+            self.assertEqual(calculator1.output["first"].version, versions[0])
+            self.assertNotEqual(calculator2.output["second"].version, versions[1])
+            self.assertEqual(my_instrument.output.get_data()["number"], 8)
+            calculator2.parameters["plus_times"] = 1
+
+        my_instrument.run(incremental=True)
+        self.assertEqual(my_instrument.output.get_data()["number"], 6)
+        versions = [c.output.to_list()[0].version for c in (calculator1, calculator2)]
+
+        # a changed input of the first calculators propagates downstream
+        input2.set_dict({"number": 5})
+        self.assertFalse(calculator1.is_up_to_date)
+        my_instrument.run(incremental=True)
+        self.assertNotEqual(calculator1.output["first"].version, versions[0])
+        self.assertNotEqual(calculator2.output["second"].version, versions[1])
+        self.assertEqual(calculator3.output["plus_result"].get_data()["number"], 12)
+        self.assertEqual(my_instrument.output.get_data()["number"], 12)
+
 
 if __name__ == "__main__":
     unittest.main()
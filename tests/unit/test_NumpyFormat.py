@@ -0,0 +1,158 @@
+import os
+
+import numpy as np
+import pytest
+
+from libpyvinyl.BaseData import BaseData
+from libpyvinyl.DataCache import DataCache
+from libpyvinyl.NumpyFormat import NumpyFormat
+
+
+class ArrayData(BaseData):
+    def __init__(
+        self,
+        key,
+        data_dict=None,
+        filename=None,
+        file_format_class=None,
+        file_format_kwargs=None,
+    ):
+        expected_data = {}
+        expected_data["array"] = None
+        super().__init__(
+            key,
+            expected_data,
+            data_dict,
+            filename,
+            file_format_class,
+            file_format_kwargs,
+        )
+
+    @classmethod
+    def supported_formats(self):
+        format_dict = {}
+        self._add_ioformat(format_dict, NumpyFormat)
+        return format_dict
+
+
+@pytest.fixture()
+def npy_data(tmpdir):
+    data = ArrayData.from_dict(
+        {"array": np.arange(12.0).reshape(3, 4), "scale": 2.5}, "test_data"
+    )
+    return data.write(str(tmpdir / "test.npyd"), NumpyFormat, "npy_data")
+
+
+def test_write_read(npy_data):
+    """Test the arrays are read back as read-only memory maps"""
+    assert NumpyFormat.list_keys(npy_data.filename) == ["array", "scale"]
+    data = npy_data.get_data()
+    assert isinstance(data["array"], np.memmap)
+    assert not data["array"].flags.writeable
+    assert data["array"][2, 3] == 11.0
+    assert data["scale"] == 2.5
+    assert npy_data.get_data(keys=["scale"]) == {"scale": 2.5}
+
+
+def test_read_in_memory(npy_data):
+    """Test the arrays can be read into memory"""
+    npy_data.file_format_kwargs = {"mmap_mode": None}
+    array = npy_data.get_data()["array"]
+    assert not isinstance(array, np.memmap)
+    assert array.sum() == 66.0
+
+
+def test_rewrite(npy_data):
+    """Test rewriting a file keeps the memory maps of the previous one valid"""
+    DataCache.shared().clear()
+    array = npy_data.get_data()["array"]
+    assert DataCache.shared().stats()["bytes"] < array.nbytes
+    new_data = ArrayData.from_dict({"array": np.zeros(2)}, "new_data")
+    new_data.write(npy_data.filename, NumpyFormat)
+    assert list(npy_data.get_data()["array"]) == [0.0, 0.0]
+    assert array[2, 3] == 11.0
+    assert not [
+        f for f in os.listdir(os.path.dirname(npy_data.filename)) if f.startswith(".")
+    ]
+
+
+def test_invalid_data(tmpdir):
+    """Test keys which are not file names and object values are rejected"""
+    data = ArrayData.from_dict({"array": 1, "a/b": 2}, "test_data")
+    with pytest.raises(ValueError):
+        data.write(str(tmpdir / "test.npyd"), NumpyFormat)
+    data = ArrayData.from_dict({"array": [1, "a", None]}, "test_data")
+    with pytest.raises(TypeError):
+        data.write(str(tmpdir / "test.npyd"), NumpyFormat)
+    assert not os.listdir(str(tmpdir))
+
+
+def test_chunks(tmpdir):
+    """Test writing and reading data in chunks"""
+    rows = np.arange(30.0).reshape(10, 3)
+    source = ArrayData.from_dict({"array": rows, "scale": 2.5}, "source")
+    chunks = list(source.iter_chunks(4))
+    assert [len(chunk["array"]) for chunk in chunks] == [4, 4, 2]
+    assert all(chunk["scale"] == 2.5 for chunk in chunks)
+
+    fn = str(tmpdir / "chunks.npyd")
+    written = ArrayData.write_chunks(iter(chunks), fn, NumpyFormat, "written")
+    array = written.get_data()["array"]
+    assert array.shape == (10, 3)
+    assert (array == rows).all()
+    assert written.get_data()["scale"] == 2.5
+
+    chunk_sizes = [len(c["array"]) for c in written.iter_chunks(3, keys=["array"])]
+    assert chunk_sizes == [3, 3, 3, 1]
+    # appending to an existing file, ints are cast to the float dtype
+    ArrayData.write_chunks(
+        [{"array": np.ones((1, 3), dtype=int), "scale": 1.0}], fn, NumpyFormat, "w"
+    )
+    assert written.get_data()["array"].shape == (11, 3)
+    with pytest.raises(ValueError):
+        NumpyFormat.append_chunk(fn, {"array": np.ones((1, 2)), "scale": 1.0})
+    with pytest.raises(KeyError):
+        NumpyFormat.append_chunk(fn, {"array": np.ones((1, 3))})
+    assert written.get_data()["array"].shape == (11, 3)
+
+
+def test_append_chunk_checks(tmpdir):
+    """Test a chunk is checked before any of its rows is appended"""
+    fn = str(tmpdir / "chunks.npyd")
+    with pytest.raises(TypeError):
+        NumpyFormat.append_chunk(fn, {"array": np.ones(2), "other": [object()]})
+    # the first chunk is written atomically
+    assert os.listdir(str(tmpdir)) == []
+
+    NumpyFormat.append_chunk(fn, {"array": np.ones(2), "other": np.ones((2, 2))})
+    with pytest.raises(ValueError):
+        NumpyFormat.append_chunk(fn, {"array": np.ones(1), "other": np.ones((1, 3))})
+    data = ArrayData.from_file(fn, NumpyFormat, "data").get_data()
+    assert data["array"].shape == (2,)
+    assert data["other"].shape == (2, 2)
+
+
+def test_append_chunk_cache(tmpdir):
+    """Test appending a chunk invalidates the cached data of the directory"""
+    cache = DataCache.shared()
+    cache.clear()
+    cache.max_bytes = 2**20
+    try:
+        fn = str(tmpdir / "chunks.npyd")
+        NumpyFormat.append_chunk(fn, {"array": np.ones(2)})
+        data = ArrayData.from_file(fn, NumpyFormat, "data", mmap_mode=None)
+        assert data.get_data()["array"].shape == (2,)
+        NumpyFormat.append_chunk(fn, {"array": np.ones(2)})
+        assert data.get_data()["array"].shape == (4,)
+    finally:
+        cache.max_bytes = 0
+        cache.clear()
+
+
+def test_chunks_lengths():
+    """Test the arrays split into chunks must have the same length"""
+    data = ArrayData.from_dict({"array": [1, 2, 3], "other": [1, 2]}, "data")
+    with pytest.raises(ValueError):
+        list(data.iter_chunks(2))
+    with pytest.raises(ValueError):
+        list(data.iter_chunks(0))
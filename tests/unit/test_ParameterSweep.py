@@ -0,0 +1,124 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from test_BaseCalculator import PlusCalculator, NumberData
+from libpyvinyl.Instrument import Instrument
+from libpyvinyl.ParameterSweep import (
+    ParameterSweep,
+    grid_points,
+    random_points,
+    latin_hypercube_points,
+)
+
+
+@pytest.fixture()
+def calculator(tmpdir):
+    input1 = NumberData.from_dict({"number": 1}, "input1")
+    input2 = NumberData.from_dict({"number": 2}, "input2")
+    plus = PlusCalculator("plus", [input1, input2], instrument_base_dir=str(tmpdir))
+    plus.parameters["plus_times"].add_interval(1, 10, True)
+    return plus
+
+
+@pytest.fixture()
+def instrument(tmpdir):
+    input1 = NumberData.from_dict({"number": 1}, "input1")
+    input2 = NumberData.from_dict({"number": 2}, "input2")
+    first = PlusCalculator("first", [input1, input2], output_keys="first")
+    second = PlusCalculator("second", [first.output["first"], input2])
+    my_instrument = Instrument("myInstrument", instrument_base_dir=str(tmpdir))
+    my_instrument.add_calculator(first)
+    my_instrument.add_calculator(second)
+    my_instrument.set_instrument_base_dir(str(tmpdir))
+    links = {"first": "plus_times", "second": "plus_times"}
+    my_instrument.add_master_parameter("plus_times", links)
+    return my_instrument
+
+
+def test_grid_points():
+    """Test the cartesian product of the axes"""
+    points = grid_points({"a": [1, 2, 3], "b": ["x", "y"]})
+    assert len(points) == 6
+    assert points[0] == {"a": 1, "b": "x"}
+    assert points[-1] == {"a": 3, "b": "y"}
+
+
+def test_random_points():
+    """Test random points are in range and reproducible"""
+    points = random_points({"a": (0.0, 1.0), "b": (5.0, 6.0)}, 20, seed=1)
+    assert len(points) == 20
+    assert all(0 <= p["a"] <= 1 and 5 <= p["b"] <= 6 for p in points)
+    assert points == random_points({"a": (0.0, 1.0), "b": (5.0, 6.0)}, 20, seed=1)
+
+
+def test_latin_hypercube_points():
+    """Test every stratum of every parameter holds exactly one point"""
+    n = 10
+    points = latin_hypercube_points({"a": (0.0, 1.0), "b": (-10.0, 10.0)}, n, seed=2)
+    strata_a = sorted(int(p["a"] * n) for p in points)
+    strata_b = sorted(int((p["b"] + 10) / 20 * n) for p in points)
+    assert strata_a == list(range(n))
+    assert strata_b == list(range(n))
+
+
+def test_validate_illegal_point(calculator):
+    """Test illegal points are reported before anything runs"""
+    sweep = ParameterSweep(calculator, [{"plus_times": 2}, {"plus_times": 20}])
+    with pytest.raises(ValueError, match="point 1"):
+        sweep.run()
+
+
+def test_sweep_calculator(calculator, tmpdir):
+    """Test sweeping a calculator on a thread pool"""
+    sweep = ParameterSweep(calculator, grid_points({"plus_times": [1, 2, 3]}))
+    with ThreadPoolExecutor(2) as executor:
+        results = {index: output for index, _, output in sweep.run(executor=executor)}
+    assert [results[i].get_data()["number"] for i in range(3)] == [3, 5, 7]
+    assert calculator.parameters["plus_times"].value == 1
+    assert Path(sweep.point_dir(2)) == Path(tmpdir) / "point_000002"
+    assert (Path(sweep.point_dir(2)) / "PlusCalculator").is_dir()
+
+
+def test_sweep_in_flight(calculator):
+    """Test the points are submitted as the workers become free"""
+    submitted = []
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):
+            submitted.append(args[3])
+            return super().submit(*args, **kwargs)
+
+    sweep = ParameterSweep(calculator, grid_points({"plus_times": range(1, 11)}))
+    with RecordingExecutor(1) as executor:
+        results = sweep.run(max_workers=1, executor=executor)
+        next(results)
+        assert len(submitted) == 2
+        assert len(list(results)) == 9
+    assert sorted(submitted) == list(range(10))
+
+
+def test_sweep_calculator_process_pool(calculator):
+    """Test sweeping a calculator on the default process pool"""
+    sweep = ParameterSweep(calculator, [{"plus_times": 1}, {"plus_times": 4}])
+    results = sorted(
+        (index, output.get_data()["number"]) for index, _, output in sweep.run(2)
+    )
+    assert results == [(0, 3), (1, 9)]
+
+
+def test_sweep_instrument(instrument):
+    """Test sweeping master and calculator parameters of an instrument"""
+    points = [{"plus_times": 1}, {"plus_times": 2, "first/plus_times": 1}]
+    sweep = ParameterSweep(instrument, points)
+    with ThreadPoolExecutor(2) as executor:
+        results = {index: output for index, _, output in sweep.run(executor=executor)}
+    assert results[0].get_data()["number"] == 5
+    assert results[1].get_data()["number"] == 7
+
+
+def test_sweep_unknown_name(instrument):
+    """Test names which can not be resolved"""
+    sweep = ParameterSweep(instrument, [{"unknown": 1}])
+    with pytest.raises(KeyError):
+        sweep.validate()
@@ -1,13 +1,17 @@
+import copy
 import unittest
+import pickle
 import numpy
 import pytest
 import os
 import tempfile
 from pint import Quantity
 from pint import Unit
+import pint.errors
 from libpyvinyl.Parameters import Parameter
 from libpyvinyl.Parameters import CalculatorParameters
 from libpyvinyl.Parameters import InstrumentParameters
+from libpyvinyl.Parameters import MasterParameter
 
 
 class Test_Parameter(unittest.TestCase):
@@ -329,8 +333,59 @@ class Test_Parameter(unittest.TestCase):
 
         par.add_interval(3, 4.5, True)
         par.value = 4.0
-        par_from_dict = Parameter.from_dict(par.__dict__)
+        par_from_dict = Parameter.from_dict(par.to_dict())
         self.assertEqual(par_from_dict.value, 4.0)
+        self.assertFalse(par_from_dict.is_legal(5.0))
+
+        # Unknown fields, e.g. of another version, are ignored with a warning
+        with self.assertWarns(UserWarning):
+            par_from_dict = Parameter.from_dict(dict(par.to_dict(), unknown=1))
+        self.assertEqual(par_from_dict.value, 4.0)
+        self.assertFalse(hasattr(par_from_dict, "unknown"))
+
+    def test_parameter_fingerprint(self):
+        par1 = Parameter("test1", unit="m")
+        par2 = Parameter("test2", unit="m", comment="comment")
+        self.assertEqual(par1.fingerprint(), par2.fingerprint())
+
+        par1.value = 1.0
+        fingerprint = par1.fingerprint()
+        self.assertNotEqual(fingerprint, par2.fingerprint())
+        par2.value = Quantity(100, "cm")
+        self.assertEqual(fingerprint, par2.fingerprint())
+        # integer and float magnitudes of the same quantity are equal
+        par2.value = 1
+        self.assertEqual(fingerprint, par2.fingerprint())
+        par1.value = Quantity(100, "cm")
+        self.assertEqual(fingerprint, par1.fingerprint())
+        par1.value = [1, 2]
+        par2.value = [1.0, 2.0]
+        self.assertEqual(par1.fingerprint(), par2.fingerprint())
+        par1.value = 1.0
+
+        par1.add_interval(0, 2, True)
+        self.assertNotEqual(par1.fingerprint(), fingerprint)
+        fingerprint = par1.fingerprint()
+        par1.clear_intervals()
+        self.assertNotEqual(par1.fingerprint(), fingerprint)
+        fingerprint = par1.fingerprint()
+        par1.unit = "cm"
+        self.assertNotEqual(par1.fingerprint(), fingerprint)
+
+    def test_parameter_compact_storage(self):
+        par1 = Parameter("test1", unit="meV")
+        par2 = Parameter("test2", unit="meV")
+        self.assertFalse(hasattr(par1, "__dict__"))
+        self.assertIs(par1._Parameter__unit, par2._Parameter__unit)
+        self.assertIs(par1._Parameter__intervals, par2._Parameter__options)
+        self.assertEqual(par1.get_intervals(), [])
+
+        par1.add_interval(0, 1, True)
+        par1.add_option(2, True)
+        self.assertEqual(len(par1.get_intervals()), 1)
+        self.assertEqual(len(par1.get_options()), 1)
+        self.assertEqual(par2.get_intervals(), [])
+        self.assertEqual(par2.get_options(), [])
 
     def test_print_legal_interval(self):
         par = Parameter("test")
@@ -438,6 +493,110 @@ class Test_Parameter(unittest.TestCase):
         self.assertFalse(undulator_length.is_legal(9.0 * centimeter))
         self.assertTrue(undulator_length.is_legal(5.5e4 * Unit("centimeter")))
 
+    def test_many_disjoint_intervals(self):
+        par = Parameter("test", unit="m")
+        for i in range(200):
+            par.add_interval(2 * i, 2 * i + 1, True)
+        par.add_interval(0.5, 2.5, True)  # overlapping, merged with [0, 1] and [2, 3]
+
+        self.assertTrue(par.is_legal(150.5))
+        self.assertFalse(par.is_legal(151.5))
+        self.assertTrue(par.is_legal(1.5))
+        self.assertTrue(par.is_legal(399.0))
+        self.assertFalse(par.is_legal(-0.1))
+        self.assertFalse(par.is_legal(float("nan")))
+        self.assertTrue(par.is_legal(Quantity(15050, "cm")))
+        with pytest.raises(pint.errors.DimensionalityError):
+            par.is_legal(Quantity(1.5, "s"))
+
+    def test_options_normalised_units(self):
+        par = Parameter("test", unit="cm")
+        par.add_option(list(range(100)), True)
+
+        self.assertTrue(par.is_legal(Quantity(0.05, "m")))
+        self.assertTrue(par.is_legal(99))
+        self.assertFalse(par.is_legal(Quantity(0.055, "m")))
+        self.assertFalse(par.is_legal(Quantity(5, "s")))
+
+    def test_constraints_rebuilt_after_clear(self):
+        par = Parameter("test")
+        par.add_interval(3, 4.5, True)
+        par.add_option(9.8, True)
+        self.assertTrue(par.is_legal(4.0))
+        self.assertTrue(par.is_legal(9.8))
+
+        par.clear_intervals()
+        par.add_interval(5, 6, True)
+        self.assertFalse(par.is_legal(4.0))
+        self.assertTrue(par.is_legal(5.5))
+
+        par.clear_options()
+        self.assertFalse(par.is_legal(9.8))
+
+    def test_parameter_numpy_array_value(self):
+        par = Parameter("test", unit="cm")
+        par.add_interval(0, 10, True)
+        par.add_option(20, True)
+
+        values = numpy.linspace(0, 10, 100000)
+        par.value = values
+        numpy.testing.assert_array_equal(par.value, values)
+        par.value = values.reshape(1000, 100) / 2
+        self.assertEqual(par.value.shape, (1000, 100))
+        par.value = Quantity(values / 100, "m")
+        numpy.testing.assert_allclose(par.value, values)
+
+        values[-1] = 20
+        self.assertTrue(par.is_legal(values))
+        values[0] = -1
+        self.assertFalse(par.is_legal(values))
+        with self.assertRaises(ValueError):
+            par.value = values
+        with pytest.raises(pint.errors.DimensionalityError):
+            par.value = Quantity(values, "s")
+
+    def test_parameter_numpy_array_type(self):
+        par = Parameter("test")
+        par.value = numpy.arange(10)
+        self.assertEqual(par._Parameter__value_type, int)
+        with pytest.raises(TypeError):
+            par.value = numpy.array(["a", "b"])
+
+        par = Parameter("test")
+        par.add_option([True], True)
+        self.assertFalse(par.is_legal(numpy.array([1.0, 2.0])))
+        self.assertTrue(par.is_legal([True, True]))
+
+    def test_parameter_list_value(self):
+        par = Parameter("test")
+        par.add_interval(0, 1, True)
+        self.assertTrue(par.is_legal(list(numpy.linspace(0, 1, 1000))))
+        self.assertFalse(par.is_legal([0.5, 2]))
+        with pytest.raises(TypeError):
+            par.value = [0.5, "A"]
+
+    def test_parameter_value_conversion(self):
+        par = Parameter("energy", unit="meV")
+        par.add_interval(0, 100, True)
+        par.value = Quantity(0.01, "eV")
+        self.assertAlmostEqual(par.value, 10.0)
+        self.assertEqual(par.pint_value.units, Unit("meV"))
+        with self.assertRaises(ValueError):
+            par.value = Quantity(1, "eV")
+
+        par.unit = "eV"
+        self.assertAlmostEqual(par.value, 0.01)
+        self.assertAlmostEqual(par.pint_value.m_as("meV"), 10.0)
+
+        temperature = Parameter("temperature", unit="K")
+        temperature.value = Quantity(25.0, "degC")
+        self.assertAlmostEqual(temperature.value, 298.15)
+
+        flag = Parameter("flag")
+        flag.value = True
+        with self.assertRaises(TypeError):
+            flag.pint_value
+
 
 class Test_Parameters(unittest.TestCase):
     def test_initialize_parameters_from_list(self):
@@ -534,6 +693,178 @@ class Test_Parameters(unittest.TestCase):
         assert parameters.__contains__("test") == True
         assert parameters.__contains__("test3") == False
 
+    def test_fingerprint(self):
+        parameters = source_calculator()
+        fingerprint = parameters.fingerprint()
+        self.assertIs(parameters.fingerprint(), fingerprint)
+        self.assertEqual(fingerprint, source_calculator().fingerprint())
+
+        parameters["position"] = 1.0
+        self.assertNotEqual(parameters.fingerprint(), fingerprint)
+        fingerprint = parameters.fingerprint()
+        with self.assertRaises(ValueError):
+            parameters.set_many({"position": 0.5, "energy": -1})
+        self.assertEqual(parameters.fingerprint(), fingerprint)
+
+        parameters.new_parameter("new")
+        self.assertNotEqual(parameters.fingerprint(), fingerprint)
+
+    def test_version(self):
+        parameters = source_calculator()
+        other = source_calculator()
+        version = parameters.version
+        self.assertNotEqual(other.version, version)
+        other["energy"] = 5000
+        self.assertEqual(parameters.version, version)
+
+        parameters["energy"] = 5000
+        self.assertNotEqual(parameters.version, version)
+        version = parameters.version
+        parameters["energy"] = 6000
+        parameters["energy"] = 5000
+        self.assertEqual(parameters.version, version)
+
+    def test_fingerprint_pickled(self):
+        parameters = source_calculator()
+        fingerprint = parameters.fingerprint()
+        version = parameters.version
+        loaded = pickle.loads(pickle.dumps(parameters))
+        self.assertEqual(loaded.fingerprint(), fingerprint)
+        self.assertNotEqual(loaded.version, version)
+        version = loaded.version
+
+        # the loaded parameters drive the fingerprint of the loaded collection
+        loaded["energy"] = 5000
+        self.assertNotEqual(loaded.fingerprint(), fingerprint)
+        self.assertNotEqual(loaded.version, version)
+        self.assertEqual(parameters.fingerprint(), fingerprint)
+
+    def test_fingerprint_owners(self):
+        parameters = source_calculator()
+        other = source_calculator()
+        fingerprint = parameters.fingerprint()
+        # changing the parameters of another collection keeps the cached fingerprint
+        other["energy"] = 5000
+        self.assertIs(parameters.fingerprint(), fingerprint)
+
+        clone = parameters.clone()
+        clone["energy"] = 5000
+        self.assertIs(parameters.fingerprint(), fingerprint)
+        self.assertEqual(clone.fingerprint(), other.fingerprint())
+
+        energy = parameters["energy"]
+        del parameters["energy"]
+        fingerprint = parameters.fingerprint()
+        energy.value = 5000
+        self.assertIs(parameters.fingerprint(), fingerprint)
+        parameters.add(energy)
+        self.assertNotEqual(parameters.fingerprint(), fingerprint)
+        fingerprint = parameters.fingerprint()
+        energy.value = 4000
+        self.assertNotEqual(parameters.fingerprint(), fingerprint)
+
+    def test_set_many(self):
+        parameters = source_calculator()
+        changes = parameters.set_many(
+            {"energy": 4000, "delta_energy": Quantity(0.1, "keV"), "gaussian": True}
+        )
+        self.assertEqual(list(changes.keys()), ["delta_energy", "gaussian"])
+        self.assertEqual(changes["gaussian"], (None, True))
+        self.assertEqual(parameters["delta_energy"].value, 100)
+
+    def test_set_many_rollback(self):
+        parameters = source_calculator()
+        with self.assertRaisesRegex(ValueError, "position.*\n.*gaussian"):
+            parameters.set_many(
+                {"energy": 5000, "delta_energy": 10, "position": 3, "gaussian": "no"}
+            )
+        self.assertEqual(parameters["energy"].value, 4000)
+        self.assertIsNone(parameters["delta_energy"].value_no_conversion)
+        self.assertEqual(parameters["gaussian"].get_options(), [False, True])
+        # the type of a parameter is restored as well
+        parameters["gaussian"] = False
+
+        with self.assertRaises(KeyError):
+            parameters.set_many({"energy": 5000, "unknown": 1})
+        self.assertEqual(parameters["energy"].value, 4000)
+
+    def test_binary(self):
+        parameters = source_calculator()
+        parameters.new_parameter("label", comment=None).value = "sample A"
+        parameters.new_parameter("counts").value = 3
+        parameters.new_parameter("shape").value = [1, 2, 3]
+        # integers outside the int64 range are stored as objects
+        parameters.new_parameter("large", unit="m").value = Quantity(2**70, "m")
+        parameters.new_parameter("larger").value = -(2**70)
+        parameters["energy"].add_option(Quantity(5, "keV"), True)
+        with tempfile.TemporaryDirectory() as d:
+            fname = os.path.join(d, "parameters.npz")
+            parameters.to_binary(fname)
+            loaded = CalculatorParameters.from_binary(fname)
+
+        self.assertEqual(list(loaded.parameters), list(parameters.parameters))
+        self.assertEqual(loaded.fingerprint(), parameters.fingerprint())
+        self.assertEqual(loaded["energy"].pint_value, Quantity(4000, "eV"))
+        self.assertIsNone(loaded["delta_energy"].value_no_conversion)
+        self.assertEqual(loaded["position"].unit, "centimeter")
+        self.assertEqual(loaded["gaussian"].get_options(), [False, True])
+        self.assertEqual(loaded["energy"].get_intervals_are_legal(), True)
+        self.assertEqual(loaded["label"].value, "sample A")
+        self.assertIsNone(loaded["label"].comment)
+        self.assertEqual(loaded["counts"].value, 3)
+        self.assertEqual(loaded["shape"].value, [1, 2, 3])
+        self.assertEqual(loaded["large"].pint_value, Quantity(2**70, "m"))
+        self.assertEqual(loaded["large"].pint_value.magnitude, 2**70)
+        self.assertEqual(loaded["larger"].value, -(2**70))
+        self.assertEqual(loaded["energy"].comment, "Source energy setting")
+
+    def test_binary_arrays(self):
+        parameters = CalculatorParameters()
+        parameters.new_parameter("positions", unit="m").value = [1.0, 2.0]
+        parameters.new_parameter("pixels", unit="mm").value = Quantity(
+            numpy.arange(6).reshape(2, 3), "mm"
+        )
+        with tempfile.TemporaryDirectory() as d:
+            fname = os.path.join(d, "parameters.npz")
+            parameters.to_binary(fname)
+            loaded = CalculatorParameters.from_binary(fname)
+
+        positions = loaded["positions"].pint_value
+        self.assertEqual(positions.units, Unit("m"))
+        numpy.testing.assert_array_equal(positions.magnitude, [1.0, 2.0])
+        pixels = loaded["pixels"].pint_value
+        self.assertEqual(pixels.units, Unit("mm"))
+        numpy.testing.assert_array_equal(pixels.magnitude, [[0, 1, 2], [3, 4, 5]])
+        self.assertEqual(loaded.fingerprint(), parameters.fingerprint())
+
+    def test_clone(self):
+        parameters = source_calculator()
+        clone = parameters.clone()
+        self.assertIsNot(clone.parameters["energy"], parameters.parameters["energy"])
+        clone["energy"] = 5000
+        self.assertEqual(parameters["energy"].value, 4000)
+        self.assertEqual(clone["energy"].value, 5000)
+        parameters["position"].add_interval(2, 3, True)
+        self.assertEqual(len(clone["position"].get_intervals()), 1)
+        for parameter in clone:
+            self.assertIsNot(parameter, parameters.parameters[parameter.name])
+        self.assertNotEqual(clone.version, parameters.version)
+        self.assertEqual(
+            clone.to_dict()["delta_energy"], parameters.to_dict()["delta_energy"]
+        )
+
+    def test_clone_held_reference(self):
+        parameters = source_calculator()
+        energy = parameters["energy"]
+        clone = parameters.clone()
+        # A parameter held before the clone keeps driving the original only
+        energy.value = 5000
+        self.assertEqual(parameters["energy"].value, 5000)
+        self.assertEqual(clone["energy"].value, 4000)
+        energy.value = 7000
+        self.assertEqual(parameters["energy"].value, 7000)
+        self.assertEqual(clone["energy"].value, 4000)
+
 
 def source_calculator():
     """
@@ -619,6 +950,144 @@ class Test_Instruments(unittest.TestCase):
         self.assertEqual(master_value, master_params["absorption"].value)
         self.assertEqual(self.instr_parameters.master["absorption"].links, links)
 
+    def test_link_set_many(self):
+        links = {"Sample top": "absorption", "Sample bottom": "absorption"}
+        self.instr_parameters.add_master_parameter("absorption", links, unit="barns")
+        changes = self.instr_parameters.master.set_many({"absorption": 2.0})
+        self.assertEqual(
+            sorted(changes.keys()),
+            ["Sample bottom/absorption", "Sample top/absorption", "absorption"],
+        )
+        self.assertEqual(self.instr_parameters["Sample top"]["absorption"].value, 2.0)
+
+        with self.assertRaises(ValueError):
+            self.instr_parameters.master.set_many({"absorption": -1.0})
+        self.assertEqual(self.instr_parameters["Sample top"]["absorption"].value, 2.0)
+        self.assertEqual(self.instr_parameters.master["absorption"].value, 2.0)
+
+    def test_chained_masters(self):
+        self.instr_parameters.add_master_parameter(
+            "radius", {"Sample top": "radius", "Sample bottom": "radius"}, unit="cm"
+        )
+        self.instr_parameters.add_master_parameter(
+            "size", {"Master": "radius", "Source": "position"}, unit="cm"
+        )
+        plan = self.instr_parameters.master.compile()
+        self.assertEqual(
+            [name for name, _ in plan["size"]],
+            ["Sample top/radius", "Sample bottom/radius", "radius", "Source/position"],
+        )
+
+        self.instr_parameters.master["size"] = 1.0
+        self.assertEqual(self.instr_parameters["Sample bottom"]["radius"].value, 1.0)
+        self.assertEqual(self.instr_parameters.master["radius"].value, 1.0)
+        self.assertEqual(self.instr_parameters["Source"]["position"].value, 1.0)
+
+        # Source/position only accepts values up to 1.5 cm, nothing is changed
+        with self.assertRaisesRegex(ValueError, "Source/position"):
+            self.instr_parameters.master["size"] = 2.0
+        self.assertEqual(self.instr_parameters["Sample top"]["radius"].value, 1.0)
+
+        with self.assertRaises(RuntimeError):
+            self.instr_parameters.add_master_parameter("other", {"Master": "unknown"})
+
+    def test_master_links(self):
+        links = {"Sample top": "radius"}
+        self.instr_parameters.add_master_parameter("top", links, unit="cm")
+        self.instr_parameters.add_master_parameter(
+            "bottom", {"Sample bottom": "radius"}, unit="cm"
+        )
+        self.instr_parameters.add_master_parameter(
+            "radius", {"Master": ["top", "bottom"]}, unit="cm"
+        )
+        master = self.instr_parameters.master
+        master["radius"] = 1.0
+        self.assertEqual(self.instr_parameters["Sample top"]["radius"].value, 1.0)
+        self.assertEqual(self.instr_parameters["Sample bottom"]["radius"].value, 1.0)
+        self.assertEqual(master["bottom"].value, 1.0)
+
+        # the links are only changed through the setter, which invalidates the plan
+        links["Sample bottom"] = "radius"
+        with self.assertRaises(TypeError):
+            master["top"].links["Sample bottom"] = "radius"
+        master["top"] = 2.0
+        self.assertEqual(self.instr_parameters["Sample bottom"]["radius"].value, 1.0)
+        master["top"].links = {"Sample bottom": "radius"}
+        master["top"] = 3.0
+        self.assertEqual(self.instr_parameters["Sample top"]["radius"].value, 2.0)
+        self.assertEqual(self.instr_parameters["Sample bottom"]["radius"].value, 3.0)
+        self.assertEqual(copy.copy(master["radius"]).links, master["radius"].links)
+
+        with tempfile.TemporaryDirectory() as d:
+            fname = os.path.join(d, "instrument.npz")
+            self.instr_parameters.to_binary(fname)
+            loaded = InstrumentParameters.from_binary(fname)
+        self.assertEqual(loaded.master["radius"].links, {"Master": ["top", "bottom"]})
+
+        with self.assertRaises(ValueError):
+            self.instr_parameters.add("Master", CalculatorParameters())
+
+    def test_master_plan_replaced_parameters(self):
+        self.instr_parameters.add_master_parameter(
+            "top", {"Sample top": "radius"}, unit="cm"
+        )
+        self.instr_parameters.add_master_parameter(
+            "radius", {"Master": "top", "Sample bottom": "radius"}, unit="cm"
+        )
+        master = self.instr_parameters.master
+        master["radius"] = 1.0
+
+        # a parameter replaced in the public dict of its collection
+        radius = Parameter("radius", unit="cm")
+        self.instr_parameters["Sample top"].parameters["radius"] = radius
+        master["radius"] = 2.0
+        self.assertEqual(radius.value, 2.0)
+
+        # a collection replaced in the public dict of the instrument
+        bottom = sample_calculator()
+        self.instr_parameters.parameters_dict["Sample bottom"] = bottom
+        master["radius"] = 3.0
+        self.assertEqual(bottom["radius"].value, 3.0)
+        self.assertEqual(radius.value, 3.0)
+        targets = dict(master.compile()["radius"])
+        self.assertIs(targets["Sample bottom/radius"], bottom["radius"])
+
+    def test_master_cycle(self):
+        self.instr_parameters.add_master_parameter("a", {"Sample top": "radius"})
+        self.instr_parameters.add_master_parameter("b", {"Master": "a"})
+        self.instr_parameters.master["a"].add_links({"Master": "b"})
+        with self.assertRaisesRegex(RuntimeError, "a -> b -> a"):
+            self.instr_parameters.master["a"] = 1.0
+
+    def test_master_set_many(self):
+        links = {"Sample top": "absorption", "Sample bottom": "absorption"}
+        self.instr_parameters.add_master_parameter("absorption", links, unit="barns")
+        self.instr_parameters.add_master_parameter(
+            "top", {"Sample top": "absorption"}, unit="barns"
+        )
+        self.instr_parameters.add_master_parameter(
+            "height", {"Sample top": "height", "Sample bottom": "height"}, unit="cm"
+        )
+        changes = self.instr_parameters.master.set_many(
+            {"absorption": 2.0, "top": 2.0, "height": 3.0}
+        )
+        self.assertEqual(len(changes), 7)
+        self.assertEqual(self.instr_parameters["Sample bottom"]["height"].value, 3.0)
+
+        with self.assertRaisesRegex(ValueError, "set by absorption and top"):
+            self.instr_parameters.master.set_many({"absorption": 1.0, "top": 4.0})
+        self.assertEqual(self.instr_parameters["Sample top"]["absorption"].value, 2.0)
+
+    def test_fingerprint(self):
+        fingerprint = self.instr_parameters.fingerprint()
+        self.instr_parameters["Sample top"]["radius"] = 1.0
+        self.assertNotEqual(self.instr_parameters.fingerprint(), fingerprint)
+        fingerprint = self.instr_parameters.fingerprint()
+
+        links = {"Sample top": "absorption", "Sample bottom": "absorption"}
+        self.instr_parameters.add_master_parameter("absorption", links, unit="barns")
+        self.assertNotEqual(self.instr_parameters.fingerprint(), fingerprint)
+
     def test_print(self):
         print(self.instr_parameters)
 
@@ -641,6 +1110,48 @@ class Test_Instruments(unittest.TestCase):
         self.assertIn("absorption", master_params.keys())
         self.assertEqual(master_value, master_params["absorption"].value)
         self.assertEqual(self.instr_parameters.master["absorption"].links, links)
+        self.assertEqual(master_params["absorption"].links, links)
+        instr_json.master["absorption"] = 1.0
+        self.assertEqual(instr_json["Sample top"]["absorption"].value, 1.0)
+
+    def test_clone_master(self):
+        self.instr_parameters.add_master_parameter(
+            "energy", {"Source": "energy"}, unit="eV"
+        )
+        self.instr_parameters.master["energy"] = 5000
+        clone = self.instr_parameters["Source"].clone()
+        # The links compiled before the clone must not reach the clone
+        self.instr_parameters.master["energy"] = 6000
+        self.assertEqual(self.instr_parameters["Source"]["energy"].value, 6000)
+        self.assertEqual(clone["energy"].value, 5000)
+
+    def test_binary(self):
+        links = {"Sample top": "absorption", "Sample bottom": "absorption"}
+        self.instr_parameters.add_master_parameter("absorption", links, unit="barns")
+        self.instr_parameters.master["absorption"] = 3.4
+        temp_file = os.path.join(self.d.name, "test.npz")
+        self.instr_parameters.to_binary(temp_file)
+
+        instr_binary = InstrumentParameters.from_binary(temp_file)
+        self.assertEqual(
+            list(instr_binary.parameters_dict.keys()),
+            ["Source", "Sample top", "Sample bottom"],
+        )
+        self.assertEqual(instr_binary["Source"]["energy"].value, 4000)
+        self.assertEqual(instr_binary.master["absorption"].links, links)
+        instr_binary.master["absorption"] = 1.5
+        self.assertEqual(instr_binary["Sample bottom"]["absorption"].value, 1.5)
+
+    def test_binary_master_without_links(self):
+        self.instr_parameters.add_master_parameter("offset", {}, unit="m")
+        temp_file = os.path.join(self.d.name, "test.npz")
+        self.instr_parameters.to_binary(temp_file)
+
+        instr_binary = InstrumentParameters.from_binary(temp_file)
+        self.assertIsInstance(instr_binary.master["offset"], MasterParameter)
+        self.assertEqual(instr_binary.master["offset"].links, {})
+        instr_binary.master["offset"] = 1.0
+        self.assertEqual(instr_binary.master["offset"].value, 1.0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+import asyncio
+import json
+
+import pytest
+
+from libpyvinyl.Instrument import Instrument
+from libpyvinyl.Parameters import CalculatorParameters
+from libpyvinyl.Profiler import Profiler
+from test_BaseCalculator import PlusCalculator
+from test_BaseData import NumberData, TXTFormat
+
+
+@pytest.fixture()
+def instrument(tmp_path):
+    input1 = NumberData.from_dict({"number": 1}, "input1")
+    input2 = NumberData.from_dict({"number": 2}, "input2")
+    first = PlusCalculator(
+        "first",
+        [input1, input2],
+        output_keys="first",
+        instrument_base_dir=str(tmp_path),
+    )
+    second = PlusCalculator(
+        "second", [first.output["first"], input2], instrument_base_dir=str(tmp_path)
+    )
+    my_instrument = Instrument("myInstrument", instrument_base_dir=str(tmp_path))
+    my_instrument.add_calculator(first)
+    my_instrument.add_calculator(second)
+    links = {"first": "plus_times", "second": "plus_times"}
+    my_instrument.add_master_parameter("plus_times", links)
+    return my_instrument
+
+
+def by_name(profiler, name):
+    return [span for span in profiler.spans if span.name == name]
+
+
+def test_profiler_inactive(instrument):
+    """Test nothing is recorded without an active profiler"""
+    profiler = Profiler()
+    instrument.run()
+    assert Profiler.active is None
+    with profiler:
+        assert Profiler.active is profiler
+        with pytest.raises(RuntimeError):
+            Profiler().start()
+    assert Profiler.active is None
+    assert profiler.spans == []
+    instrument.run()
+    assert profiler.spans == []
+
+
+@pytest.mark.parametrize("max_workers", [None, 2])
+def test_profile_instrument(instrument, max_workers):
+    """Test the spans of a run nest, also on a thread pool"""
+    with Profiler() as profiler:
+        instrument.master["plus_times"] = 2
+        instrument.run(max_workers=max_workers)
+
+    (run,) = by_name(profiler, "myInstrument.run")
+    (first,) = by_name(profiler, "first.backengine")
+    (second,) = by_name(profiler, "second.backengine")
+    assert first.parent is run and second.parent is run
+    assert first.category == "calculator"
+    assert [span.parent for span in by_name(profiler, "first.get_data")] == [second]
+    assert len(by_name(profiler, "MasterParameters.propagate")) == 1
+    assert run.wall_ns >= first.wall_ns + second.wall_ns
+    if max_workers is None:
+        assert run.self_ns == run.wall_ns - first.wall_ns - second.wall_ns
+    else:
+        # the calculators ran on other threads
+        assert run.self_ns == run.wall_ns
+    assert "second.backengine" in profiler.summary()
+
+
+def test_profile_arun(instrument):
+    """Test the spans of the calculators awaited by arun"""
+    with Profiler() as profiler:
+        asyncio.run(instrument.arun())
+    (arun,) = by_name(profiler, "myInstrument.arun")
+    (second,) = by_name(profiler, "second.abackengine")
+    assert second.parent is arun
+    # the backengine runs on a thread, in the context of the coroutine
+    assert [span.parent for span in by_name(profiler, "first.get_data")] == [second]
+
+
+def test_profile_io(tmp_path):
+    """Test the bytes read and written by the formats and the JSON I/O"""
+    txt_file = str(tmp_path / "number.txt")
+    json_file = str(tmp_path / "parameters.json")
+    parameters = CalculatorParameters()
+    parameters.new_parameter("energy", unit="eV").value = 1.0
+
+    with Profiler() as profiler:
+        data = NumberData.from_dict({"number": 4}, "number").write(txt_file, TXTFormat)
+        assert data.get_data()["number"] == 4
+        parameters.to_json(json_file)
+        CalculatorParameters.from_json(json_file)
+        with pytest.raises(OSError):
+            CalculatorParameters.from_json(str(tmp_path / "missing.json"))
+
+    (write,) = by_name(profiler, "TXTFormat.write")
+    (read,) = by_name(profiler, "TXTFormat.read")
+    assert write.category == "format"
+    assert write.bytes_written > 0 and read.bytes_read == write.bytes_written
+    assert read.parent.name == "number_to_TXTFormat.get_data"
+    (to_json,) = by_name(profiler, "CalculatorParameters.to_json")
+    assert to_json.bytes_written > 0
+    loaded, missing = by_name(profiler, "CalculatorParameters.from_json")
+    assert loaded.bytes_read == to_json.bytes_written
+    assert missing.error == "FileNotFoundError"
+
+
+def test_profile_memory():
+    """Test the peak memory of nested spans"""
+    size = 10 * 2**20
+    with Profiler(memory=True) as profiler:
+        with profiler.span("outer", "test"):
+            with profiler.span("inner", "test"):
+                data = bytearray(size)
+                del data
+            with profiler.span("small", "test"):
+                pass
+    (outer,) = by_name(profiler, "outer")
+    (inner,) = by_name(profiler, "inner")
+    (small,) = by_name(profiler, "small")
+    # the memory freed within a span counts towards its peak
+    assert size <= inner.peak_memory < 2 * size
+    assert size <= outer.peak_memory < 2 * size
+    # the peak is not reset, a later span reports the earlier peak as an upper bound
+    assert size - 2**20 < small.peak_memory < 2 * size
+    assert "peak MiB" in profiler.summary()
+
+
+def test_chrome_trace(instrument, tmp_path):
+    """Test exporting the spans as a Chrome trace"""
+    with Profiler() as profiler:
+        instrument.run(max_workers=2)
+    trace_file = str(tmp_path / "trace.json")
+    profiler.write_chrome_trace(trace_file)
+    with open(trace_file) as fp:
+        trace = json.load(fp)
+    events = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert len(events) == len(profiler.spans)
+    (run,) = [event for event in events if event["name"] == "myInstrument.run"]
+    assert run["cat"] == "instrument"
+    assert run["dur"] > 0 and "cpu_ms" in run["args"]
+    threads = [event for event in trace["traceEvents"] if event["ph"] == "M"]
+    assert {event["tid"] for event in threads} == {event["tid"] for event in events}